@@ -0,0 +1,839 @@
+"""
+Array backed graph database.
+
+:class:`~.Graph` keeps a object for every vertex and edge, and every vertex
+keeps two :class:`~.EntitySet` of its edges, so a edge costs a few hundred
+bytes before it has any properties. :class:`ArrayGraph` instead keeps the
+labels, properties and topology of the vertices and edges in flat arrays
+positioned by their identity numbers, and only hands out small
+:class:`ArrayVertex` and :class:`ArrayEdge` handles when they are asked for.
+
+Handles are shared while they are alive, so the same identity number always
+gives the same handle object, and they are freed once nothing refers to
+them.
+"""
+import json
+from array import array
+from collections import Counter, defaultdict
+from itertools import islice
+from weakref import WeakValueDictionary
+from ruruki import interfaces
+from ruruki.csr import CSRGraph
+from ruruki.entities import EntitySet
+from ruruki.filters import compile_predicates, match_properties
+from ruruki.handles import ArrayEdge, ArrayEntity, ArrayVertex, is_live
+from ruruki.indexes import IndexStats, equi_depth_histogram
+from ruruki.interning import Interner
+from ruruki.layouts import LayoutTable
+
+
+_NO_PROPERTIES = {}
+
+
+class _Table(object):
+    """
+    Labels and properties of one kind of entity, positioned by their
+    identity numbers, and the handles currently alive.
+
+    :param handle: Class of the handles.
+    :type handle: :class:`type`
+    """
+    __slots__ = ("handle", "labels", "properties", "handles")
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.labels = array("i")
+        self.properties = []
+        self.handles = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get(self, graph, ident):
+        """
+        Return the handle of the entity.
+
+        :param graph: Graph holding the table.
+        :type graph: :class:`ArrayGraph`
+        :param ident: Identity number of the entity.
+        :type ident: :class:`int`
+        :rtype: :class:`ArrayEntity`
+        """
+        handle = self.handles.get(ident)
+        if handle is None:
+            handle = self.handles[ident] = self.handle(graph, ident)
+        return handle
+
+    def idents(self, code=None):
+        """
+        Iterate over the identity numbers of the entities not removed.
+
+        :param code: Only the entities with this label code, or all of them
+            if :obj:`None`.
+        :type code: :class:`int` or :obj:`None`
+        :returns: Identity numbers in ascending order.
+        :rtype: Iterable of :class:`int`
+        """
+        for ident, each in enumerate(self.labels):
+            if each >= 0 and (code is None or each == code):
+                yield ident
+
+
+class ArrayGraph(interfaces.IGraph):
+    """
+    In-memory graph database keeping its vertices and edges in arrays.
+
+    See :class:`~.IGraph` for doco.
+
+    .. note::
+
+        The vertices and edges appended are copied into the arrays, and are
+        bound to the graph so that they can still be used to refer to the
+        copies. Looking them up again gives :class:`ArrayVertex` and
+        :class:`ArrayEdge` handles.
+
+    .. note::
+
+        There are no property indexes, filters check the properties of
+        every vertex or edge of the label. Edges of a given head or tail
+        are found from the vertex adjacency.
+
+    :param intern_values: Also intern the string values of each label and
+        property key, while they have at most this many distinct values.
+        If :obj:`None`, property values are not interned.
+    :type intern_values: :class:`int` or :obj:`None`
+    """
+
+    def __init__(self, intern_values=None):
+        self._interner = Interner(intern_values)
+        self._layouts = LayoutTable()
+        self._labels = []
+        self._codes = {}
+        self._vertices = _Table(ArrayVertex)
+        self._edges = _Table(ArrayEdge)
+        # per vertex, None or a array of the edge identity numbers.
+        self._in = []
+        self._out = []
+        # edge label code -> array of the number of edges per vertex.
+        self._in_counts = {}
+        self._out_counts = {}
+        self._heads = array("l")
+        self._tails = array("l")
+        # label -> key -> constrained value -> vertex identity number.
+        self._vconstraints = defaultdict(dict)
+
+    def _code(self, label):
+        """
+        Return the code of the label, adding the label if it is new.
+
+        :param label: Entity label.
+        :type label: :class:`str` or :obj:`None`
+        :rtype: :class:`int`
+        """
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self._labels)
+            self._labels.append(self._interner.intern(label))
+        return code
+
+    def _vertex(self, ident):
+        """
+        Return the handle of the vertex.
+
+        :param ident: Vertex identity number.
+        :type ident: :class:`int`
+        :rtype: :class:`ArrayVertex`
+        """
+        return self._vertices.get(self, ident)
+
+    def _edge(self, ident):
+        """
+        Return the handle of the edge.
+
+        :param ident: Edge identity number.
+        :type ident: :class:`int`
+        :rtype: :class:`ArrayEdge`
+        """
+        return self._edges.get(self, ident)
+
+    def _table_of(self, entity):
+        """
+        Return the table for the kind of entity.
+
+        :param entity: Vertex or edge.
+        :type entity: :class:`~.IEntity`
+        :raises TypeError: If the entity is neither a vertex nor a edge.
+        :rtype: :class:`_Table`
+        """
+        if isinstance(entity, interfaces.IVertex):
+            return self._vertices
+        if isinstance(entity, interfaces.IEdge):
+            return self._edges
+        raise TypeError("Unsupported entity type {0}".format(type(entity)))
+
+    def _ident(self, entity):
+        """
+        Return the identity number of a entity of this graph.
+
+        :param entity: Vertex or edge of this graph.
+        :type entity: :class:`~.IEntity`
+        :raises UnknownEntityError: If the entity is not in this graph.
+        :rtype: :class:`int`
+        """
+        if entity not in self:
+            raise interfaces.UnknownEntityError(
+                "Unknown entity {0!r}".format(entity)
+            )
+        return entity.ident
+
+    def _store(self, label, properties):
+        """
+        Return the properties as kept in the arrays.
+
+        :param label: Entity label.
+        :type label: :class:`str` or :obj:`None`
+        :param properties: Properties of the entity.
+        :type properties: :class:`dict`
+        :returns: Compact properties, or :obj:`None` if there are none.
+        :rtype: :class:`~.CompactProperties` or :obj:`None`
+        """
+        if not properties:
+            return None
+        properties = dict(properties)
+        self._interner.intern_properties(label, properties)
+        return self._layouts.compact(properties)
+
+    def _select(self, table, idents, label, kwargs):
+        """
+        Iterate over the identity numbers of the entities matching the
+        label and filter.
+
+        :param table: Table of the entities.
+        :type table: :class:`_Table`
+        :param idents: Identity numbers being checked, or :obj:`None` for
+            all the entities of the table.
+        :type idents: Iterable of :class:`int` or :obj:`None`
+        :param label: Entity label, or :obj:`None` for all labels.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Filter property keys and values, as given to
+            :meth:`~.IEntitySet.filter`.
+        :type kwargs: :class:`dict`
+        :returns: Identity numbers of the matching entities.
+        :rtype: Iterable of :class:`int`
+        """
+        code = None
+        if label is not None:
+            code = self._codes.get(label)
+            if code is None:
+                return iter(())
+
+        if idents is None:
+            idents = table.idents(code)
+        elif code is not None:
+            idents = (each for each in idents if table.labels[each] == code)
+
+        if not kwargs:
+            return iter(idents)
+
+        checks = compile_predicates(kwargs.iteritems(), label)
+        properties = table.properties
+        return (
+            each for each in idents
+            if match_properties(properties[each] or _NO_PROPERTIES, checks)
+        )
+
+    def _vertex_set(self, idents, label, kwargs):
+        """
+        Return a set of the matching vertices.
+
+        :param idents: Vertex identity numbers being checked, which may
+            repeat.
+        :type idents: Iterable of :class:`int`
+        :param label: Vertex label, or :obj:`None` for all labels.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Filter property keys and values.
+        :type kwargs: :class:`dict`
+        :rtype: :class:`~.EntitySet`
+        """
+        idents = sorted(set(idents))
+        return EntitySet(
+            self._vertex(each)
+            for each in self._select(self._vertices, idents, label, kwargs)
+        )
+
+    def _edge_set(self, idents, label, kwargs):
+        """
+        Return a set of the matching edges.
+
+        :param idents: Edge identity numbers being checked, or :obj:`None`.
+        :type idents: Iterable of :class:`int`
+        :param label: Edge label, or :obj:`None` for all labels.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Filter property keys and values.
+        :type kwargs: :class:`dict`
+        :rtype: :class:`~.EntitySet`
+        """
+        return EntitySet(
+            self._edge(each)
+            for each in self._select(self._edges, idents or (), label, kwargs)
+        )
+
+    def _constrained(self, label, properties):
+        """
+        Iterate over the constraints of the label which apply to the
+        properties.
+
+        :param label: Vertex label.
+        :type label: :class:`str` or :obj:`None`
+        :param properties: Vertex properties.
+        :type properties: :class:`dict`
+        :returns: Constrained values and the vertex identity numbers
+            already holding each value.
+        :rtype: Iterable of :class:`tuple` (value, :class:`dict`)
+        """
+        for key, values in self._vconstraints.get(label, {}).iteritems():
+            if not isinstance(key, tuple):
+                if key in properties:
+                    yield properties[key], values
+            elif all(each in properties for each in key):
+                yield tuple(properties[each] for each in key), values
+
+    def _check_constraints(self, label, properties, ident=None):
+        """
+        Check that the vertex properties do not violate a constraint.
+
+        :param label: Vertex label.
+        :type label: :class:`str` or :obj:`None`
+        :param properties: Vertex properties.
+        :type properties: :class:`dict`
+        :param ident: Identity number of the vertex being updated, which
+            may already hold the values.
+        :type ident: :class:`int` or :obj:`None`
+        :raises ConstraintViolation: If another vertex holds a constrained
+            value.
+        """
+        for value, values in self._constrained(label, properties):
+            found = values.get(value)
+            if found is not None and found != ident:
+                raise interfaces.ConstraintViolation(
+                    "Value {0!r} of a {1!r} vertex is already held by "
+                    "{2!r}".format(value, label, self._vertex(found))
+                )
+
+    def _constrain(self, label, properties, ident, add=True):
+        """
+        Add or remove the constrained values of a vertex.
+
+        :param label: Vertex label.
+        :type label: :class:`str` or :obj:`None`
+        :param properties: Vertex properties.
+        :type properties: :class:`dict`
+        :param ident: Vertex identity number.
+        :type ident: :class:`int`
+        :param add: True to add the values, False to remove them.
+        :type add: :class:`bool`
+        """
+        for value, values in self._constrained(label, properties):
+            if add:
+                values[value] = ident
+            elif values.get(value) == ident:
+                del values[value]
+
+    def load(self, file_handler):
+        data = json.load(file_handler)
+
+        for constraint_dict in data.get("constraints", []):
+            key = constraint_dict["key"]
+            self.add_vertex_constraint(
+                constraint_dict["label"],
+                tuple(key) if isinstance(key, list) else key,
+            )
+
+        vertex_id_mapping = {}
+        vertices = sorted(data.get("vertices", []), key=lambda x: x["id"])
+        for vertex_dict in vertices:
+            vertex_id_mapping[vertex_dict["id"]] = self.get_or_create_vertex(
+                vertex_dict["label"],
+                **vertex_dict["properties"]
+            )
+
+        edges = sorted(data.get("edges", []), key=lambda x: x["id"])
+        for edge_dict in edges:
+            self.get_or_create_edge(
+                vertex_id_mapping[edge_dict["head_id"]],
+                edge_dict["label"],
+                vertex_id_mapping[edge_dict["tail_id"]],
+                **edge_dict["properties"]
+            )
+
+    def dump(self, file_handler):
+        data = {
+            "vertices": [
+                self._vertex(each).as_dict()
+                for each in self._vertices.idents()
+            ],
+            "edges": [
+                self._edge(each).as_dict()
+                for each in self._edges.idents()
+            ],
+            "constraints": [
+                {"label": label, "key": key}
+                for label, key in self.get_vertex_constraints()
+            ],
+        }
+        json.dump(data, file_handler, indent=4, sort_keys=True)
+
+    def bind_to_graph(self, entity):
+        entity.ident = len(self._table_of(entity))
+        entity.graph = self
+
+    def add_vertex_constraint(self, label, key):
+        intern = self._interner.intern
+        label = intern(label)
+        if isinstance(key, (list, tuple)):
+            key = tuple(intern(each) for each in key)
+        else:
+            key = intern(key)
+
+        self._vconstraints[label][key] = {}
+        # vertices added before the constraint are constrained too.
+        code = self._codes.get(label)
+        if code is None:
+            return
+        for ident in self._vertices.idents(code):
+            properties = self._vertices.properties[ident] or _NO_PROPERTIES
+            self._check_constraints(label, properties, ident)
+            self._constrain(label, properties, ident)
+
+    def get_vertex_constraints(self):
+        return [
+            (label, key)
+            for label, keys in self._vconstraints.iteritems()
+            for key in keys
+        ]
+
+    def _stats(self, table, label, key, buckets):
+        """
+        Return the statistics of the values of a label and property key.
+
+        :param table: Table of the entities.
+        :type table: :class:`_Table`
+        :param label: Entity label.
+        :type label: :class:`str`
+        :param key: Property key, or keys.
+        :type key: :class:`str` or :class:`tuple` of :class:`str`
+        :param buckets: Number of histogram buckets wanted.
+        :type buckets: :class:`int`
+        :rtype: :class:`~.IndexStats`
+        """
+        keys = key if isinstance(key, tuple) else (key,)
+        count = 0
+        counts = Counter()
+        for ident in self._select(table, None, label, {}):
+            properties = table.properties[ident] or _NO_PROPERTIES
+            if not all(each in properties for each in keys):
+                continue
+            count += 1
+            value = tuple(properties[each] for each in keys)
+            value = value if isinstance(key, tuple) else value[0]
+            try:
+                counts[value] += 1
+            except TypeError:
+                continue
+        counts.pop(None, None)
+
+        if isinstance(key, tuple):
+            return IndexStats(count, len(counts), None)
+        return IndexStats(
+            count, len(counts),
+            equi_depth_histogram(counts.iteritems(), buckets),
+        )
+
+    def get_vertex_stats(self, label, key, buckets=10):
+        return self._stats(self._vertices, label, key, buckets)
+
+    def get_edge_stats(self, label, key, buckets=10):
+        return self._stats(self._edges, label, key, buckets)
+
+    def get_degree_distribution(self, label=None, direction="out"):
+        ends = {
+            "in": (self._tails,),
+            "out": (self._heads,),
+            "both": (self._tails, self._heads),
+        }.get(direction)
+        if ends is None:
+            raise KeyError("Unsupported direction {0!r}.".format(direction))
+
+        # a single pass over the edges counts the degree of every vertex.
+        degrees = Counter()
+        edges = list(self._select(self._edges, None, label, {}))
+        for each in ends:
+            degrees.update(each[ident] for ident in edges)
+
+        distribution = Counter(degrees.itervalues())
+        unconnected = self.count_vertices() - len(degrees)
+        if unconnected:
+            distribution[0] += unconnected
+        return dict(distribution)
+
+    def to_csr(self, direction="out"):
+        edges = list(self._edges.idents())
+        return CSRGraph.from_edges(
+            self,
+            self._vertices.idents(),
+            edges,
+            [self._heads[each] for each in edges],
+            [self._tails[each] for each in edges],
+            [self._edges.labels[each] for each in edges],
+            self._labels,
+            direction,
+        )
+
+    def get_or_create_vertex(self, label=None, **kwargs):
+        if not label and not kwargs:
+            return None
+
+        # first check constraints.
+        for value, values in self._constrained(label, kwargs):
+            found = values.get(value)
+            if found is not None:
+                return self._vertex(found)
+
+        found = list(
+            islice(self._select(self._vertices, None, label, kwargs), 2)
+        )
+        if len(found) > 1:
+            raise interfaces.MultipleFoundExpectedOne(
+                "Multiple vertices found when one expected."
+            )
+        elif len(found) == 1:
+            return self._vertex(found[0])
+
+        return self.add_vertex(label, **kwargs)
+
+    def get_or_create_edge(self, head, label, tail, **kwargs):
+        if isinstance(head, tuple):
+            head = self.get_or_create_vertex(head[0], **head[1])
+
+        if isinstance(tail, tuple):
+            tail = self.get_or_create_vertex(tail[0], **tail[1])
+
+        # There can only a single edge between head and tail with a
+        # particular label. So there is not point filtering for
+        # properties.
+        found = self._find_edge(self._ident(head), label, self._ident(tail))
+        if found is not None:
+            return self._edge(found)
+        return self.add_edge(head, label, tail, **kwargs)
+
+    def _find_edge(self, head, label, tail):
+        """
+        Return the edge with the label between the head and tail vertices,
+        looking through the smaller of their adjacencies.
+
+        :param head: Head vertex identity number.
+        :type head: :class:`int`
+        :param label: Edge label.
+        :type label: :class:`str` or :obj:`None`
+        :param tail: Tail vertex identity number.
+        :type tail: :class:`int`
+        :returns: Edge identity number, or :obj:`None` if there is no such
+            edge.
+        :rtype: :class:`int` or :obj:`None`
+        """
+        code = self._codes.get(label)
+        if code is None:
+            return None
+
+        out_edges = self._out[head] or ()
+        in_edges = self._in[tail] or ()
+        if len(out_edges) <= len(in_edges):
+            idents, ends, end = out_edges, self._tails, tail
+        else:
+            idents, ends, end = in_edges, self._heads, head
+
+        labels = self._edges.labels
+        for ident in idents:
+            if ends[ident] == end and labels[ident] == code:
+                return ident
+        return None
+
+    def _add_vertex(self, label, properties, vertex=None):
+        """
+        Add a vertex to the arrays.
+
+        :param label: Vertex label.
+        :type label: :class:`str` or :obj:`None`
+        :param properties: Vertex properties.
+        :type properties: :class:`dict`
+        :param vertex: Vertex being appended, which is bound to the graph.
+        :type vertex: :class:`~.IVertex` or :obj:`None`
+        :raises ConstraintViolation: If the vertex violates a constraint.
+        :returns: Vertex identity number.
+        :rtype: :class:`int`
+        """
+        label = self._interner.intern(label)
+        self._check_constraints(label, properties)
+        if vertex is not None:
+            self.bind_to_graph(vertex)
+
+        ident = len(self._vertices)
+        self._vertices.labels.append(self._code(label))
+        self._vertices.properties.append(self._store(label, properties))
+        self._in.append(None)
+        self._out.append(None)
+        self._constrain(label, properties, ident)
+        return ident
+
+    def _add_edge(self, head, label, tail, properties, edge=None):
+        """
+        Add a edge to the arrays.
+
+        :param head: Head vertex identity number.
+        :type head: :class:`int`
+        :param label: Edge label.
+        :type label: :class:`str` or :obj:`None`
+        :param tail: Tail vertex identity number.
+        :type tail: :class:`int`
+        :param properties: Edge properties.
+        :type properties: :class:`dict`
+        :param edge: Edge being appended, which is bound to the graph.
+        :type edge: :class:`~.IEdge` or :obj:`None`
+        :raises ConstraintViolation: If there already is a edge with the
+            label between the head and tail.
+        :returns: Edge identity number.
+        :rtype: :class:`int`
+        """
+        label = self._interner.intern(label)
+        if self._find_edge(head, label, tail) is not None:
+            raise interfaces.ConstraintViolation(
+                "Duplicate {0!r} edges between head {1!r} and tail {2!r} "
+                "is not allowed".format(
+                    label, self._vertex(head), self._vertex(tail)
+                )
+            )
+        if edge is not None:
+            self.bind_to_graph(edge)
+
+        ident = len(self._edges)
+        code = self._code(label)
+        self._edges.labels.append(code)
+        self._edges.properties.append(self._store(label, properties))
+        self._heads.append(head)
+        self._tails.append(tail)
+        for adjacency, counts, vertex in (
+                (self._out, self._out_counts, head),
+                (self._in, self._in_counts, tail)):
+            if adjacency[vertex] is None:
+                adjacency[vertex] = array("l")
+            adjacency[vertex].append(ident)
+            column = counts.get(code)
+            if column is None:
+                column = counts[code] = array("l")
+            if len(column) <= vertex:
+                column.extend([0] * (len(self._vertices) - len(column)))
+            column[vertex] += 1
+        return ident
+
+    def append_vertex(self, vertex):
+        if vertex.graph is not None and vertex.graph is not self:
+            raise interfaces.DatabaseException(
+                "Can not append vertex {} which is already bound to "
+                "anther graph instance.".format(vertex)
+            )
+
+        if vertex in self:
+            return self._vertex(vertex.ident)
+
+        if vertex.ident is not None:
+            raise interfaces.EntityIDError(
+                "Vertex {} already has it identity number set.".format(vertex)
+            )
+
+        return self._vertex(
+            self._add_vertex(vertex.label, vertex.properties, vertex)
+        )
+
+    def append_edge(self, edge):
+        if edge.graph is not None and edge.graph is not self:
+            raise interfaces.DatabaseException(
+                "Can not append edge {} which is already bound to "
+                "anther graph instance.".format(edge)
+            )
+
+        if edge in self:
+            return self._edge(edge.ident)
+
+        if edge.ident is not None:
+            raise interfaces.EntityIDError(
+                "Edge {} already has it identity number set.".format(edge)
+            )
+
+        head = self.append_vertex(edge.head).ident
+        tail = self.append_vertex(edge.tail).ident
+        return self._edge(
+            self._add_edge(head, edge.label, tail, edge.properties, edge)
+        )
+
+    def add_edge(self, head, label, tail, **kwargs):
+        head = self._ident(head)
+        tail = self._ident(tail)
+        return self._edge(self._add_edge(head, label, tail, kwargs))
+
+    def add_vertex(self, label=None, **kwargs):
+        return self._vertex(self._add_vertex(label, kwargs))
+
+    def set_property(self, entity, **kwargs):
+        table = self._table_of(entity)
+        ident = self._ident(entity)
+
+        label = self._labels[table.labels[ident]]
+        current = table.properties[ident]
+        properties = dict(current.iteritems()) if current else {}
+        properties.update(kwargs)
+        if table is self._vertices:
+            self._check_constraints(label, properties, ident)
+            self._constrain(label, current or _NO_PROPERTIES, ident, False)
+            self._constrain(label, properties, ident)
+        table.properties[ident] = self._store(label, properties)
+
+        # appended entities are kept in step with their copies.
+        if not isinstance(entity, ArrayEntity):
+            entity._update_properties(kwargs)  # pylint: disable=protected-access
+
+    def remove_property(self, entity, key):
+        self._remove_property(self._table_of(entity), self._ident(entity), key)
+
+        # appended entities are kept in step with their copies.
+        if not isinstance(entity, ArrayEntity):
+            entity._remove_property(key)  # pylint: disable=protected-access
+
+    def _remove_property(self, table, ident, key):
+        """
+        Remove a property from a entity, if it has it.
+
+        :param table: Table of the entity.
+        :type table: :class:`_Table`
+        :param ident: Entity identity number.
+        :type ident: :class:`int`
+        :param key: Property key being removed.
+        :type key: :class:`str`
+        """
+        current = table.properties[ident]
+        if current is None or key not in current:
+            return
+        if table is self._vertices and is_live(table.labels[ident]):
+            label = self._labels[table.labels[ident]]
+            self._constrain(label, current, ident, False)
+            del current[key]
+            self._constrain(label, current, ident)
+        else:
+            del current[key]
+
+    def get_edge(self, id_num):
+        if not 0 <= id_num < len(self._edges):
+            raise KeyError(id_num)
+        if not is_live(self._edges.labels[id_num]):
+            raise KeyError(id_num)
+        return self._edge(id_num)
+
+    def get_vertex(self, id_num):
+        if not 0 <= id_num < len(self._vertices):
+            raise KeyError(id_num)
+        if not is_live(self._vertices.labels[id_num]):
+            raise KeyError(id_num)
+        return self._vertex(id_num)
+
+    def get_edges(self, head=None, label=None, tail=None, **kwargs):
+        if head is not None:
+            head = self._ident(head)
+            idents = self._out[head] or ()
+            if tail is not None:
+                tail = self._ident(tail)
+                idents = [
+                    each for each in idents if self._tails[each] == tail
+                ]
+        elif tail is not None:
+            idents = self._in[self._ident(tail)] or ()
+        else:
+            idents = None
+        return EntitySet(
+            self._edge(each)
+            for each in self._select(self._edges, idents, label, kwargs)
+        )
+
+    def get_vertices(self, label=None, **kwargs):
+        return EntitySet(self.iter_vertices(label, **kwargs))
+
+    def iter_vertices(self, label=None, **kwargs):
+        return (
+            self._vertex(each)
+            for each in self._select(self._vertices, None, label, kwargs)
+        )
+
+    def first_vertex(self, label=None, **kwargs):
+        return next(self.iter_vertices(label, **kwargs), None)
+
+    def vertex_exists(self, label=None, **kwargs):
+        return self.first_vertex(label, **kwargs) is not None
+
+    def count_vertices(self, label=None, **kwargs):
+        return sum(
+            1 for _ in self._select(self._vertices, None, label, kwargs)
+        )
+
+    def iter_edges(self, label=None, **kwargs):
+        return (
+            self._edge(each)
+            for each in self._select(self._edges, None, label, kwargs)
+        )
+
+    def first_edge(self, label=None, **kwargs):
+        return next(self.iter_edges(label, **kwargs), None)
+
+    def edge_exists(self, label=None, **kwargs):
+        return self.first_edge(label, **kwargs) is not None
+
+    def count_edges(self, label=None, **kwargs):
+        return sum(1 for _ in self._select(self._edges, None, label, kwargs))
+
+    def remove_edge(self, edge):
+        ident = self._ident(edge)
+        code = self._edges.labels[ident]
+        for adjacency, counts, vertex in (
+                (self._out, self._out_counts, self._heads[ident]),
+                (self._in, self._in_counts, self._tails[ident])):
+            adjacency[vertex].remove(ident)
+            counts[code][vertex] -= 1
+        self._edges.labels[ident] = ~code
+        self._edges.properties[ident] = None
+
+    def remove_vertex(self, vertex):
+        ident = self._ident(vertex)
+        if self._in[ident] or self._out[ident]:
+            raise interfaces.VertexBoundByEdges(
+                "Vertex {0!r} is still bound to another vertex "
+                "by an edge. First remove all the edges on the vertex and "
+                "then remove it again.".format(vertex)
+            )
+
+        code = self._vertices.labels[ident]
+        properties = self._vertices.properties[ident] or _NO_PROPERTIES
+        self._constrain(self._labels[code], properties, ident, False)
+        self._vertices.labels[ident] = ~code
+        self._vertices.properties[ident] = None
+        self._in[ident] = self._out[ident] = None
+
+    def close(self):  # pragma: no cover
+        # Nothing to do for the close at this stage.
+        return
+
+    def __contains__(self, entity):
+        table = self._table_of(entity)
+        ident = entity.ident
+        return (
+            entity.graph is self and
+            isinstance(ident, (int, long)) and
+            0 <= ident < len(table) and
+            is_live(table.labels[ident])
+        )
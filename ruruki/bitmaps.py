@@ -0,0 +1,287 @@
+"""
+Compact entity sets used by :class:`~.EntitySet` for the label, property
+and value references.
+
+The entities of a graph are given dense integer identity numbers, so a set
+of entities can be kept as a bitmap of their identity numbers. The bitmap
+is split into fixed size blocks of :data:`BLOCK_BITS` bits, keyed by
+``ident >> BLOCK_SHIFT`` and each stored as a small Python :class:`long`,
+so a bitmap only takes space for the blocks holding entities and adding
+or removing a entity only touches its own block. Unions, intersections
+and differences of two bitmaps are then done a block at a time instead of
+entity by entity.
+"""
+from collections import MutableSet
+from itertools import imap
+
+
+#: Number of bits used to select the bit within a block.
+BLOCK_SHIFT = 8
+
+#: Number of identity numbers held by a single block.
+BLOCK_BITS = 1 << BLOCK_SHIFT
+
+_BLOCK_MASK = BLOCK_BITS - 1
+
+
+def _popcount(word):
+    """
+    Return the number of bits set in a block.
+
+    :param word: Block of the bitmap.
+    :type word: :class:`long`
+    :rtype: :class:`int`
+    """
+    return bin(word).count("1")
+
+
+class IdentBitmap(MutableSet):
+    """
+    Set of entities stored as a bitmap of their :attr:`~.IEntity.ident`.
+
+    The bitmap only holds the identity numbers, the entities are looked up
+    in the mapping shared by all the bitmaps of a :class:`~.EntitySet`, so
+    every entity in the bitmap must be present in that mapping.
+
+    .. note::
+
+        Operations between two bitmaps sharing the same mapping return a
+        new :class:`IdentBitmap`, while operations with other iterables
+        fall back to checking the entities one at a time.
+
+    :param lookup: Mapping of the identity numbers to the entities.
+    :type lookup: :class:`dict` of :class:`int` to :class:`~.IEntity`
+    :param entities: Entities being added to the bitmap.
+    :type entities: Iterable of :class:`~.IEntity`
+    """
+    __slots__ = ("_lookup", "_blocks", "_count")
+
+    def __init__(self, lookup, entities=()):
+        self._lookup = lookup
+        self._blocks = {}
+        self._count = 0
+        for entity in entities:
+            self.add(entity)
+
+    def _from_blocks(self, blocks):
+        """
+        Create a new bitmap sharing the same mapping.
+
+        :param blocks: Non empty blocks of the bitmap, keyed by their
+            position.
+        :type blocks: :class:`dict` of :class:`int` to :class:`long`
+        :returns: New bitmap.
+        :rtype: :class:`IdentBitmap`
+        """
+        bitmap = IdentBitmap(self._lookup)
+        bitmap._blocks = blocks  # pylint: disable=protected-access
+        bitmap._count = None  # pylint: disable=protected-access
+        return bitmap
+
+    def rebind(self, lookup):
+        """
+        Return a copy of the bitmap which looks the entities up in another
+        mapping.
+
+        .. note::
+
+            The other mapping must hold the same entities for all the
+            identity numbers in the bitmap.
+
+        :param lookup: Mapping of the identity numbers to the entities.
+        :type lookup: :class:`dict` of :class:`int` to :class:`~.IEntity`
+        :returns: New bitmap.
+        :rtype: :class:`IdentBitmap`
+        """
+        bitmap = IdentBitmap(lookup)
+        bitmap._blocks = dict(self._blocks)  # pylint: disable=protected-access
+        bitmap._count = self._count  # pylint: disable=protected-access
+        return bitmap
+
+    def _from_iterable(self, iterable):
+        return IdentBitmap(self._lookup, iterable)
+
+    def _same_lookup(self, other):
+        """
+        Return :obj:`True` if the other set is a bitmap sharing the same
+        mapping, so the bitmaps can be combined directly.
+        """
+        return (
+            isinstance(other, IdentBitmap) and
+            other._lookup is self._lookup  # pylint: disable=protected-access
+        )
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(imap(_popcount, self._blocks.itervalues()))
+        return self._count
+
+    def __contains__(self, entity):
+        ident = getattr(entity, "ident", None)
+        if not isinstance(ident, (int, long)) or ident < 0:
+            return False
+        word = self._blocks.get(ident >> BLOCK_SHIFT, 0)
+        if not word >> (ident & _BLOCK_MASK) & 1:
+            return False
+        return self._lookup.get(ident) is entity
+
+    def __iter__(self):
+        return imap(self._lookup.__getitem__, self.idents())
+
+    def idents(self):
+        """
+        Iterate over the identity numbers in the bitmap, in ascending order.
+
+        :returns: Identity numbers of the entities.
+        :rtype: Iterable of :class:`int`
+        """
+        blocks = self._blocks
+        for key in sorted(blocks):
+            base = key << BLOCK_SHIFT
+            word = blocks[key]
+            while word:
+                low = word & -word
+                yield base + low.bit_length() - 1
+                word ^= low
+
+    def add(self, entity):
+        ident = entity.ident
+        key = ident >> BLOCK_SHIFT
+        bit = 1 << (ident & _BLOCK_MASK)
+        word = self._blocks.get(key, 0)
+        if not word & bit:
+            self._blocks[key] = word | bit
+            if self._count is not None:
+                self._count += 1
+
+    def discard(self, entity):
+        if entity in self:
+            key = entity.ident >> BLOCK_SHIFT
+            word = self._blocks[key] ^ 1 << (entity.ident & _BLOCK_MASK)
+            if word:
+                self._blocks[key] = word
+            else:
+                del self._blocks[key]
+            if self._count is not None:
+                self._count -= 1
+
+    def clear(self):
+        self._blocks = {}
+        self._count = 0
+
+    def _intersection(self, other):
+        """
+        Return the non empty blocks of both bitmaps ``and`` together.
+        """
+        small, large = self._blocks, other._blocks  # pylint: disable=protected-access
+        if len(large) < len(small):
+            small, large = large, small
+        blocks = {}
+        for key, word in small.iteritems():
+            word &= large.get(key, 0)
+            if word:
+                blocks[key] = word
+        return blocks
+
+    def _union(self, other):
+        """
+        Return the blocks of both bitmaps ``or`` together.
+        """
+        small, large = self._blocks, other._blocks  # pylint: disable=protected-access
+        if len(large) < len(small):
+            small, large = large, small
+        blocks = dict(large)
+        for key, word in small.iteritems():
+            blocks[key] = blocks.get(key, 0) | word
+        return blocks
+
+    def _difference(self, other):
+        """
+        Return the non empty blocks of this bitmap without the bits of the
+        other bitmap.
+        """
+        others = other._blocks  # pylint: disable=protected-access
+        blocks = {}
+        for key, word in self._blocks.iteritems():
+            word &= ~others.get(key, 0)
+            if word:
+                blocks[key] = word
+        return blocks
+
+    def _symmetric_difference(self, other):
+        """
+        Return the non empty blocks of both bitmaps ``xor`` together.
+        """
+        blocks = dict(self._blocks)
+        for key, word in other._blocks.iteritems():  # pylint: disable=protected-access
+            word ^= blocks.get(key, 0)
+            if word:
+                blocks[key] = word
+            else:
+                blocks.pop(key, None)
+        return blocks
+
+    def __and__(self, other):
+        if self._same_lookup(other):
+            return self._from_blocks(self._intersection(other))
+        return super(IdentBitmap, self).__and__(other)
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        if self._same_lookup(other):
+            return self._from_blocks(self._union(other))
+        return super(IdentBitmap, self).__or__(other)
+
+    __ror__ = __or__
+
+    def __sub__(self, other):
+        if self._same_lookup(other):
+            return self._from_blocks(self._difference(other))
+        return super(IdentBitmap, self).__sub__(other)
+
+    def __rsub__(self, other):
+        return set(entity for entity in other if entity not in self)
+
+    def __xor__(self, other):
+        if self._same_lookup(other):
+            return self._from_blocks(self._symmetric_difference(other))
+        return super(IdentBitmap, self).__xor__(other)
+
+    __rxor__ = __xor__
+
+    def __iand__(self, other):
+        if self._same_lookup(other):
+            self._blocks = self._intersection(other)
+            self._count = None
+            return self
+        return super(IdentBitmap, self).__iand__(other)
+
+    def __ior__(self, other):
+        if self._same_lookup(other):
+            self._blocks = self._union(other)
+            self._count = None
+            return self
+        return super(IdentBitmap, self).__ior__(other)
+
+    def __isub__(self, other):
+        if self._same_lookup(other):
+            self._blocks = self._difference(other)
+            self._count = None
+            return self
+        return super(IdentBitmap, self).__isub__(other)
+
+    def __eq__(self, other):
+        if self._same_lookup(other):
+            return self._blocks == other._blocks
+        return super(IdentBitmap, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):  # pragma: no cover
+        return "<{0} {1}>".format(
+            self.__class__.__name__, list(self.idents())
+        )
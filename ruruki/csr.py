@@ -0,0 +1,307 @@
+"""
+Frozen compressed sparse row (CSR) snapshots of the edges of a graph, used
+by :meth:`~.IGraph.to_csr` for read only analytics.
+
+The vertices are numbered by their position in ascending
+:attr:`~.IEntity.ident` order, and the edges of the vertex at position
+``i`` are the slots ``offsets[i]`` to ``offsets[i + 1]`` of the
+``neighbours``, ``edges`` and ``labels`` arrays. Algorithms can then work
+on contiguous NumPy arrays, and only go back to the :class:`~.IVertex` and
+:class:`~.IEdge` objects for the results.
+
+.. note::
+
+    NumPy has to be installed, which the ``numpy`` extra does.
+"""
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # pylint: disable=invalid-name
+
+
+DIRECTIONS = frozenset(["in", "out"])
+
+
+class CSRGraph(object):
+    """
+    Immutable snapshot of the ``in`` or ``out`` edges of every vertex of a
+    graph, in compressed sparse row form.
+
+    .. note::
+
+        Use :meth:`~.IGraph.to_csr` to take a snapshot. The snapshot does
+        not follow later changes to the graph, and its arrays are read
+        only.
+
+    :param graph: Graph the snapshot was taken of.
+    :type graph: :class:`~.IGraph`
+    :param vertex_idents: Identity number of the vertex at each position,
+        in ascending order.
+    :type vertex_idents: :class:`numpy.ndarray`
+    :param offsets: Start of the edges of each vertex position, followed by
+        the number of edges.
+    :type offsets: :class:`numpy.ndarray`
+    :param neighbours: Position of the vertex at the far end of each edge.
+    :type neighbours: :class:`numpy.ndarray`
+    :param edges: Identity number of each edge.
+    :type edges: :class:`numpy.ndarray`
+    :param labels: Label code of each edge.
+    :type labels: :class:`numpy.ndarray`
+    :param label_names: Edge label of each label code.
+    :type label_names: :class:`tuple`
+    :param direction: ``out`` if the far ends are the tails of the edges,
+        ``in`` if they are the heads.
+    :type direction: :class:`str`
+    """
+    __slots__ = (
+        "graph", "vertex_idents", "offsets", "neighbours", "edges",
+        "labels", "label_names", "direction", "_codes",
+    )
+
+    def __init__(self, graph, vertex_idents, offsets, neighbours, edges,
+                 labels, label_names, direction):
+        # pylint: disable=too-many-arguments
+        self.graph = graph
+        self.vertex_idents = vertex_idents
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.edges = edges
+        self.labels = labels
+        self.label_names = tuple(label_names)
+        self.direction = direction
+        self._codes = dict(
+            (label, code) for code, label in enumerate(self.label_names)
+        )
+        for each in (vertex_idents, offsets, neighbours, edges, labels):
+            each.flags.writeable = False
+
+    @classmethod
+    def from_edges(cls, graph, vertex_idents, edges, heads, tails, labels,
+                   label_names, direction="out"):
+        """
+        Build a snapshot from the edges of a graph, given in any order.
+
+        :param graph: Graph the snapshot is taken of.
+        :type graph: :class:`~.IGraph`
+        :param vertex_idents: Identity numbers of all the vertices.
+        :type vertex_idents: Iterable of :class:`int`
+        :param edges: Identity number of each edge.
+        :type edges: Sequence of :class:`int`
+        :param heads: Identity number of the head vertex of each edge.
+        :type heads: Sequence of :class:`int`
+        :param tails: Identity number of the tail vertex of each edge.
+        :type tails: Sequence of :class:`int`
+        :param labels: Label code of each edge.
+        :type labels: Sequence of :class:`int`
+        :param label_names: Edge label of each label code.
+        :type label_names: Sequence
+        :param direction: ``out`` to snapshot the ``out`` edges of each
+            vertex, ``in`` for the ``in`` edges.
+        :type direction: :class:`str`
+        :raises ImportError: If NumPy is not installed.
+        :raises KeyError: If the direction is not supported.
+        :returns: Snapshot of the edges.
+        :rtype: :class:`CSRGraph`
+        """
+        # pylint: disable=too-many-arguments
+        if numpy is None:
+            raise ImportError(
+                "CSR snapshots need NumPy, install the numpy extra."
+            )
+        if direction not in DIRECTIONS:
+            raise KeyError("Unsupported direction {0!r}.".format(direction))
+
+        vertex_idents = numpy.unique(
+            numpy.fromiter(vertex_idents, dtype=numpy.int64)
+        )
+        edges = numpy.asarray(edges, dtype=numpy.int64)
+        labels = numpy.asarray(labels, dtype=numpy.int32)
+        heads = numpy.searchsorted(
+            vertex_idents, numpy.asarray(heads, dtype=numpy.int64)
+        )
+        tails = numpy.searchsorted(
+            vertex_idents, numpy.asarray(tails, dtype=numpy.int64)
+        )
+        near, far = (heads, tails) if direction == "out" else (tails, heads)
+
+        # rows in vertex order, and the edges of a row by neighbour.
+        order = numpy.lexsort((edges, far, near))
+        offsets = numpy.zeros(len(vertex_idents) + 1, dtype=numpy.int64)
+        numpy.cumsum(
+            numpy.bincount(near, minlength=len(vertex_idents)),
+            out=offsets[1:],
+        )
+        return cls(
+            graph, vertex_idents, offsets, far[order], edges[order],
+            labels[order], label_names, direction,
+        )
+
+    def __len__(self):
+        return len(self.vertex_idents)
+
+    @property
+    def edge_count(self):
+        """
+        Number of edges in the snapshot.
+
+        :rtype: :class:`int`
+        """
+        return len(self.edges)
+
+    def label_code(self, label):
+        """
+        Return the code of a edge label.
+
+        :param label: Edge label.
+        :type label: :class:`str` or :obj:`None`
+        :returns: Label code, or ``-1`` if no edge has the label.
+        :rtype: :class:`int`
+        """
+        return self._codes.get(label, -1)
+
+    def position(self, ident):
+        """
+        Return the position of a vertex.
+
+        :param ident: Vertex, or its identity number.
+        :type ident: :class:`~.IVertex` or :class:`int`
+        :raises KeyError: If the vertex is not in the snapshot.
+        :rtype: :class:`int`
+        """
+        ident = getattr(ident, "ident", ident)
+        position = int(numpy.searchsorted(self.vertex_idents, ident))
+        if (position == len(self.vertex_idents) or
+                self.vertex_idents[position] != ident):
+            raise KeyError("No such id {0!r} exists.".format(ident))
+        return position
+
+    def vertex(self, position):
+        """
+        Return the vertex at a position.
+
+        :param position: Vertex position.
+        :type position: :class:`int`
+        :rtype: :class:`~.IVertex`
+        """
+        return self.graph.get_vertex(int(self.vertex_idents[position]))
+
+    def edge(self, slot):
+        """
+        Return the edge in a slot.
+
+        :param slot: Edge slot, between the offsets of its vertex.
+        :type slot: :class:`int`
+        :rtype: :class:`~.IEdge`
+        """
+        return self.graph.get_edge(int(self.edges[slot]))
+
+    def _slots(self, position, label):
+        """
+        Return the slots of the edges of a vertex with the label.
+
+        :param position: Vertex position.
+        :type position: :class:`int`
+        :param label: Edge label, or :obj:`None` for all the edges.
+        :type label: :class:`str` or :obj:`None`
+        :rtype: :class:`slice` or :class:`numpy.ndarray`
+        """
+        start, end = self.offsets[position], self.offsets[position + 1]
+        if label is None:
+            return slice(start, end)
+        labels = self.labels[start:end]
+        return start + numpy.flatnonzero(labels == self.label_code(label))
+
+    def neighbours_of(self, position, label=None):
+        """
+        Return the positions of the vertices at the far end of the edges of
+        a vertex, in ascending order.
+
+        :param position: Vertex position.
+        :type position: :class:`int`
+        :param label: Only the edges with this label. If :obj:`None`, all
+            the edges.
+        :type label: :class:`str` or :obj:`None`
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self.neighbours[self._slots(position, label)]
+
+    def edges_of(self, position, label=None):
+        """
+        Return the identity numbers of the edges of a vertex.
+
+        :param position: Vertex position.
+        :type position: :class:`int`
+        :param label: Only the edges with this label. If :obj:`None`, all
+            the edges.
+        :type label: :class:`str` or :obj:`None`
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self.edges[self._slots(position, label)]
+
+    def degrees(self, label=None):
+        """
+        Return the degree of every vertex.
+
+        :param label: Only count the edges with this label. If
+            :obj:`None`, all the edges are counted.
+        :type label: :class:`str` or :obj:`None`
+        :returns: Degree of the vertex at each position.
+        :rtype: :class:`numpy.ndarray`
+        """
+        degrees = numpy.diff(self.offsets)
+        if label is None:
+            return degrees
+        rows = numpy.repeat(numpy.arange(len(self)), degrees)
+        return numpy.bincount(
+            rows[self.labels == self.label_code(label)],
+            minlength=len(self),
+        )
+
+    def distances(self, source, label=None):
+        """
+        Return the number of edges on the shortest path from a vertex to
+        every vertex, following the direction of the snapshot.
+
+        .. note::
+
+            Each step of the breadth first search expands the whole
+            frontier at once with array operations.
+
+        :param source: Position of the vertex the paths start from.
+        :type source: :class:`int`
+        :param label: Only follow the edges with this label. If
+            :obj:`None`, all the edges are followed.
+        :type label: :class:`str` or :obj:`None`
+        :returns: Distance to the vertex at each position, or ``-1`` if it
+            can not be reached.
+        :rtype: :class:`numpy.ndarray`
+        """
+        distances = numpy.full(len(self), -1, dtype=numpy.int64)
+        distances[source] = 0
+        follow = None
+        if label is not None:
+            follow = self.labels == self.label_code(label)
+
+        frontier = numpy.array([source], dtype=numpy.int64)
+        step = 0
+        while len(frontier):
+            step += 1
+            starts = self.offsets[frontier]
+            counts = self.offsets[frontier + 1] - starts
+            # the slots of all the frontier vertices, one run per vertex.
+            slots = (
+                numpy.repeat(starts - numpy.cumsum(counts) + counts, counts) +
+                numpy.arange(counts.sum())
+            )
+            if follow is not None:
+                slots = slots[follow[slots]]
+            reached = numpy.unique(self.neighbours[slots])
+            frontier = reached[distances[reached] == -1]
+            distances[frontier] = step
+        return distances
+
+    def __repr__(self):  # pragma: no cover
+        return "<{0}> vertices: {1}, edges: {2}, direction: {3}".format(
+            self.__class__.__name__, len(self), self.edge_count,
+            self.direction
+        )
@@ -1,7 +1,20 @@
 """
 Entities
 """
+import weakref
+from collections import Iterable
+from functools import partial
+from itertools import chain, dropwhile, islice
+from operator import attrgetter
 from ruruki import interfaces
+from ruruki.bitmaps import IdentBitmap
+from ruruki.filters import OPERATORS  # pylint: disable=unused-import
+from ruruki.filters import PlanStep, compile_checks, compile_predicates
+from ruruki.filters import match, scan_plan
+from ruruki.filters import merge_plans, regex_literals, split_predicates
+from ruruki.indexes import INDEXES, IndexStats, equi_depth_histogram
+from ruruki.indexes import aggregate_values
+from ruruki.ordering import is_after, position_of, top
 
 
 class Entity(interfaces.IEntity):
@@ -41,8 +54,17 @@ class Entity(interfaces.IEntity):
         return self.graph is not None
 
     def remove_property(self, key):
-        if key in self.properties:
-            del self.properties[key]
+        if key not in self.properties:
+            return
+
+        # the graph removes the property once it has un-indexed it.
+        if self.is_bound():
+            self.graph.remove_property(self, key)
+        else:
+            self._remove_property(key)
+
+    def _remove_property(self, key):
+        self.properties.pop(key, None)
 
     def _update_properties(self, kwargs):
         self.properties.update(kwargs)
@@ -53,13 +75,15 @@ class Entity(interfaces.IEntity):
                 "Can not update with no key and values."
             )
 
+        # the graph updates the properties once it has indexed them.
         if self.is_bound():
             self.graph.set_property(self, **kwargs)
-        self._update_properties(kwargs)
+        else:
+            self._update_properties(kwargs)
 
     def as_dict(self, include_privates=False):
         if include_privates is True:
-            properties = self.properties
+            properties = dict(self.properties)
         else:
             properties = {
                 key: value
@@ -123,14 +147,14 @@ class Vertex(interfaces.IVertex, Entity):
 
     def __init__(self, label=None, **kwargs):
         super(Vertex, self).__init__(label=label, **kwargs)
-        self.in_edges = EntitySet()
-        self.out_edges = EntitySet()
+        self.in_edges = AdjacencySet()
+        self.out_edges = AdjacencySet()
 
-    def in_edge_count(self):
-        return len(self.in_edges)
+    def in_edge_count(self, label=None):
+        return self.in_edges.count(label)
 
-    def out_edge_count(self):
-        return len(self.out_edges)
+    def out_edge_count(self, label=None):
+        return self.out_edges.count(label)
 
     def add_in_edge(self, vertex, label=None, **kwargs):
         # if the vertex is bound to a graph, then let the graph
@@ -174,22 +198,21 @@ class Vertex(interfaces.IVertex, Entity):
         edges = self.in_edges | self.out_edges
         return edges.filter(label, **kwargs)  # pylint: disable=no-member
 
-    def get_in_vertices(self, label=None, **kwargs):
-        vertices = [
-            each.get_in_vertex() for each in self.get_in_edges()
-        ]
-        return EntitySet(vertices).filter(label, **kwargs)
+    def get_in_vertices(self, label=None, edge_label=None, **kwargs):
+        return _adjacent_vertices(
+            [(self.in_edges, _HEAD)], label, edge_label, kwargs
+        )
 
-    def get_out_vertices(self, label=None, **kwargs):
-        vertices = [
-            each.get_out_vertex() for each in self.get_out_edges()
-        ]
-        return EntitySet(vertices).filter(label, **kwargs)
+    def get_out_vertices(self, label=None, edge_label=None, **kwargs):
+        return _adjacent_vertices(
+            [(self.out_edges, _TAIL)], label, edge_label, kwargs
+        )
 
-    def get_both_vertices(self, label=None, **kwargs):
-        in_set = self.get_in_vertices(label=label, **kwargs)
-        out_set = self.get_out_vertices(label=label, **kwargs)
-        return in_set | out_set
+    def get_both_vertices(self, label=None, edge_label=None, **kwargs):
+        return _adjacent_vertices(
+            [(self.in_edges, _HEAD), (self.out_edges, _TAIL)],
+            label, edge_label, kwargs
+        )
 
     def as_dict(self, include_privates=False):
         as_dict = super(Vertex, self).as_dict(include_privates)
@@ -292,154 +315,223 @@ class PersistentEdge(Edge):
         self.path = None
 
 
-def _split_key_into_noun_verb(key):
+_HEAD = attrgetter("head")
+_TAIL = attrgetter("tail")
+
+
+def _adjacent_vertices(adjacency, label, edge_label, kwargs):
     """
-    Internal helper function that takes the key and splits it into the
-    noun and verb, and returns the noun and verb.
+    Internal helper function that returns the vertices at the far end of
+    the edges of a vertex.
 
     .. note::
 
-        Example of a key with the special operator.
+        The edges of each label are kept apart by the edge sets, so only
+        the edges with the edge label are looked at.
+
+    :param adjacency: Edges of the vertex, each with the function returning
+        the vertex at their far end.
+    :type adjacency: :class:`list` of :class:`tuple`
+        (:class:`~.EntitySet`, :func:`callable`)
+    :param label: Vertex label. If :obj:`None`, vertices with any label
+        are returned.
+    :type label: :class:`str` or :obj:`None`
+    :param edge_label: Only follow the edges with this label. If
+        :obj:`None`, all the edges are followed.
+    :type edge_label: :class:`str` or :obj:`None`
+    :param kwargs: Vertex property key and value pairs.
+    :type kwargs: :class:`dict`
+    :returns: New set with the matching vertices.
+    :rtype: :class:`~.EntitySet`
+    """
+    vertices = set()
+    for edges, far_end in adjacency:
+        for edge in edges.ifilter(edge_label):
+            vertex = far_end(edge)
+            if label is None or vertex.label == label:
+                vertices.add(vertex)
+
+    if kwargs:
+        checks = compile_predicates(kwargs.iteritems(), label)
+        vertices = [vertex for vertex in vertices if match(vertex, checks)]
+    return EntitySet(vertices)
 
-        key: name__contains
-        return: name, contains
 
-    :param key: Key that you are splitting into the noun and verb. The key
-        should end with __<operator>
-    :type key: :class:`str`
-    :returns: Key name and the operator.
-    :rtype: :class:`tuple` (:class:`str`, :class:`str` or :obj:`None`)
+def _add_value(value_index, value, entity, factory=set):
     """
-    split = key.rsplit("__", 1)
-    if len(split) == 2:
-        return split[0], split[1]
-    return key, None
+    Internal helper function that adds the entity to the value bucket in the
+    value index.
 
+    .. note::
 
-def _contains(prop_value, cmp_value, ignore_case=False):
+        Unhashable values, like lists, and :obj:`None` values are not
+        indexed.
+
+    :param value_index: Value index mapping a property value to the set of
+        entities that have that value.
+    :type value_index: :class:`dict`
+    :param value: Property value.
+    :type value: Hashable value.
+    :param entity: Entity being indexed.
+    :type entity: :class:`~.IEntity`
+    :param factory: Callable creating a new empty value bucket.
+    :type factory: :func:`callable`
+    """
+    if value is None:
+        return
+    try:
+        bucket = value_index.get(value)
+        if bucket is None:
+            bucket = value_index[value] = factory()
+        bucket.add(entity)
+    except TypeError:
+        pass
+
+
+def _discard_value(value_index, value, entity):
     """
-    Helper function that take two arguments and checks if :param cmp_value:
-    is in :param prop_value:.
-
-    :param prop_value: Property value that you are checking.
-    :type prop_value: :class:`str`
-    :param cmp_value: Value that you are checking if it is in the property
-        value.
-    :type cmp_value: :class:`str`
-    :param ignore_case: True to run using incase sensitive.
-    :type ignore_case: :class:`bool`
-    :returns: True if :param cmp_value: is in :param prop_value:
-    :rtype: class:`bool`
+    Internal helper function that removes the entity from the value bucket in
+    the value index, removing the bucket when it becomes empty.
+
+    :param value_index: Value index mapping a property value to the set of
+        entities that have that value.
+    :type value_index: :class:`dict`
+    :param value: Property value.
+    :type value: Hashable value.
+    :param entity: Entity being removed from the index.
+    :type entity: :class:`~.IEntity`
     """
-    if ignore_case is True:
-        prop_value = prop_value.lower()
-        cmp_value = cmp_value.lower()
-    return cmp_value in prop_value
+    try:
+        bucket = value_index.get(value)
+    except TypeError:
+        return
 
+    if bucket is not None:
+        bucket.discard(entity)
+        if not bucket:
+            del value_index[value]
 
-def _startswith(prop_value, cmp_value, ignore_case=False):
+
+def _composite_values(entity, keys, kwargs=None):
     """
-    Helper function that take two arguments and checks if :param prop_value:
-    startswith :param cmp_value:
-
-    :param prop_value: Property value that you are checking.
-    :type prop_value: :class:`str`
-    :param cmp_value: Value that you are checking if it is in the property
-        value startswith.
-    :type cmp_value: :class:`str`
-    :param ignore_case: True to run using incase sensitive.
-    :type ignore_case: :class:`bool`
-    :returns: True if :param prop_value: startswith :param cmp_value:
-    :rtype: class:`bool`
+    Internal helper function that returns the values of the entity for the
+    keys of a composite index.
+
+    :param entity: Entity being indexed.
+    :type entity: :class:`~.IEntity`
+    :param keys: Property keys of the composite index.
+    :type keys: :class:`tuple` of :class:`str`
+    :param kwargs: New property values taking precedence over the entity
+        properties.
+    :type kwargs: :class:`dict` or :obj:`None`
+    :returns: Values of the keys, with :obj:`None` for missing keys.
+    :rtype: :class:`tuple`
     """
-    if ignore_case is True:
-        prop_value = prop_value.lower()
-        cmp_value = cmp_value.lower()
-    return prop_value.startswith(cmp_value)
+    properties = entity.properties
+    if kwargs:
+        return tuple(
+            kwargs[key] if key in kwargs else properties.get(key)
+            for key in keys
+        )
+    return tuple(properties.get(key) for key in keys)
 
 
-def _endswith(prop_value, cmp_value, ignore_case=False):
+def _entities(other):
     """
-    Helper function that take two arguments and checks if :param prop_value:
-    endswith :param cmp_value:
-
-    :param prop_value: Property value that you are checking.
-    :type prop_value: :class:`str`
-    :param cmp_value: Value that you are checking if it is in the property
-        value endswith.
-    :type cmp_value: :class:`str`
-    :param ignore_case: True to run using incase sensitive.
-    :type ignore_case: :class:`bool`
-    :returns: True if :param prop_value: endswith :param cmp_value:
-    :rtype: class:`bool`
+    Internal helper function that returns the entities of another entity
+    set without iterating over them, or the iterable itself.
+
+    :param other: Entity set or iterable of entities.
+    :type other: :class:`~.IEntitySet` or Iterable of :class:`~.IEntity`
+    :returns: Entities.
+    :rtype: Iterable of :class:`~.IEntity`
     """
-    if ignore_case is True:
-        prop_value = prop_value.lower()
-        cmp_value = cmp_value.lower()
-    return prop_value.endswith(cmp_value)
+    if isinstance(other, interfaces.IEntitySet):
+        return other.entities
+    return other
 
 
-def _eq(prop_value, cmp_value, ignore_case=False):
+def _probe(index, verb, value):
     """
-    Helper function that take two arguments and checks if :param prop_value:
-    equals :param cmp_value:
-
-    :param prop_value: Property value that you are checking.
-    :type prop_value: :class:`str`
-    :param cmp_value: Value that you are checking if they are equal.
-    :type cmp_value: :class:`str`
-    :param ignore_case: True to run using incase sensitive.
-    :type ignore_case: :class:`bool`
-    :returns: True if :param prop_value: and :param cmp_value: are
-        equal.
-    :rtype: class:`bool`
+    Internal helper function that returns how a filter condition is looked
+    up in a index.
+
+    .. note::
+
+        A regular expression is looked up using the literal strings every
+        match contains, and still has to be checked afterwards.
+
+    :param index: Index of the property key.
+    :type index: Index from :data:`~.INDEXES`
+    :param verb: Filter operator.
+    :type verb: :class:`str`
+    :param value: Value the property is compared with.
+    :type value: Value
+    :returns: Estimated number of entities found, and the operator and
+        value to look up, or :obj:`None` if the index can not be used.
+    :rtype: :class:`tuple` (:class:`int`, :class:`str`, value) or
+        :obj:`None`
     """
-    if ignore_case is True:
-        prop_value = prop_value.lower()
-        cmp_value = cmp_value.lower()
-    return cmp_value == prop_value
+    if verb in ("regex", "iregex"):
+        prefix, runs, ignore_case = regex_literals(value, verb == "iregex")
+        probes = [("icontains" if ignore_case else "contains", run)
+                  for run in runs]
+        if prefix is not None:
+            probes.append(
+                ("istartswith" if ignore_case else "startswith", prefix)
+            )
+    else:
+        probes = [(verb, value)]
+
+    best = None
+    for each_verb, each_value in probes:
+        if each_verb not in index.operators:
+            continue
+        estimate = index.estimate(each_verb, each_value)
+        if estimate is not None and (best is None or estimate < best[0]):
+            best = (estimate, each_verb, each_value)
+    return best
 
 
-def _ne(prop_value, cmp_value, ignore_case=False):
+# Index lookups returning more than this many times the entities found so
+# far are slower than checking the found entities one by one.
+_INTERSECT_FACTOR = 8
+
+
+class _ViewTracker(object):
     """
-    Helper function that take two arguments and checks if :param prop_value:
-    is not equal to :param cmp_value:
-
-    :param prop_value: Property value that you are checking.
-    :type prop_value: :class:`str`
-    :param cmp_value: Value that you are checking if they are not equal.
-    :type cmp_value: :class:`str`
-    :param ignore_case: True to run using incase sensitive.
-    :type ignore_case: :class:`bool`
-    :returns: True if :param prop_value: and :param cmp_value: are
-        not equal.
-    :rtype: class:`bool`
+    Internal mixin for the entity sets which hand out
+    :class:`~.EntitySetView` objects, keeping track of the views that still
+    need to be evaluated.
     """
-    if ignore_case is True:
-        prop_value = prop_value.lower()
-        cmp_value = cmp_value.lower()
-    return cmp_value != prop_value
-
-
-OPERATORS = {
-    "contains": _contains,
-    "icontains": _contains,  # require to be called with ignore_case
-    "startswith": _startswith,
-    "istartswith": _startswith,  # require to be called with ignore_case
-    "endswith": _endswith,
-    "iendswith": _endswith,  # require to be called with ignore_case
-    "le": lambda prop_value, value, ignore_case: value >= prop_value,
-    "lt": lambda prop_value, value, ignore_case: value > prop_value,
-    "ge": lambda prop_value, value, ignore_case: value <= prop_value,
-    "gt": lambda prop_value, value, ignore_case: value < prop_value,
-    "eq": _eq,
-    "ieq": _eq,  # require to be called with ignore_case
-    "ne": _ne,
-    "ine": _ne,  # require to be called with ignore_case
-}
-
-
-class EntitySet(interfaces.IEntitySet):
+    def _view(self, label, predicates):
+        """
+        Create a view on the entity set that is evaluated before the entity
+        set is next changed.
+
+        :param label: Label the entities should have.
+        :type label: :class:`str` or :obj:`None`
+        :param predicates: Property key and value pairs.
+        :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+        :returns: New view on the entity set.
+        :rtype: :class:`~.EntitySetView`
+        """
+        view = EntitySetView(self, label, predicates)
+        self._views[id(view)] = view
+        return view
+
+    def _evaluate_views(self):
+        """
+        Evaluate all the pending views on the entity set, so that they still
+        hold the entities that matched when they were created.
+        """
+        if self._views:
+            for view in self._views.values():
+                view.evaluate()
+            self._views.clear()
+
+
+class EntitySet(_ViewTracker, interfaces.IEntitySet):
     """
     EntitySet used for storing, filtering, and iterating over
     :class:`~.IEntity` objects.
@@ -450,11 +542,23 @@ class EntitySet(interfaces.IEntitySet):
 
     :param entities: Entities being added to the set.
     :type entities: Iterable of :class:`.IEntity`
+    :param bitmaps: Keep the label, property and value references as
+        :class:`~.IdentBitmap` objects instead of sets. All the entities
+        added must then have a non negative integer
+        :attr:`~.IEntity.ident`, like the entities bound to a graph.
+    :type bitmaps: :class:`bool`
     """
-    def __init__(self, entities=None):
+    def __init__(self, entities=None, bitmaps=False):
         super(EntitySet, self).__init__()
         self._prop_reference = {}
+        self._value_reference = {}
+        self._indexes = {}
         self._id_reference = {}
+        self._views = weakref.WeakValueDictionary()
+        self._bitmaps = bitmaps
+        self._new_set = set
+        if bitmaps:
+            self._new_set = partial(IdentBitmap, self._id_reference)
 
         if entities is not None:
             for entity in entities:
@@ -463,8 +567,125 @@ class EntitySet(interfaces.IEntitySet):
     def all(self, label=None, **kwargs):
         return list(self.filter(label, **kwargs))
 
-    def sorted(self, key=None, reverse=False):
-        return sorted(self, key=key, reverse=reverse)
+    def sorted(self, key=None, reverse=False, limit=None, offset=0,
+               cursor=None):
+        return self._sorted(
+            None, (), key, reverse, limit, offset, cursor
+        )
+
+    def _sorted(self, label, predicates, key, reverse, limit, offset,
+                cursor):
+        """
+        Return a page of the entities matching the label and property
+        predicates, in sort order.
+
+        .. note::
+
+            See :meth:`sorted` for the sort order, :meth:`filter` for the
+            predicates.
+
+        :returns: Sorted page of entities.
+        :rtype: :class:`list` of :class:`~.IEntity`
+        """
+        if limit is None and not offset and cursor is None:
+            if not isinstance(key, basestring):
+                return sorted(
+                    self._iselect(label, predicates), key=key, reverse=reverse
+                )
+
+        position = position_of(key)
+        after = None if cursor is None else position(cursor)
+
+        # a page of a large result can be read in the order of a sorted
+        # index on the key, stopping once the page is full.
+        if label is None:
+            labels = [
+                each for each, collection in self._prop_reference.iteritems()
+                if collection.get("_all")
+            ]
+            if len(labels) == 1:
+                label = labels[0]
+        index = self._indexes.get(label, {}).get(key, {}).get("sorted")
+        if index is not None and limit is not None:
+            conditions = split_predicates(predicates, label)
+            plan = self._plan(label, conditions)
+            found = min([step.estimate for step in plan] or [len(index)])
+            if found > _INTERSECT_FACTOR * (offset + limit):
+                checks = compile_checks(conditions)
+                stream = (
+                    entity for entity in self._index_order(
+                        label, key, index, position, reverse, after
+                    )
+                    if match(entity, checks)
+                )
+                return list(islice(stream, offset, offset + limit))
+
+        return top(
+            self._iselect(label, predicates),
+            position,
+            reverse,
+            offset,
+            limit,
+            after,
+        )
+
+    def _index_order(self, label, key, index, position, reverse, after):
+        """
+        Iterate over the entities with the label in the order of a sorted
+        index on the key, starting after the cursor position.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param key: Property key of the index.
+        :type key: :class:`str`
+        :param index: Sorted index on the key.
+        :type index: :class:`~.SortedIndex`
+        :param position: Function giving the position of a entity.
+        :type position: :func:`callable`
+        :param reverse: True to iterate in reverse order.
+        :type reverse: :class:`bool`
+        :param after: Cursor position, or :obj:`None` to start from the
+            first entity.
+        :type after: :class:`tuple` or :obj:`None`
+        :returns: Entities in sort order.
+        :rtype: Iterable of :class:`~.IEntity`
+        """
+        entities = self._prop_reference.get(label, {}).get("_all", ())
+        missing = []
+        # only entities without a value for the key are left out of the
+        # index, so they only need looking for when there are some.
+        if len(entities) > len(index):
+            missing = sorted(
+                (
+                    entity for entity in entities
+                    if entity.properties.get(key) is None
+                ),
+                key=position,
+                reverse=reverse,
+            )
+
+        start = None
+        present = True
+        if after is not None:
+            if after[0] == 0:
+                start = after[1]
+            elif not reverse:
+                present = False
+
+        if present:
+            ordered = (entity for _, entity in index.ordered(reverse, start))
+        else:
+            ordered = ()
+        if reverse:
+            stream = chain(missing, ordered)
+        else:
+            stream = chain(ordered, missing)
+        if after is not None:
+            stream = dropwhile(
+                lambda entity: not is_after(position(entity), after, reverse),
+                stream,
+            )
+        return stream
 
     def get_labels(self):
         return self._prop_reference.keys()
@@ -475,6 +696,307 @@ class EntitySet(interfaces.IEntitySet):
                 if not key.startswith("_all"):
                     yield label, key
 
+        for label, indexes in self._indexes.iteritems():
+            for keys in indexes:
+                if isinstance(keys, tuple):
+                    yield label, keys
+
+    def add_index(self, label, key, kind="sorted"):
+        if kind not in INDEXES:
+            raise interfaces.UnknownIndexError(
+                "Unknown index kind {0!r}.".format(kind)
+            )
+        if (kind == "composite") != isinstance(key, tuple):
+            raise interfaces.UnknownIndexError(
+                "Composite indexes, and only composite indexes, take a "
+                "tuple of keys: {0!r} {1!r}.".format(kind, key)
+            )
+
+        indexes = self._indexes.setdefault(label, {}).setdefault(key, {})
+        if kind not in indexes:
+            index = INDEXES[kind]()
+            collection = self._prop_reference.get(label, {})
+            if kind == "composite":
+                index.build(
+                    (entity, _composite_values(entity, key))
+                    for entity in collection.get("_all", ())
+                )
+            else:
+                index.build(
+                    (entity, entity.properties[key])
+                    for entity in collection.get(key, ())
+                )
+            indexes[kind] = index
+        return indexes[kind]
+
+    def get_stats(self, label, key, buckets=10):
+        if isinstance(key, tuple):
+            index = self._indexes.get(label, {}).get(key, {}).get("composite")
+            if index is None:
+                return IndexStats(0, 0, None)
+            return IndexStats(len(index), index.distinct(), None)
+
+        # the label and value references already keep the counts up to
+        # date, only the histogram is worked out when asked for.
+        count = len(self._prop_reference.get(label, {}).get(key, ()))
+        value_index = self._value_reference.get(label, {}).get(key, {})
+        return IndexStats(
+            count,
+            len(value_index),
+            equi_depth_histogram(
+                ((value, len(bucket))
+                 for value, bucket in value_index.iteritems()),
+                buckets,
+            ),
+        )
+
+    def aggregate(self, key, func="sum", label=None, **kwargs):
+        return self._aggregate(label, kwargs.items(), key, func)
+
+    def _aggregate(self, label, predicates, key, func):
+        """
+        Aggregate the values of the property key of the entities matching
+        the label and property predicates.
+
+        .. note::
+
+            See :meth:`aggregate` for details.
+
+        :returns: The aggregate.
+        :rtype: Number or :obj:`None`
+        """
+        conditions = split_predicates(predicates, label)
+        labels = self._prop_reference.keys() if label is None else [label]
+        parts = []
+        for each_label in labels:
+            values = self._column_values(each_label, key, conditions)
+            if values is None:
+                values = (
+                    entity.properties.get(key)
+                    for entity in self._iselect(each_label, predicates)
+                )
+            parts.append(values)
+        return aggregate_values(func, parts)
+
+    def _column_values(self, label, key, conditions):
+        """
+        Select the values of the property key straight from the column
+        indexes, when the column of the key and of every condition are
+        complete.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param key: Property key of the values.
+        :type key: :class:`str`
+        :param conditions: Property key, operator and value conditions.
+        :type conditions: Iterable of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        :returns: Values of the matching entities, or :obj:`None` if the
+            conditions can not be answered by the columns.
+        :rtype: :class:`numpy.ndarray` or :obj:`None`
+        """
+        indexes = self._indexes.get(label, {})
+        target = indexes.get(key, {}).get("column")
+        if target is None or not target.complete:
+            return None
+
+        mask = None
+        for cond_key, verb, value in conditions:
+            verb = verb or "eq"
+            column = indexes.get(cond_key, {}).get("column")
+            if column is None or not column.complete:
+                return None
+            if verb not in column.operators:
+                return None
+            found = column.mask(verb, value)
+            if found is None:
+                return None
+            if mask is not None:
+                size = min(len(mask), len(found))
+                found = mask[:size] & found[:size]
+            mask = found
+        return target.values(mask)
+
+    def explain(self, label=None, **kwargs):
+        return self._explain(label, kwargs.items())
+
+    def _explain(self, label, predicates):
+        """
+        Return the plan used to select the entities matching the label and
+        property predicates.
+
+        :param label: Label of the entities. If :obj:`None`, entities with
+            any label are checked.
+        :type label: :class:`str` or :obj:`None`
+        :param predicates: Property key and value pairs as given to
+            :meth:`filter`.
+        :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+        :returns: Plan steps in the order they are executed.
+        :rtype: :class:`list` of :class:`~.PlanStep`
+        """
+        conditions = split_predicates(predicates, label)
+        if label is not None:
+            return self._plan(label, conditions)
+        return merge_plans(
+            self._plan(each_label, conditions)
+            for each_label, collection in self._prop_reference.iteritems()
+            if all(key in collection for key, _, _ in conditions)
+        )
+
+    def _plan(self, label, conditions):
+        """
+        Plan how to answer the filter conditions for the label, ordering
+        them by the estimated number of matching entities.
+
+        Conditions which can be looked up in a index are intersected
+        starting with the most selective one. A index lookup which is
+        expected to return many more entities than found so far is skipped
+        in favour of checking the found entities.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param conditions: Property key, operator and value conditions.
+        :type conditions: Iterable of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        :returns: Plan steps in the order they are executed.
+        :rtype: :class:`list` of :class:`~.PlanStep`
+        """
+        collection = self._prop_reference.get(label, {})
+        indexes = self._indexes.get(label, {})
+
+        steps = []
+        composite = self._composite_step(label, conditions)
+        if composite is not None:
+            steps.append(composite)
+            conditions = [
+                (key, verb, value) for key, verb, value in conditions
+                if key not in composite.key or verb not in (None, "eq")
+            ]
+
+        for key, verb, value in conditions:
+            step = PlanStep(
+                key, verb, value, None, len(collection.get(key, ())), True
+            )
+
+            if verb is None or verb == "eq" or verb == "in":
+                estimate = self._estimate_value(label, key, verb, value)
+                if estimate is not None:
+                    step = step._replace(
+                        index="value", estimate=estimate, check=False
+                    )
+            else:
+                for kind, index in indexes.get(key, {}).iteritems():
+                    probe = _probe(index, verb, value)
+                    if probe is None:
+                        continue
+                    if step.index is None or probe[0] < step.estimate:
+                        step = step._replace(
+                            index=kind,
+                            estimate=probe[0],
+                            check=verb not in index.exact,
+                        )
+            steps.append(step)
+
+        steps.sort(key=lambda step: (step.index is None, step.estimate))
+
+        found = None
+        for pos, step in enumerate(steps):
+            if step.index is None:
+                break
+            if found is None:
+                found = step.estimate
+            elif step.estimate > _INTERSECT_FACTOR * found:
+                steps[pos] = step._replace(index=None, check=True)
+        return steps
+
+    def _composite_step(self, label, conditions):
+        """
+        Return the plan step looking up the equality conditions in the
+        composite index of the label which covers the most of them.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param conditions: Property key, operator and value conditions.
+        :type conditions: Iterable of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        :returns: Plan step for the composite index, or :obj:`None` if no
+            composite index covers the conditions.
+        :rtype: :class:`~.PlanStep` or :obj:`None`
+        """
+        equal = dict(
+            (key, value) for key, verb, value in conditions
+            if verb is None or verb == "eq"
+        )
+        if len(equal) < 2:
+            return None
+
+        best = None
+        best_rank = None
+        for keys, kinds in self._indexes.get(label, {}).iteritems():
+            index = kinds.get("composite")
+            if index is None or not all(key in equal for key in keys):
+                continue
+            values = tuple(equal[key] for key in keys)
+            estimate = index.estimate("eq", values)
+            if estimate is None:
+                continue
+            # prefer the index covering the most keys.
+            rank = (-len(keys), estimate)
+            if best is None or rank < best_rank:
+                best_rank = rank
+                best = PlanStep(
+                    keys, "eq", values, "composite", estimate, False
+                )
+        return best
+
+    def _lookup(self, label, step):
+        """
+        Return the entities found in the index used by the plan step.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param step: Plan step being looked up.
+        :type step: :class:`~.PlanStep`
+        :returns: Entities found in the index.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        if step.index == "value":
+            if step.operator == "in":
+                return self._lookup_values(label, step.key, step.value)
+            return self._lookup_value(label, step.key, step.value)
+        index = self._indexes[label][step.key][step.index]
+        _, verb, value = _probe(index, step.operator, step.value)
+        return index.lookup(verb, value)
+
+    def _estimate_value(self, label, key, verb, value):
+        """
+        Return the number of entities found by looking up a equality or
+        membership condition in the value index.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param key: Property key.
+        :type key: :class:`str`
+        :param verb: Filter operator, ``eq``, ``in`` or :obj:`None`.
+        :type verb: :class:`str` or :obj:`None`
+        :param value: Property value, or values for ``in``.
+        :type value: Hashable value, or iterable of hashable values.
+        :returns: Number of entities found, or :obj:`None` if a value can
+            not be looked up because it is unhashable.
+        :rtype: :class:`int` or :obj:`None`
+        """
+        if verb != "in":
+            found = self._lookup_value(label, key, value)
+            return None if found is None else len(found)
+
+        value_index = self._value_reference.get(label, {}).get(key, {})
+        try:
+            return sum(
+                len(value_index.get(each, ())) for each in set(value)
+            )
+        except TypeError:
+            return None
+
     def get(self, ident):
         entity = self._id_reference.get(ident)
         if entity is None:
@@ -482,15 +1004,108 @@ class EntitySet(interfaces.IEntitySet):
         return entity
 
     def update_index(self, entity, **kwargs):
-        collection = self._prop_reference.setdefault(
-            entity.label,
-            {"_all": set()},
-        )
+        self._evaluate_views()
+        collection = self._prop_reference.get(entity.label)
+        if collection is None:
+            collection = self._prop_reference[entity.label] = {
+                "_all": self._new_set()
+            }
+        values = self._value_reference.setdefault(entity.label, {})
+        indexes = self._indexes.get(entity.label, {})
 
         collection["_all"].add(entity)
+        for keys, kinds in indexes.iteritems():
+            if "composite" in kinds and any(key in kwargs for key in keys):
+                composite = kinds["composite"]
+                if entity in self:
+                    composite.remove(entity, _composite_values(entity, keys))
+                composite.add(entity, _composite_values(entity, keys, kwargs))
+
         # Add in a indexed property reference.
-        for key in kwargs:
-            collection.setdefault(key, set()).add(entity)
+        for key, value in kwargs.iteritems():
+            if key not in collection:
+                collection[key] = self._new_set()
+            collection[key].add(entity)
+
+            # The entity still holds the old value when the index is updated
+            # ahead of the property, so move it out of the old value bucket.
+            value_index = values.setdefault(key, {})
+            indexed = entity in self and key in entity.properties
+            if indexed:
+                _discard_value(value_index, entity.properties[key], entity)
+            _add_value(value_index, value, entity, self._new_set)
+
+            for index in indexes.get(key, {}).itervalues():
+                if indexed:
+                    index.remove(entity, entity.properties[key])
+                index.add(entity, value)
+
+    def unindex(self, entity, key):
+        self._evaluate_views()
+        if entity not in self or key not in entity.properties:
+            return
+
+        value = entity.properties[key]
+        collection = self._prop_reference[entity.label]
+        if key in collection:
+            collection[key].discard(entity)
+        values = self._value_reference.get(entity.label, {})
+        if key in values:
+            _discard_value(values[key], value, entity)
+
+        # the added indexes are planned as exact, so they must not keep
+        # the entity under a value it no longer has.
+        indexes = self._indexes.get(entity.label, {})
+        for index in indexes.get(key, {}).itervalues():
+            index.remove(entity, value)
+        for keys, kinds in indexes.iteritems():
+            if "composite" in kinds and key in keys:
+                kinds["composite"].remove(
+                    entity, _composite_values(entity, keys)
+                )
+
+    def _lookup_value(self, label, key, value):
+        """
+        Return the entities with the given label which have a property
+        ``key`` equal to ``value`` using the value index.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param key: Property key.
+        :type key: :class:`str`
+        :param value: Property value to look up.
+        :type value: Hashable value.
+        :returns: Indexed entities with the matching value or :obj:`None`
+            if the value can not be looked up because it is unhashable.
+        :rtype: :class:`set` or :obj:`None`
+        """
+        value_index = self._value_reference.get(label, {}).get(key, {})
+        try:
+            return value_index.get(value, set())
+        except TypeError:
+            return None
+
+    def _lookup_values(self, label, key, values):
+        """
+        Return the entities with the given label which have a property
+        ``key`` equal to any of the ``values`` using the value index.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param key: Property key.
+        :type key: :class:`str`
+        :param values: Property values to look up.
+        :type values: Iterable of hashable values.
+        :returns: Indexed entities with a matching value.
+        :rtype: :class:`set` or :class:`~.IdentBitmap`
+        """
+        value_index = self._value_reference.get(label, {}).get(key, {})
+        found = self._new_set()
+        for value in set(values):
+            bucket = value_index.get(value)
+            if bucket:
+                found |= bucket
+        return found
 
     def add(self, entity):
         if entity.ident in self._id_reference:
@@ -507,67 +1122,827 @@ class EntitySet(interfaces.IEntitySet):
 
         super(EntitySet, self).add(entity)
 
+    def discard(self, entity):
+        if entity in self:
+            self.remove(entity)
+
     def remove(self, entity):
-        if entity.ident in self._id_reference:
-            del self._id_reference[entity.ident]
-        else:
+        self._evaluate_views()
+        if entity.ident not in self._id_reference:
             raise KeyError("No such id {0!r} exists.".format(entity.ident))
 
         collection = self._prop_reference[entity.label]
-        for key in entity.properties.iterkeys():
+        collection["_all"].discard(entity)
+        values = self._value_reference.get(entity.label, {})
+        indexes = self._indexes.get(entity.label, {})
+        for key, value in entity.properties.iteritems():
             if key in collection:
                 collection[key].discard(entity)
+            if key in values:
+                _discard_value(values[key], value, entity)
+            for index in indexes.get(key, {}).itervalues():
+                index.remove(entity, value)
+        for keys, kinds in indexes.iteritems():
+            if "composite" in kinds:
+                kinds["composite"].remove(
+                    entity, _composite_values(entity, keys)
+                )
 
-        super(EntitySet, self).remove(entity)
+        # the bitmaps look the entity up by ident, so the reference is
+        # dropped last.
+        del self._id_reference[entity.ident]
+        self.entities.discard(entity)
 
-    def filter(self, label=None, **kwargs):  # pylint: disable=too-many-locals,too-many-branches
+    def filter(self, label=None, **kwargs):
         if label is None and not kwargs:
             return self
+        return self._view(label, kwargs.items())
+
+    def __or__(self, other):
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        result = self._derive()
+        result._merge(other)  # pylint: disable=protected-access
+        return result
+
+    def __and__(self, other):
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return self._derive(self.entities.intersection(_entities(other)))
+
+    def __sub__(self, other):
+        if not isinstance(other, Iterable):
+            return NotImplemented
+        return self._derive(self.entities.difference(_entities(other)))
+
+    def __ior__(self, other):
+        self._merge(other)
+        return self
+
+    def __iand__(self, other):
+        for entity in self.entities.difference(_entities(other)):
+            self.remove(entity)
+        return self
+
+    def __isub__(self, other):
+        for entity in self.entities.intersection(_entities(other)):
+            self.remove(entity)
+        return self
+
+    def _copy_reference(self, entities):
+        """
+        Return a copy of a label, property or value reference of this or
+        another entity set, to be used as a reference of this entity set.
+
+        :param entities: Reference being copied.
+        :type entities: :class:`set` or :class:`~.IdentBitmap`
+        :returns: Copy of the reference.
+        :rtype: :class:`set` or :class:`~.IdentBitmap`
+        """
+        if isinstance(entities, IdentBitmap):
+            return entities.rebind(self._id_reference)
+        return set(entities)
+
+    def _derive(self, keep=None):
+        """
+        Return a new entity set with the entities of this set, copying its
+        references and indexes instead of indexing every entity again.
+
+        :param keep: Only keep these entities, which have to be in this
+            set. If :obj:`None`, all the entities are kept.
+        :type keep: :class:`set` of :class:`~.IEntity` or :obj:`None`
+        :returns: New entity set.
+        :rtype: :class:`~.EntitySet`
+        """
+        # pylint: disable=protected-access
+        # copying the references of a large set to keep a few of its
+        # entities is slower than indexing them again.
+        if keep is not None and 2 * len(keep) < len(self):
+            result = EntitySet(keep, bitmaps=self._bitmaps)
+            result._add_indexes(self)
+            return result
+
+        result = EntitySet(bitmaps=self._bitmaps)
+        copy = result._copy_reference
+        lookup = result._id_reference
+        if keep is None:
+            result.entities = set(self.entities)
+            lookup.update(self._id_reference)
+            restrict = copy
+        else:
+            result.entities = keep
+            for entity in keep:
+                lookup[entity.ident] = entity
+            mask = result._new_set(keep)
+
+            def restrict(entities):  # pylint: disable=missing-docstring
+                if isinstance(entities, IdentBitmap):
+                    return entities.rebind(lookup) & mask
+                return entities & mask
+
+        for label, collection in self._prop_reference.iteritems():
+            copied = {}
+            for key, entities in collection.iteritems():
+                found = restrict(entities)
+                if found:
+                    copied[key] = found
+            if copied:
+                result._prop_reference[label] = copied
+
+        for label, keys in self._value_reference.iteritems():
+            copied_keys = result._value_reference[label] = {}
+            for key, value_index in keys.iteritems():
+                copied = copied_keys[key] = {}
+                for value, bucket in value_index.iteritems():
+                    found = restrict(bucket)
+                    if found:
+                        copied[value] = found
+
+        result._add_indexes(self)
+        return result
+
+    def _merge(self, other):
+        """
+        Add all the entities of another entity set, merging its references
+        into the references of this set.
+
+        :param other: Entities being added.
+        :type other: Iterable of :class:`~.IEntity`
+        :raises KeyError: If a entity has a :attr:`~.Entity.ident` conflict
+            with an existing :class:`~.IEntity`.
+        """
+        # pylint: disable=protected-access
+        self._evaluate_views()
+        if not isinstance(other, EntitySet) or (
+                other._bitmaps != self._bitmaps):
+            for entity in other:
+                self.add(entity)
+            return
 
-        if label and not kwargs:
-            if label in self._prop_reference:
-                return EntitySet(entities=self._prop_reference[label]["_all"])
+        lookup = self._id_reference
+        others = other._id_reference
+        for ident in lookup.viewkeys() & others.viewkeys():
+            if lookup[ident] != others[ident]:
+                raise KeyError(
+                    "Conflict: {0} (current) <-> {1} (conflict)".format(
+                        lookup[ident], others[ident]
+                    )
+                )
 
-        keys_values = kwargs.items()
-        get_func = OPERATORS.get
-        noun_verb_cache = {
-            key: _split_key_into_noun_verb(key)
-            for key, value in keys_values
-        }
+        new = other.entities - self.entities
+        lookup.update(others)
+        self.entities |= new
+
+        for label, collection in other._prop_reference.iteritems():
+            target = self._prop_reference.setdefault(label, {})
+            for key, entities in collection.iteritems():
+                if key in target:
+                    target[key] |= self._copy_reference(entities)
+                else:
+                    target[key] = self._copy_reference(entities)
+
+        for label, keys in other._value_reference.iteritems():
+            target_keys = self._value_reference.setdefault(label, {})
+            for key, value_index in keys.iteritems():
+                target = target_keys.setdefault(key, {})
+                for value, bucket in value_index.iteritems():
+                    if value in target:
+                        target[value] |= self._copy_reference(bucket)
+                    else:
+                        target[value] = self._copy_reference(bucket)
+
+        for entity in new:
+            for keys, kinds in self._indexes.get(entity.label, {}).iteritems():
+                for kind, index in kinds.iteritems():
+                    if kind == "composite":
+                        index.add(entity, _composite_values(entity, keys))
+                    elif keys in entity.properties:
+                        index.add(entity, entity.properties[keys])
+        self._add_indexes(other)
+
+    def _add_indexes(self, other):
+        """
+        Add all the indexes that another entity set has.
+
+        :param other: Entity set whose indexes are added.
+        :type other: :class:`~.EntitySet`
+        """
+        # pylint: disable=protected-access
+        for label, keys in other._indexes.iteritems():
+            for key, kinds in keys.iteritems():
+                for kind in kinds:
+                    self.add_index(label, key, kind)
+
+    def ifilter(self, label=None, **kwargs):
+        return self._iselect(label, kwargs.items())
+
+    def count(self, label=None, **kwargs):
+        total = 0
+        for elements, checks in self._candidates(label, kwargs.items()):
+            if checks:
+                total += sum(1 for entity in elements if match(entity, checks))
+            else:
+                total += len(elements)
+        return total
+
+    def _select(self, label, predicates):
+        """
+        Return the entities that have the label and match all the property
+        predicates.
+
+        :param label: Label of the entities. If :obj:`None`, entities with
+            any label are checked.
+        :type label: :class:`str` or :obj:`None`
+        :param predicates: Property key and value pairs as given to
+            :meth:`filter`.
+        :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+        :returns: New set with the matching entities.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        found = set()
+        for elements, checks in self._candidates(label, predicates):
+            if checks:
+                found.update(
+                    entity for entity in elements
+                    if match(entity, checks)
+                )
+            else:
+                found.update(elements)
+        return found
+
+    def _iselect(self, label, predicates):
+        """
+        Like :meth:`_select`, but yield the matching entities one at a time.
+        """
+        for elements, checks in self._candidates(label, predicates):
+            for entity in elements:
+                if not checks or match(entity, checks):
+                    yield entity
+
+    def _candidates(self, label, predicates):
+        """
+        Find the candidate entities for the label and property predicates,
+        together with the checks they still need to pass.
+
+        .. note::
+
+            The candidates may be the references of the entity set itself,
+            so they must not be changed.
+
+        :param label: Label of the entities. If :obj:`None`, entities with
+            any label are checked.
+        :type label: :class:`str` or :obj:`None`
+        :param predicates: Property key and value pairs as given to
+            :meth:`filter`.
+        :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+        :returns: Candidates and checks for each label.
+        :rtype: Iterable of :class:`tuple` (Iterable of :class:`~.IEntity`,
+            :class:`list` of checks)
+        """
+        if not predicates:
+            if label is None:
+                yield self.entities, []
+            else:
+                yield self._prop_reference.get(label, {}).get("_all", ()), []
+            return
+
+        # use the indexes of every label instead of checking every entity.
+        conditions = split_predicates(predicates, label)
+        labels = self._prop_reference.keys() if label is None else [label]
+        for each_label in labels:
+            candidates = self._label_candidates(each_label, conditions)
+            if candidates is not None:
+                yield candidates
+
+    def _label_candidates(self, label, conditions):
+        """
+        Find the candidate entities that have exactly the given label, using
+        the label indexes.
+
+        :param label: Label of the entities.
+        :type label: :class:`str` or :obj:`None`
+        :param conditions: Property key, operator and value conditions.
+        :type conditions: :class:`list` of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        :returns: Candidates and the checks they still need to pass, or
+            :obj:`None` if nothing can match.
+        :rtype: :class:`tuple` or :obj:`None`
+        """
+        collection = self._prop_reference.get(label)
+        if collection is None:
+            return None
+        for key, _, _ in conditions:
+            if key not in collection:
+                return None
+
+        elements = None
+        residual = []
+        for step in self._plan(label, conditions):
+            if step.index is not None:
+                found = self._lookup(label, step)
+                elements = found if elements is None else elements & found
+                if not elements:
+                    return None
+            if step.check:
+                residual.append((step.key, step.operator, step.value))
+
+        # nothing could be looked up, so check every entity which has the
+        # least common property key.
+        if elements is None:
+            elements = min(
+                (collection[key] for key, _, _ in conditions),
+                key=len
+            )
+        return elements, compile_checks(residual)
+
+
+class EntitySetView(_ViewTracker, interfaces.IEntitySet):
+    """
+    Lightweight view of the entities in a parent :class:`~.EntitySet` that
+    match a filter, which is returned by :meth:`~.EntitySet.filter`.
+
+    The view is evaluated lazily using the indexes of the parent the first
+    time it is used, or just before the parent changes, and no indexes are
+    built for the matched entities. Chained filters on a view that has not
+    been evaluated yet are combined and run against the parent.
+
+    The view only turns into a full :class:`~.EntitySet` when it is
+    mutated, or when it is explicitly copied with :meth:`copy`.
 
-        elements = set()
+    .. note::
+
+        See :class:`~.IEntitySet` for documenation.
+
+    :param parent: Entity set that is being filtered.
+    :type parent: :class:`~.EntitySet`
+    :param label: Label the entities should have. If :obj:`None`,
+        entities with any label match.
+    :type label: :class:`str` or :obj:`None`
+    :param predicates: Property key and value pairs as given to
+        :meth:`~.EntitySet.filter`.
+    :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+    """
+    def __init__(self, parent, label=None, predicates=()):
+        # the base initialiser is skipped because the entities are only
+        # evaluated when they are needed.
+        self._parent = parent
+        self._label = label
+        self._predicates = tuple(predicates)
+        self._entities = None
+        self._materialized = None
+        self._views = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return EntitySet(iterable)
+
+    @property
+    def entities(self):
+        """
+        Entities matched by the view, evaluated on first access.
+
+        :returns: Matched entities.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        if self._materialized is not None:
+            return self._materialized.entities
+        return self.evaluate()
+
+    def evaluate(self):
+        """
+        Evaluate the view if it has not been evaluated yet.
+
+        :returns: Matched entities.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        if self._entities is None:
+            self._entities = self._parent._select(  # pylint: disable=protected-access
+                self._label, self._predicates
+            )
+        return self._entities
+
+    def copy(self):
+        """
+        Return a new :class:`~.EntitySet` with the entities in the view.
+
+        :returns: New entity set with its own indexes.
+        :rtype: :class:`~.EntitySet`
+        """
+        return EntitySet(self.entities)
+
+    def _materialize(self):
+        """
+        Turn the view into a full :class:`~.EntitySet` which all further
+        operations are delegated to.
+
+        :returns: The materialized entity set.
+        :rtype: :class:`~.EntitySet`
+        """
+        if self._materialized is None:
+            self._evaluate_views()
+            self._materialized = self.copy()
+            self._entities = None
+        return self._materialized
+
+    def add(self, entity):
+        self._materialize().add(entity)
+
+    def discard(self, entity):
+        self._materialize().discard(entity)
+
+    def remove(self, entity):
+        self._materialize().remove(entity)
+
+    def update_index(self, entity, **kwargs):
+        self._materialize().update_index(entity, **kwargs)
+
+    def unindex(self, entity, key):
+        self._materialize().unindex(entity, key)
+
+    def add_index(self, label, key, kind="sorted"):
+        return self._materialize().add_index(label, key, kind)
+
+    def all(self, label=None, **kwargs):
+        return list(self.filter(label, **kwargs))
+
+    def sorted(self, key=None, reverse=False, limit=None, offset=0,
+               cursor=None):
+        return self._sorted(None, (), key, reverse, limit, offset, cursor)
+
+    def _sorted(self, label, predicates, key, reverse, limit, offset,
+                cursor):
+        """
+        Like :meth:`.EntitySet._sorted`, but for the combined filter of the
+        view.
+        """
+        if self._materialized is not None:
+            return self._materialized._sorted(  # pylint: disable=protected-access
+                label, predicates, key, reverse, limit, offset, cursor
+            )
+        if self._entities is not None:
+            entities = self._iselect(label, predicates)
+            if limit is None and not offset and cursor is None:
+                if not isinstance(key, basestring):
+                    return sorted(entities, key=key, reverse=reverse)
+            position = position_of(key)
+            after = None if cursor is None else position(cursor)
+            return top(entities, position, reverse, offset, limit, after)
+
+        combined = self._combine(label, predicates)
+        if combined is None:
+            return []
+        return self._parent._sorted(  # pylint: disable=protected-access
+            combined[0], combined[1], key, reverse, limit, offset, cursor
+        )
+
+    def get_labels(self):
+        if self._materialized is not None:
+            return self._materialized.get_labels()
+        return list(set(entity.label for entity in self))
+
+    def get_indexes(self):
+        if self._materialized is not None:
+            return self._materialized.get_indexes()
+        return iter(
+            set(
+                (entity.label, key)
+                for entity in self
+                for key in entity.properties
+            )
+        )
+
+    def get_stats(self, label, key, buckets=10):
+        if self._materialized is not None:
+            return self._materialized.get_stats(label, key, buckets)
+        return EntitySet(self).get_stats(label, key, buckets)
+
+    def get(self, ident):
+        if self._materialized is not None:
+            return self._materialized.get(ident)
+        for entity in self:
+            if entity.ident == ident:
+                return entity
+        raise KeyError("No such id {0!r} exists.".format(ident))
+
+    def _select(self, label, predicates):
+        """
+        Like :meth:`.EntitySet._select`, but checks the entities in the
+        already evaluated view.
+        """
+        return set(self._iselect(label, predicates))
+
+    def _iselect(self, label, predicates):
+        """
+        Like :meth:`.EntitySet._iselect`, but checks the entities in the
+        already evaluated view.
+        """
+        checks = compile_predicates(predicates, label)
+        for entity in self:
+            if label is not None and entity.label != label:
+                continue
+            if match(entity, checks):
+                yield entity
+
+    def ifilter(self, label=None, **kwargs):
+        if self._materialized is not None:
+            return self._materialized.ifilter(label, **kwargs)
+        if self._entities is not None:
+            return self._iselect(label, kwargs.items())
+
+        combined = self._combine(label, kwargs.items())
+        if combined is None:
+            return iter(())
+        return self._parent._iselect(*combined)  # pylint: disable=protected-access
+
+    def _combine(self, label, predicates):
+        """
+        Combine the filter of the view with another filter.
+
+        :param label: Label of the other filter.
+        :type label: :class:`str` or :obj:`None`
+        :param predicates: Property key and value pairs of the other filter.
+        :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+        :returns: Combined label and predicates, or :obj:`None` if the
+            labels conflict and nothing can match.
+        :rtype: :class:`tuple` or :obj:`None`
+        """
+        if self._label is not None and label is not None:
+            if self._label != label:
+                return None
+        return (
+            self._label if label is None else label,
+            self._predicates + tuple(predicates),
+        )
+
+    def filter(self, label=None, **kwargs):
+        if label is None and not kwargs:
+            return self
+
+        # once evaluated or mutated, the view is a snapshot and is filtered
+        # on its own, otherwise run the combined filter on the parent.
+        if self._materialized is not None:
+            return self._materialized.filter(label, **kwargs)
+        if self._entities is not None:
+            return self._view(label, kwargs.items())
+
+        combined = self._combine(label, kwargs.items())
+        if combined is None:
+            return EntitySet()
+        return self._parent._view(*combined)  # pylint: disable=protected-access
+
+    def aggregate(self, key, func="sum", label=None, **kwargs):
+        return self._aggregate(label, kwargs.items(), key, func)
+
+    def _aggregate(self, label, predicates, key, func):
+        """
+        Like :meth:`.EntitySet._aggregate`, but for the combined filter of
+        the view.
+        """
+        if self._materialized is not None:
+            return self._materialized._aggregate(  # pylint: disable=protected-access
+                label, predicates, key, func
+            )
+        if self._entities is not None:
+            return aggregate_values(func, [
+                (entity.properties.get(key)
+                 for entity in self._iselect(label, predicates))
+            ])
+
+        combined = self._combine(label, predicates)
+        if combined is None:
+            return aggregate_values(func, [])
+        return self._parent._aggregate(  # pylint: disable=protected-access
+            combined[0], combined[1], key, func
+        )
+
+    def explain(self, label=None, **kwargs):
+        return self._explain(label, kwargs.items())
+
+    def _explain(self, label, predicates):
+        """
+        Like :meth:`.EntitySet._explain`, but for the combined filter of the
+        view.
+        """
+        if self._materialized is not None:
+            return self._materialized._explain(  # pylint: disable=protected-access
+                label, predicates
+            )
+        if self._entities is not None:
+            return scan_plan(len(self), predicates)
+
+        combined = self._combine(label, predicates)
+        if combined is None:
+            return []
+        return self._parent._explain(*combined)  # pylint: disable=protected-access
+
+
+class AdjacencySet(interfaces.IEntitySet):
+    """
+    Compact set of the ``in`` or ``out`` edges of a :class:`~.Vertex`,
+    keeping the edges in a plain :class:`set` for each edge label.
+
+    Most vertices are only ever asked for their edges, or for the edges of
+    a label, so the properties of the edges are only indexed, in a full
+    :class:`~.EntitySet`, the first time a property filter is run against
+    the set. The index is then kept up to date with the set.
+
+    .. note::
+
+        See :class:`~.IEntitySet` for documenation.
+
+    .. note::
+
+        Filters on the label alone use the set of the label, while filters
+        on properties, sorting on a property and the other index based
+        methods first index the edges. Filtering on a label returns a new
+        :class:`AdjacencySet`, while the others return what the index
+        returns.
+
+    :param entities: Edges being added to the set.
+    :type entities: Iterable of :class:`~.IEdge`
+    """
+    # the sets and the index are only created when they are needed, so a
+    # vertex without edges does not hold anything, and the slots keep the
+    # instances from allocating a __dict__.
+    __slots__ = ("_partitions", "_indexed")
+
+    def __init__(self, entities=None):
+        # the base initialiser is skipped because the edges are kept in a
+        # set for each label.
+        self._partitions = None
+        self._indexed = None
+        if entities is not None:
+            for entity in entities:
+                self.add(entity)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return cls(iterable)
+
+    @property
+    def entities(self):
+        """
+        All the edges in a single set.
+
+        :returns: Edges of the vertex.
+        :rtype: :class:`set` of :class:`~.IEdge`
+        """
+        if self._indexed is not None:
+            return self._indexed.entities
+        return set(self)
+
+    @property
+    def is_indexed(self):
+        """
+        True once the properties of the edges have been indexed.
+
+        :rtype: :class:`bool`
+        """
+        return self._indexed is not None
+
+    def _partition(self, label):
+        """
+        Return the edges that have the label.
+
+        .. note::
+
+            The returned set is the set kept for the label, so it must not
+            be changed.
+
+        :param label: Edge label.
+        :type label: :class:`str` or :obj:`None`
+        :rtype: :class:`set` of :class:`~.IEdge`
+        """
+        if self._partitions is None:
+            return ()
+        return self._partitions.get(label, ())
+
+    def _index(self):
+        """
+        Return the entity set indexing the properties of the edges,
+        building it the first time.
+
+        :rtype: :class:`~.EntitySet`
+        """
+        if self._indexed is None:
+            self._indexed = EntitySet(self)
+        return self._indexed
+
+    def __len__(self):
+        if self._partitions is None:
+            return 0
+        return sum(len(each) for each in self._partitions.itervalues())
+
+    def __contains__(self, entity):
+        return entity in self._partition(getattr(entity, "label", None))
+
+    def __iter__(self):
+        if self._partitions is None:
+            return iter(())
+        return chain.from_iterable(self._partitions.values())
+
+    def add(self, entity):
+        if self._partitions is None:
+            self._partitions = {}
+        partition = self._partitions.get(entity.label)
+        if partition is None:
+            partition = self._partitions[entity.label] = set()
+        if self._indexed is not None:
+            self._indexed.add(entity)
+        partition.add(entity)
+
+    def discard(self, entity):
+        if entity in self:
+            self.remove(entity)
+
+    def remove(self, entity):
+        partition = self._partition(entity.label)
+        if entity not in partition:
+            raise KeyError("No such id {0!r} exists.".format(entity.ident))
+
+        if self._indexed is not None:
+            self._indexed.remove(entity)
+        partition.remove(entity)
+        if not partition:
+            del self._partitions[entity.label]
+
+    def update_index(self, entity, **kwargs):
+        if self._indexed is not None:
+            self._indexed.update_index(entity, **kwargs)
+
+    def unindex(self, entity, key):
+        if self._indexed is not None:
+            self._indexed.unindex(entity, key)
+
+    def get_labels(self):
+        return list(self._partitions or ())
+
+    def get_indexes(self):
+        if self._indexed is not None:
+            return self._indexed.get_indexes()
+        return iter(
+            set(
+                (entity.label, key)
+                for entity in self
+                for key in entity.properties
+            )
+        )
+
+    def get_stats(self, label, key, buckets=10):
+        return self._index().get_stats(label, key, buckets)
+
+    def add_index(self, label, key, kind="sorted"):
+        return self._index().add_index(label, key, kind)
+
+    def get(self, ident):
+        if self._indexed is not None:
+            return self._indexed.get(ident)
+        for entity in self:
+            if entity.ident == ident:
+                return entity
+        raise KeyError("No such id {0!r} exists.".format(ident))
+
+    def filter(self, label=None, **kwargs):
+        if kwargs:
+            return self._index().filter(label, **kwargs)
+        if label is None:
+            return self
+        return AdjacencySet(self._partition(label))
+
+    def ifilter(self, label=None, **kwargs):
+        if kwargs:
+            return self._index().ifilter(label, **kwargs)
+        if label is None:
+            return iter(self)
+        return iter(self._partition(label))
+
+    def count(self, label=None, **kwargs):
+        if kwargs:
+            return self._index().count(label, **kwargs)
         if label is None:
-            elements = set(self._id_reference.values())
-        elif label in self._prop_reference:
-            for key, value in keys_values:
-                key, verb = noun_verb_cache[key]
-                if key not in self._prop_reference[label]:
-                    return EntitySet()
-                elements = elements | self._prop_reference[label][key]
-
-        container = EntitySet()
-        for entity in elements:
-            mismatch = False
-            for key, value in keys_values:
-                key, verb = noun_verb_cache[key]
-                icase = verb[0] == "i" if verb else False
-                func = get_func(verb)
-                if key not in entity.properties:
-                    mismatch = True
-                    break
-                prop_value = entity.properties[key]
-                if prop_value is None:
-                    mismatch = True
-                    break
-                if not func:
-                    if prop_value != value:
-                        mismatch = True
-                        break
-                elif not func(prop_value, value, icase):
-                    mismatch = True
-                    break
-
-            if not mismatch:
-                container.add(entity)
-
-        return container
+            return len(self)
+        return len(self._partition(label))
+
+    def all(self, label=None, **kwargs):
+        return list(self.ifilter(label, **kwargs))
+
+    def sorted(self, key=None, reverse=False, limit=None, offset=0,
+               cursor=None):
+        if self._indexed is not None or isinstance(key, basestring):
+            return self._index().sorted(key, reverse, limit, offset, cursor)
+        if limit is None and not offset and cursor is None:
+            return sorted(self, key=key, reverse=reverse)
+        position = position_of(key)
+        after = None if cursor is None else position(cursor)
+        return top(self, position, reverse, offset, limit, after)
+
+    def aggregate(self, key, func="sum", label=None, **kwargs):
+        if kwargs:
+            return self._index().aggregate(key, func, label, **kwargs)
+        return aggregate_values(func, [
+            (entity.properties.get(key)
+             for entity in self.ifilter(label))
+        ])
+
+    def explain(self, label=None, **kwargs):
+        return self._index().explain(label, **kwargs)
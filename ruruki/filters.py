@@ -0,0 +1,720 @@
+"""
+Filter operators, compiled filters and the plan steps used by
+:class:`~.EntitySet` when filtering.
+"""
+import re
+import sre_constants
+import sre_parse
+from collections import namedtuple, OrderedDict
+
+
+# Maximum number of compiled filters kept by :func:`compile_filter`, and of
+# compiled patterns kept by :func:`compile_pattern`.
+CACHE_SIZE = 256
+
+_CACHE = OrderedDict()
+
+_PATTERNS = OrderedDict()
+
+
+def _split_key_into_noun_verb(key):
+    """
+    Internal helper function that takes the key and splits it into the
+    noun and verb, and returns the noun and verb.
+
+    .. note::
+
+        Example of a key with the special operator.
+
+        key: name__contains
+        return: name, contains
+
+    :param key: Key that you are splitting into the noun and verb. The key
+        should end with __<operator>
+    :type key: :class:`str`
+    :returns: Key name and the operator.
+    :rtype: :class:`tuple` (:class:`str`, :class:`str` or :obj:`None`)
+    """
+    split = key.rsplit("__", 1)
+    if len(split) == 2:
+        return split[0], split[1]
+    return key, None
+
+
+def _contains(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that take two arguments and checks if :param cmp_value:
+    is in :param prop_value:.
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: :class:`str`
+    :param cmp_value: Value that you are checking if it is in the property
+        value.
+    :type cmp_value: :class:`str`
+    :param ignore_case: True to run using incase sensitive.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param cmp_value: is in :param prop_value:
+    :rtype: class:`bool`
+    """
+    if ignore_case is True:
+        prop_value = prop_value.lower()
+        cmp_value = cmp_value.lower()
+    return cmp_value in prop_value
+
+
+def _startswith(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that take two arguments and checks if :param prop_value:
+    startswith :param cmp_value:
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: :class:`str`
+    :param cmp_value: Value that you are checking if it is in the property
+        value startswith.
+    :type cmp_value: :class:`str`
+    :param ignore_case: True to run using incase sensitive.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param prop_value: startswith :param cmp_value:
+    :rtype: class:`bool`
+    """
+    if ignore_case is True:
+        prop_value = prop_value.lower()
+        cmp_value = cmp_value.lower()
+    return prop_value.startswith(cmp_value)
+
+
+def _endswith(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that take two arguments and checks if :param prop_value:
+    endswith :param cmp_value:
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: :class:`str`
+    :param cmp_value: Value that you are checking if it is in the property
+        value endswith.
+    :type cmp_value: :class:`str`
+    :param ignore_case: True to run using incase sensitive.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param prop_value: endswith :param cmp_value:
+    :rtype: class:`bool`
+    """
+    if ignore_case is True:
+        prop_value = prop_value.lower()
+        cmp_value = cmp_value.lower()
+    return prop_value.endswith(cmp_value)
+
+
+def _eq(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that take two arguments and checks if :param prop_value:
+    equals :param cmp_value:
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: :class:`str`
+    :param cmp_value: Value that you are checking if they are equal.
+    :type cmp_value: :class:`str`
+    :param ignore_case: True to run using incase sensitive.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param prop_value: and :param cmp_value: are
+        equal.
+    :rtype: class:`bool`
+    """
+    if ignore_case is True:
+        prop_value = prop_value.lower()
+        cmp_value = cmp_value.lower()
+    return cmp_value == prop_value
+
+
+def _ne(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that take two arguments and checks if :param prop_value:
+    is not equal to :param cmp_value:
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: :class:`str`
+    :param cmp_value: Value that you are checking if they are not equal.
+    :type cmp_value: :class:`str`
+    :param ignore_case: True to run using incase sensitive.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param prop_value: and :param cmp_value: are
+        not equal.
+    :rtype: class:`bool`
+    """
+    if ignore_case is True:
+        prop_value = prop_value.lower()
+        cmp_value = cmp_value.lower()
+    return cmp_value != prop_value
+
+
+def _in(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that checks if :param prop_value: is one of the values
+    in :param cmp_value:.
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: Value
+    :param cmp_value: Values that you are checking against.
+    :type cmp_value: Iterable of values
+    :param ignore_case: Not supported, the values are compared as is.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param prop_value: is one of :param cmp_value:.
+    :rtype: class:`bool`
+    """
+    try:
+        return prop_value in cmp_value
+    except TypeError:
+        return False
+
+
+def _in_values(values):
+    """
+    Internal helper function that returns the values of the ``in``
+    operator as a :class:`tuple`, so that any iterable can be used more
+    than once.
+
+    :param values: Values the property is compared with.
+    :type values: Iterable of values
+    :raises TypeError: If the values are a string, which would otherwise
+        match its single characters.
+    :returns: The values.
+    :rtype: :class:`tuple`
+    """
+    if isinstance(values, basestring):
+        raise TypeError(
+            "The in operator takes a iterable of values, not the string "
+            "{0!r}.".format(values)
+        )
+    return tuple(values)
+
+
+def _regex(prop_value, cmp_value, ignore_case=False):
+    """
+    Helper function that checks if the regular expression
+    :param cmp_value: matches anywhere in :param prop_value:.
+
+    :param prop_value: Property value that you are checking.
+    :type prop_value: :class:`str`
+    :param cmp_value: Regular expression, or a compiled pattern.
+    :type cmp_value: :class:`str` or pattern
+    :param ignore_case: True to run using incase sensitive.
+    :type ignore_case: :class:`bool`
+    :returns: True if :param cmp_value: matches :param prop_value:.
+    :rtype: class:`bool`
+    """
+    if not isinstance(prop_value, basestring):
+        return False
+    search = compile_pattern(cmp_value, ignore_case).search
+    return search(prop_value) is not None
+
+
+OPERATORS = {
+    "contains": _contains,
+    "icontains": _contains,  # require to be called with ignore_case
+    "startswith": _startswith,
+    "istartswith": _startswith,  # require to be called with ignore_case
+    "endswith": _endswith,
+    "iendswith": _endswith,  # require to be called with ignore_case
+    "le": lambda prop_value, value, ignore_case: value >= prop_value,
+    "lt": lambda prop_value, value, ignore_case: value > prop_value,
+    "ge": lambda prop_value, value, ignore_case: value <= prop_value,
+    "gt": lambda prop_value, value, ignore_case: value < prop_value,
+    "eq": _eq,
+    "ieq": _eq,  # require to be called with ignore_case
+    "ne": _ne,
+    "ine": _ne,  # require to be called with ignore_case
+    "in": _in,
+    "regex": _regex,
+    "iregex": _regex,  # require to be called with ignore_case
+}
+
+
+def compile_pattern(pattern, ignore_case=False):
+    """
+    Return the compiled regular expression, reusing a previously compiled
+    pattern. The least recently used patterns are dropped once more than
+    :data:`CACHE_SIZE` are cached.
+
+    :param pattern: Regular expression, or an already compiled pattern
+        which is returned as is unless ``ignore_case`` is added.
+    :type pattern: :class:`str` or pattern
+    :param ignore_case: True to match ignoring the case.
+    :type ignore_case: :class:`bool`
+    :raises re.error: If the regular expression is not valid.
+    :returns: Compiled pattern.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    if not isinstance(pattern, basestring):
+        if not flags or pattern.flags & flags:
+            return pattern
+        flags |= pattern.flags
+        pattern = pattern.pattern
+
+    signature = (type(pattern), pattern, flags)
+    compiled = _PATTERNS.pop(signature, None)
+    if compiled is None:
+        compiled = re.compile(pattern, flags)
+        while len(_PATTERNS) >= CACHE_SIZE:
+            _PATTERNS.popitem(last=False)
+    _PATTERNS[signature] = compiled
+    return compiled
+
+
+def regex_literals(pattern, ignore_case=False):
+    """
+    Return the literal strings that every match of the regular expression
+    contains, which index lookups can use to narrow down the entities
+    before the regular expression is checked.
+
+    .. note::
+
+        Only literals at the top level of the pattern are found, so nothing
+        is found for patterns with alternatives at the top level.
+
+    :param pattern: Regular expression, or a compiled pattern.
+    :type pattern: :class:`str` or pattern
+    :param ignore_case: True if the pattern matches ignoring the case.
+    :type ignore_case: :class:`bool`
+    :returns: The literal prefix every matched string starts with, or
+        :obj:`None` if the pattern is not anchored at the start, the
+        literals every match contains, and True if they have to be compared
+        ignoring the case.
+    :rtype: :class:`tuple` (:class:`str` or :obj:`None`,
+        :class:`list` of :class:`str`, :class:`bool`)
+    """
+    compiled = compile_pattern(pattern, ignore_case)
+    parsed = sre_parse.parse(compiled.pattern, compiled.flags)
+    flags = compiled.flags | parsed.pattern.flags
+    char = unichr if isinstance(compiled.pattern, unicode) else chr
+
+    runs = []
+    run = []
+    anchored = False
+    for pos, (op, arg) in enumerate(parsed):
+        if op == sre_constants.LITERAL:
+            run.append(char(arg))
+            continue
+        if run:
+            runs.append("".join(run))
+            run = []
+        if pos == 0 and op == sre_constants.AT and arg in (
+                sre_constants.AT_BEGINNING,
+                sre_constants.AT_BEGINNING_STRING):
+            anchored = not flags & re.MULTILINE or (
+                arg == sre_constants.AT_BEGINNING_STRING
+            )
+    if run:
+        runs.append("".join(run))
+
+    prefix = None
+    if anchored and len(parsed) > 1:
+        if parsed[1][0] == sre_constants.LITERAL:
+            prefix = runs[0]
+    return prefix, runs, bool(flags & re.IGNORECASE)
+
+
+class PlanStep(namedtuple(
+        "PlanStep",
+        ["key", "operator", "value", "index", "estimate", "check"])):
+    """
+    A step in the plan used by :meth:`~.EntitySet.filter` to answer a single
+    filter condition, as returned by :meth:`~.EntitySet.explain`.
+
+    :param key: Property key.
+    :type key: :class:`str`
+    :param operator: Filter operator, :obj:`None` for equality.
+    :type operator: :class:`str` or :obj:`None`
+    :param value: Value the property is compared with.
+    :type value: Value
+    :param index: Kind of index the condition is looked up in, ``value``
+        for the equality value index or :obj:`None` if not looked up.
+    :type index: :class:`str` or :obj:`None`
+    :param estimate: Estimated number of entities matching the condition.
+    :type estimate: :class:`int`
+    :param check: True if each found entity is checked against the
+        condition.
+    :type check: :class:`bool`
+    """
+    __slots__ = ()
+
+
+class CompiledFilter(object):
+    """
+    Filter for a label and property keys, compiled once so that it can be
+    reused with different values without splitting the keys and looking up
+    the operators again.
+
+    .. note::
+
+        Use :func:`compile_filter` to get a cached compiled filter.
+
+    .. code-block:: python
+
+        >>> compiled = compile_filter("person", "name", "age__gt")
+        >>> is_old_marko = compiled.predicate(name="marko", age__gt=60)
+        >>> is_old_marko(Vertex("person", name="marko", age=29))
+        False
+
+    :param label: Label the entities should have. If :obj:`None`,
+        entities with any label match.
+    :type label: :class:`str` or :obj:`None`
+    :param keys: Property keys, with an optional operator suffix, as given
+        to :meth:`~.EntitySet.filter`.
+    :type keys: Iterable of :class:`str`
+    """
+    __slots__ = ["label", "keys", "_splits", "_positions", "_last"]
+
+    def __init__(self, label=None, keys=()):
+        self.label = label
+        self.keys = tuple(keys)
+        self._splits = tuple(
+            _split_key_into_noun_verb(key) for key in self.keys
+        )
+        self._positions = dict(
+            (key, pos) for pos, key in enumerate(self.keys)
+        )
+        self._last = None
+
+    def conditions(self, values):
+        """
+        Return the filter conditions for the values.
+
+        .. note::
+
+            The values of the ``in`` operator are turned into a
+            :class:`tuple`, so that any iterable can be used more than once.
+
+        :param values: Values in the same order as :attr:`keys`.
+        :type values: Iterable of values
+        :raises TypeError: If the value of the ``in`` operator is a string.
+        :returns: Property key, operator and value conditions.
+        :rtype: :class:`list` of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        """
+        return [
+            (key, verb, _in_values(value) if verb == "in" else value)
+            for (key, verb), value in zip(self._splits, values)
+        ]
+
+    def split(self, predicates):
+        """
+        Return the filter conditions for property key and value pairs given
+        in any order, using the compiled splits of the keys.
+
+        :param predicates: Property key and value pairs, with the same keys
+            as :attr:`keys`.
+        :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+        :raises TypeError: If the value of the ``in`` operator is a string.
+        :returns: Property key, operator and value conditions, in the order
+            of the pairs.
+        :rtype: :class:`list` of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        """
+        splits = self._splits
+        positions = self._positions
+        conditions = []
+        for key, value in predicates:
+            noun, verb = splits[positions[key]]
+            if verb == "in":
+                value = _in_values(value)
+            conditions.append((noun, verb, value))
+        return conditions
+
+    def checks(self, conditions):
+        """
+        Return the checks for the filter conditions, reusing the checks
+        compiled the last time if the conditions are the same.
+
+        :param conditions: Property key, operator and value conditions
+            returned by :meth:`split` or :meth:`conditions`.
+        :type conditions: :class:`list` of :class:`tuple`
+            (:class:`str`, :class:`str` or :obj:`None`, value)
+        :returns: Property key and check pairs.
+        :rtype: :class:`list` of :class:`tuple` (:class:`str`, callable)
+        """
+        # the value types are compared too, as 1 == 1.0 == True.
+        signature = [
+            (key, verb, type(value), value) for key, verb, value in conditions
+        ]
+        last = self._last
+        if last is not None:
+            try:
+                if last[0] == signature:
+                    return last[1]
+            except (TypeError, ValueError):
+                pass
+        checks = compile_checks(conditions)
+        self._last = (signature, checks)
+        return checks
+
+    def _predicates(self, kwargs):
+        """
+        Return the property key and value pairs in the order of the
+        :attr:`keys`.
+
+        :param kwargs: Value for each of the :attr:`keys`.
+        :type kwargs: :class:`dict`
+        :raises TypeError: If the keys do not match the compiled keys.
+        :rtype: :class:`list` of :class:`tuple` (:class:`str`, value)
+        """
+        if sorted(kwargs) != sorted(self.keys):
+            raise TypeError(
+                "Expected values for {0!r}, got {1!r}.".format(
+                    self.keys, tuple(kwargs)
+                )
+            )
+        return [(key, kwargs[key]) for key in self.keys]
+
+    def predicate(self, **kwargs):
+        """
+        Return a predicate checking if a entity matches the filter with the
+        given values.
+
+        :param kwargs: Value for each of the :attr:`keys`.
+        :type kwargs: key=value
+        :raises TypeError: If the keys do not match the compiled keys.
+        :returns: Callable taking a :class:`~.IEntity` and returning True
+            if it matches.
+        :rtype: callable
+        """
+        label = self.label
+        checks = self.checks(self.split(self._predicates(kwargs)))
+
+        def _predicate(entity):
+            if label is not None and entity.label != label:
+                return False
+            return match(entity, checks)
+        return _predicate
+
+    def filter(self, entity_set, **kwargs):
+        """
+        Filter the entity set with the given values.
+
+        .. note::
+
+            The entity sets split the keys and compile the checks through
+            the cache of :func:`compile_filter`, which is keyed by the label
+            and the property keys, so filtering reuses the splits and
+            checks of this compiled filter.
+
+        :param entity_set: Entity set being filtered.
+        :type entity_set: :class:`~.IEntitySet`
+        :param kwargs: Value for each of the :attr:`keys`.
+        :type kwargs: key=value
+        :raises TypeError: If the keys do not match the compiled keys.
+        :returns: Entities that matched the filter.
+        :rtype: :class:`~.IEntitySet`
+        """
+        self._predicates(kwargs)
+        return entity_set.filter(self.label, **kwargs)
+
+
+def compile_filter(label=None, *keys):
+    """
+    Return the compiled filter for the label and property keys, reusing a
+    previously compiled filter with the same label and keys, in any order.
+    The least recently used filters are dropped once more than
+    :data:`CACHE_SIZE` are cached.
+
+    :param label: Label the entities should have. If :obj:`None`,
+        entities with any label match.
+    :type label: :class:`str` or :obj:`None`
+    :param keys: Property keys, with an optional operator suffix, as given
+        to :meth:`~.EntitySet.filter`.
+    :type keys: :class:`str`
+    :returns: Compiled filter.
+    :rtype: :class:`~.CompiledFilter`
+    """
+    signature = (label, frozenset(keys))
+    compiled = _CACHE.pop(signature, None)
+    if compiled is None:
+        compiled = CompiledFilter(label, keys)
+        while len(_CACHE) >= CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    _CACHE[signature] = compiled
+    return compiled
+
+
+def split_predicates(predicates, label=None):
+    """
+    Split the filter predicates into conditions made of the property key,
+    operator and value, using the compiled filter cache.
+
+    :param predicates: Property key and value pairs as given to
+        :meth:`~.EntitySet.filter`.
+    :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+    :param label: Label the predicates are filtered with.
+    :type label: :class:`str` or :obj:`None`
+    :returns: Property key, operator and value conditions.
+    :rtype: :class:`list` of :class:`tuple`
+        (:class:`str`, :class:`str` or :obj:`None`, value)
+    """
+    predicates = list(predicates)
+    compiled = compile_filter(label, *[key for key, _ in predicates])
+    return compiled.split(predicates)
+
+
+def compile_predicates(predicates, label=None):
+    """
+    Compile the filter predicates into checks used by :func:`match`, using
+    the compiled filter cache.
+
+    :param predicates: Property key and value pairs as given to
+        :meth:`~.EntitySet.filter`.
+    :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+    :param label: Label the predicates are filtered with.
+    :type label: :class:`str` or :obj:`None`
+    :returns: Property key and check pairs.
+    :rtype: :class:`list` of :class:`tuple` (:class:`str`, callable)
+    """
+    predicates = list(predicates)
+    compiled = compile_filter(label, *[key for key, _ in predicates])
+    return compiled.checks(compiled.split(predicates))
+
+
+def scan_plan(size, predicates):
+    """
+    Return the plan for checking the filter predicates against every
+    entity.
+
+    :param size: Number of entities being checked.
+    :type size: :class:`int`
+    :param predicates: Property key and value pairs as given to
+        :meth:`~.EntitySet.filter`.
+    :type predicates: Iterable of :class:`tuple` (:class:`str`, value)
+    :returns: Plan steps.
+    :rtype: :class:`list` of :class:`~.PlanStep`
+    """
+    return [
+        PlanStep(key, verb, value, None, size, True)
+        for key, verb, value in split_predicates(predicates)
+    ]
+
+
+def merge_plans(plans):
+    """
+    Merge the plans of each label into a single plan for a filter without a
+    label.
+
+    The estimates of the same condition are added up, and the condition is
+    only shown as looked up in a index when every label used the same kind
+    of index for it.
+
+    :param plans: Plan for each label, all for the same conditions.
+    :type plans: Iterable of :class:`list` of :class:`~.PlanStep`
+    :returns: Merged plan steps ordered by their estimates.
+    :rtype: :class:`list` of :class:`~.PlanStep`
+    """
+    merged = OrderedDict()
+    for plan in plans:
+        for step in plan:
+            condition = (step.key, step.operator)
+            current = merged.get(condition)
+            if current is None:
+                merged[condition] = step
+                continue
+            if current.index != step.index:
+                current = current._replace(index=None, check=True)
+            merged[condition] = current._replace(
+                estimate=current.estimate + step.estimate,
+                check=current.check or step.check,
+            )
+
+    steps = merged.values()
+    steps.sort(key=lambda step: (step.index is None, step.estimate))
+    return steps
+
+
+def _compile_check(verb, value):
+    """
+    Internal helper function that binds the value to the operator,
+    returning a check for a property value.
+
+    .. note::
+
+        For the case insensitive operators the value is folded once, rather
+        than for every property value checked.
+
+    :param verb: Filter operator, :obj:`None` for equality.
+    :type verb: :class:`str` or :obj:`None`
+    :param value: Value the property is compared with.
+    :type value: Value
+    :returns: Callable taking a property value and returning True if it
+        satisfies the operator.
+    :rtype: callable
+    """
+    func = OPERATORS.get(verb)
+    if func is None:
+        return lambda prop_value: prop_value == value
+
+    if verb == "in":
+        try:
+            members = frozenset(value)
+        except TypeError:
+            members = list(value)
+        return lambda prop_value: _in(prop_value, members)
+
+    if verb in ("regex", "iregex"):
+        search = compile_pattern(value, verb == "iregex").search
+        return lambda prop_value: (
+            isinstance(prop_value, basestring) and
+            search(prop_value) is not None
+        )
+
+    icase = verb[0] == "i"
+    if icase and isinstance(value, basestring):
+        folded = value.lower()
+        return lambda prop_value: func(prop_value.lower(), folded, False)
+    return lambda prop_value: func(prop_value, value, icase)
+
+
+def compile_checks(conditions):
+    """
+    Compile the filter conditions into checks used by :func:`match`.
+
+    :param conditions: Property key, operator and value conditions.
+    :type conditions: Iterable of :class:`tuple`
+        (:class:`str`, :class:`str` or :obj:`None`, value)
+    :returns: Property key and check pairs.
+    :rtype: :class:`list` of :class:`tuple` (:class:`str`, callable)
+    """
+    return [
+        (key, _compile_check(verb, value))
+        for key, verb, value in conditions
+    ]
+
+
+def match(entity, checks):
+    """
+    Check if the entity properties satisfy all the compiled checks.
+
+    .. note::
+
+        Properties that are missing or :obj:`None` never match.
+
+    :param entity: Entity being checked.
+    :type entity: :class:`~.IEntity`
+    :param checks: Checks returned by :func:`compile_checks`.
+    :type checks: Iterable of :class:`tuple` (:class:`str`, callable)
+    :returns: True if all the checks are satisfied.
+    :rtype: :class:`bool`
+    """
+    return match_properties(entity.properties, checks)
+
+
+def match_properties(properties, checks):
+    """
+    Check if the properties satisfy all the compiled checks, for callers
+    which keep the properties apart from any entity.
+
+    :param properties: Properties being checked.
+    :type properties: :class:`dict`
+    :param checks: Checks returned by :func:`compile_checks`.
+    :type checks: Iterable of :class:`tuple` (:class:`str`, callable)
+    :returns: True if all the checks are satisfied.
+    :rtype: :class:`bool`
+    """
+    for key, check in checks:
+        prop_value = properties.get(key)
+        if prop_value is None or not check(prop_value):
+            return False
+    return True
@@ -1,12 +1,16 @@
 """
 Graph implementations
 """
-from collections import defaultdict
+from collections import Counter, defaultdict
+from itertools import islice
 import json
 import logging
 import os
 import shutil
 from ruruki import interfaces
+from ruruki.csr import CSRGraph
+from ruruki.interning import Interner
+from ruruki.layouts import LayoutTable
 from ruruki.locks import DirectoryLock
 from ruruki.entities import Vertex, Edge, PersistentVertex, PersistentEdge
 from ruruki.entities import EntitySet
@@ -174,16 +178,32 @@ class Graph(interfaces.IGraph):
     In-memory graph database.
 
     See :class:`~.IGraph` for doco.
+
+    .. note::
+
+        The labels and property keys of the vertices and edges added are
+        interned, so that all the entities share the same strings.
+
+    :param intern_values: Also intern the string values of each label and
+        property key, while they have at most this many distinct values.
+        If :obj:`None`, property values are not interned.
+    :type intern_values: :class:`int` or :obj:`None`
+    :param compact_properties: If True, the properties of the vertices and
+        edges added are replaced by :class:`~.CompactProperties`, which
+        share their keys with the entities that have the same keys.
+    :type compact_properties: :class:`bool`
     """
 
-    def __init__(self):
+    def __init__(self, intern_values=None, compact_properties=False):
         self._vclass = Vertex
         self._eclass = Edge
         self._id_tracker = IDGenerator()
+        self._interner = Interner(intern_values)
+        self._layouts = LayoutTable() if compact_properties else None
         self._vconstraints = defaultdict(dict)
         self._econstraints = defaultdict()
-        self.vertices = EntitySet()
-        self.edges = EntitySet()
+        self.vertices = EntitySet(bitmaps=True)
+        self.edges = EntitySet(bitmaps=True)
 
     def load(self, file_handler):
         vertex_id_mapping = {}
@@ -239,6 +259,14 @@ class Graph(interfaces.IGraph):
         json.dump(data, file_handler, indent=4, sort_keys=True)
 
     def add_vertex_constraint(self, label, key):
+        intern = self._interner.intern
+        label = intern(label)
+        if isinstance(key, (list, tuple)):
+            # composite constraints are checked with a composite index.
+            key = tuple(intern(each) for each in key)
+            self.vertices.add_index(label, key, "composite")
+        else:
+            key = intern(key)
         self._vconstraints[label][key] = set()
 
     def get_vertex_constraints(self):
@@ -248,6 +276,55 @@ class Graph(interfaces.IGraph):
                 constraints.append((label, key))
         return constraints
 
+    def get_vertex_stats(self, label, key, buckets=10):
+        return self.vertices.get_stats(label, key, buckets)
+
+    def get_edge_stats(self, label, key, buckets=10):
+        return self.edges.get_stats(label, key, buckets)
+
+    def get_degree_distribution(self, label=None, direction="out"):
+        if direction not in ("in", "out", "both"):
+            raise KeyError("Unsupported direction {0!r}.".format(direction))
+
+        # the edge sets of each vertex keep the edges of each label apart,
+        # so the degrees are read without looking at the edges.
+        distribution = Counter()
+        for vertex in self.vertices:
+            degree = 0
+            if direction != "out":
+                degree += vertex.in_edge_count(label)
+            if direction != "in":
+                degree += vertex.out_edge_count(label)
+            distribution[degree] += 1
+        return dict(distribution)
+
+    def to_csr(self, direction="out"):
+        codes = {}
+        edges = list(self.edges)
+        return CSRGraph.from_edges(
+            self,
+            (vertex.ident for vertex in self.vertices),
+            [edge.ident for edge in edges],
+            [edge.head.ident for edge in edges],
+            [edge.tail.ident for edge in edges],
+            [codes.setdefault(edge.label, len(codes)) for edge in edges],
+            sorted(codes, key=codes.get),
+            direction,
+        )
+
+    def _intern(self, entity):
+        """
+        Intern the label and properties of the entity being added, and
+        compact its properties if the graph does.
+
+        :param entity: Entity being added to the graph.
+        :type entity: :class:`~.IEntity`
+        """
+        entity.label = self._interner.intern(entity.label)
+        self._interner.intern_properties(entity.label, entity.properties)
+        if self._layouts is not None:
+            entity.properties = self._layouts.compact(entity.properties)
+
     def bind_to_graph(self, entity):
         if isinstance(entity, interfaces.IVertex):
             entity.ident = self._id_tracker.get_vertex_id()
@@ -266,6 +343,12 @@ class Graph(interfaces.IGraph):
         # first check constraints.
         if label in self._vconstraints:
             for key, collection in self._vconstraints[label].items():
+                if isinstance(key, tuple):
+                    vertex = self._composite_constrained(label, key, kwargs)
+                    if vertex is not None:
+                        return vertex
+                    continue
+
                 if key not in kwargs:
                     continue
 
@@ -273,14 +356,15 @@ class Graph(interfaces.IGraph):
                     if vertex.properties[key] == kwargs[key]:
                         return vertex
 
-        # no matches in constraints, so do a EntitySet filter
-        vertices = self.vertices.filter(label, **kwargs)
+        # no matches in constraints, so do a EntitySet filter, stopping as
+        # soon as a second vertex is found.
+        vertices = list(islice(self.vertices.ifilter(label, **kwargs), 2))
         if len(vertices) > 1:
             raise interfaces.MultipleFoundExpectedOne(
                 "Multiple vertices found when one expected."
             )
         elif len(vertices) == 1:
-            return vertices.all()[0]
+            return vertices[0]
 
         return self.add_vertex(label, **kwargs)
 
@@ -320,6 +404,7 @@ class Graph(interfaces.IGraph):
                 "Edge {} already has it identity number set.".format(edge)
             )
 
+        self._intern(edge)
         self._edge_constraint_violated(edge)
         self._econstraints[(head, edge.label, tail)] = edge
         self.bind_to_graph(edge)
@@ -343,7 +428,7 @@ class Graph(interfaces.IGraph):
                 "Vertex {} already has it identity number set.".format(vertex)
             )
 
-
+        self._intern(vertex)
         self._vertex_constraint_violated(vertex)
         if vertex.label in self._vconstraints:
             for key in self._vconstraints[vertex.label]:
@@ -378,6 +463,16 @@ class Graph(interfaces.IGraph):
         # first check the entity properties for constraint violations
         # Then check any additional properties for constraint violations.
         # Additional properties are for cases like `.set_property`
+        for keys in key_index:
+            if not isinstance(keys, tuple):
+                continue
+            properties = dict(vertex.properties, **kwargs)
+            found = self._composite_constrained(vertex.label, keys, properties)
+            if found is not None and found != vertex:
+                raise interfaces.ConstraintViolation(
+                    "{!r} violated constraint {!r}".format(vertex, keys)
+                )
+
         for props in [vertex.properties, kwargs]:
             for key, value in props.items():
                 if key not in key_index:
@@ -392,6 +487,27 @@ class Graph(interfaces.IGraph):
                                 )
                             )
 
+    def _composite_constrained(self, label, keys, properties):
+        """
+        Return the vertex holding the values of the properties for the keys
+        of a composite constraint.
+
+        :param label: Vertex label which the constraint is meant for.
+        :type label: :class:`str`
+        :param keys: Vertex property keys of the constraint.
+        :type keys: :class:`tuple` of :class:`str`
+        :param properties: Vertex properties being checked.
+        :type properties: :class:`dict`
+        :returns: Vertex holding the same values, or :obj:`None` if there is
+            no such vertex or some of the keys are missing.
+        :rtype: :class:`~.IVertex` or :obj:`None`
+        """
+        if not all(key in properties for key in keys):
+            return None
+        return self.vertices.first(
+            label, **dict((key, properties[key]) for key in keys)
+        )
+
     # todo: add in property constraint violation checks for edges
     def _edge_constraint_violated(self, edge):
         """
@@ -418,6 +534,7 @@ class Graph(interfaces.IGraph):
                 "Unknown entity {0!r}".format(entity)
             )
 
+        self._interner.intern_properties(entity.label, kwargs)
         if isinstance(entity, interfaces.IVertex):
             self._vertex_constraint_violated(entity, **kwargs)
             self.vertices.update_index(entity, **kwargs)
@@ -428,8 +545,31 @@ class Graph(interfaces.IGraph):
             # self._edge_constraint_violated(entity)
             self.edges.update_index(entity, **kwargs)
 
+            # the head and tail vertices keep their own edge indexes.
+            entity.head.out_edges.update_index(entity, **kwargs)
+            entity.tail.in_edges.update_index(entity, **kwargs)
+
         entity._update_properties(kwargs)  # pylint: disable=protected-access
 
+    def remove_property(self, entity, key):
+        if entity not in self:
+            raise interfaces.UnknownEntityError(
+                "Unknown entity {0!r}".format(entity)
+            )
+
+        if isinstance(entity, interfaces.IVertex):
+            constrained = self._vconstraints.get(entity.label, {}).get(key)
+            if constrained is not None:
+                constrained.discard(entity)
+            self.vertices.unindex(entity, key)
+
+        if isinstance(entity, interfaces.IEdge):
+            self.edges.unindex(entity, key)
+            entity.head.out_edges.unindex(entity, key)
+            entity.tail.in_edges.unindex(entity, key)
+
+        entity._remove_property(key)  # pylint: disable=protected-access
+
     def get_edge(self, id_num):
         return self.edges.get(id_num)
 
@@ -441,21 +581,60 @@ class Graph(interfaces.IGraph):
             return self.edges.filter(label, **kwargs)
 
         container = EntitySet()
-        for edge in self.edges.filter(label, **kwargs):
-            if head and tail is None:
-                if edge.head == head:
-                    container.add(edge)
-            elif tail and head is None:
-                if edge.tail == tail:
-                    container.add(edge)
-            else:
-                if edge.head == head and edge.tail == tail:
-                    container.add(edge)
+        exact = head is not None and tail is not None and label is not None
+        if exact and not kwargs:
+            # There can only a single edge between head and tail with a
+            # particular label, so look it up rather than scanning.
+            edge = self._econstraints.get((head, label, tail))
+            if edge is not None and edge in self.edges:
+                container.add(edge)
+            return container
+
+        # walk the smaller adjacency of the bound vertices, so that the
+        # cost follows their degree rather than the size of the graph.
+        by_head = tail is None or (
+            head is not None and
+            head.out_edges.count(label) <= tail.in_edges.count(label)
+        )
+        if by_head:
+            edges, other = head.out_edges, tail
+        else:
+            edges, other = tail.in_edges, head
+
+        for edge in edges.ifilter(label, **kwargs):
+            if edge not in self.edges:
+                continue
+            if other is None or (edge.tail if by_head else edge.head) == other:
+                container.add(edge)
         return container
 
     def get_vertices(self, label=None, **kwargs):
         return self.vertices.filter(label, **kwargs)
 
+    def iter_vertices(self, label=None, **kwargs):
+        return self.vertices.ifilter(label, **kwargs)
+
+    def first_vertex(self, label=None, **kwargs):
+        return self.vertices.first(label, **kwargs)
+
+    def vertex_exists(self, label=None, **kwargs):
+        return self.vertices.exists(label, **kwargs)
+
+    def count_vertices(self, label=None, **kwargs):
+        return self.vertices.count(label, **kwargs)
+
+    def iter_edges(self, label=None, **kwargs):
+        return self.edges.ifilter(label, **kwargs)
+
+    def first_edge(self, label=None, **kwargs):
+        return self.edges.first(label, **kwargs)
+
+    def edge_exists(self, label=None, **kwargs):
+        return self.edges.exists(label, **kwargs)
+
+    def count_edges(self, label=None, **kwargs):
+        return self.edges.count(label, **kwargs)
+
     def remove_edge(self, edge):
         edge.head.remove_edge(edge)
         edge.tail.remove_edge(edge)
@@ -538,11 +717,18 @@ class PersistentGraph(Graph):
         directories will be created.
     :type auto_create: :class:`bool`
     :type path: :class:`str`
+    :param intern_values: See :class:`~.Graph`.
+    :type intern_values: :class:`int` or :obj:`None`
+    :param compact_properties: See :class:`~.Graph`.
+    :type compact_properties: :class:`bool`
     :raises DatabasePathLocked: If the path is already locked by another
         persistence graph instance.
     """
-    def __init__(self, path, auto_create=True):
-        super(PersistentGraph, self).__init__()
+    def __init__(self, path, auto_create=True, intern_values=None,
+                 compact_properties=False):
+        super(PersistentGraph, self).__init__(
+            intern_values, compact_properties
+        )
         self._vclass = PersistentVertex
         self._eclass = PersistentEdge
 
@@ -735,7 +921,7 @@ class PersistentGraph(Graph):
         os.makedirs(os.path.join(vertex.path, "out-edges"))
 
         with open(os.path.join(vertex.path, "properties.json"), "w") as fh:
-            json.dump(vertex.properties, fh)
+            json.dump(dict(vertex.properties), fh)
 
         return vertex
 
@@ -755,7 +941,7 @@ class PersistentGraph(Graph):
         os.makedirs(tail_path)
 
         with open(os.path.join(edge.path, "properties.json"), "w") as fh:
-            json.dump(edge.properties, fh)
+            json.dump(dict(edge.properties), fh)
 
         os.symlink(head.path, os.path.join(head_path, str(head.ident)))
         os.symlink(tail.path, os.path.join(tail_path, str(tail.ident)))
@@ -0,0 +1,330 @@
+"""
+Handles on the vertices and edges of a :class:`~.ArrayGraph`.
+
+A handle only keeps the graph and the identity number of the entity, and
+reads everything else from the arrays of the graph, so it costs the same
+few bytes whatever the degree of the vertex or the properties of the
+entity.
+"""
+# the handles read the arrays of the graph they belong to.
+# pylint: disable=protected-access
+import abc
+from ruruki import interfaces
+
+
+def is_live(code):
+    """
+    Return :obj:`True` if the label code of a entity shows that it was not
+    removed.
+
+    .. note::
+
+        Removed entities keep their label as the complement of its code,
+        so that the handles still held can show it.
+
+    :param code: Label code of the entity.
+    :type code: :class:`int`
+    :rtype: :class:`bool`
+    """
+    return code >= 0
+
+
+class ArrayEntity(interfaces.IEntity):
+    """
+    Handle on a vertex or edge of a :class:`~.ArrayGraph`, which only keeps
+    the graph and the identity number of the entity.
+
+    .. note::
+
+        See :class:`~.IEntity` for doco.
+
+    .. note::
+
+        The properties can be accessed as if they are attributes
+        directly by prepending ``prop__`` to the key.
+
+    :param graph: Graph holding the entity.
+    :type graph: :class:`~.ArrayGraph`
+    :param ident: Identity number of the entity.
+    :type ident: :class:`int`
+    """
+    __slots__ = ["graph", "ident", "__weakref__"]
+
+    def __init__(self, graph, ident):
+        self.graph = graph
+        self.ident = ident
+
+    @abc.abstractmethod
+    def _table(self):
+        """
+        Return the table of the graph holding this kind of entity.
+
+        :rtype: :class:`~._Table`
+        """
+
+    @property
+    def label(self):
+        """
+        Label of the entity.
+
+        :rtype: :class:`str` or :obj:`None`
+        """
+        code = self._table().labels[self.ident]
+        return self.graph._labels[code if is_live(code) else ~code]
+
+    @property
+    def properties(self):
+        """
+        Properties of the entity.
+
+        .. note::
+
+            Changing the properties directly does not check the vertex
+            constraints, use :meth:`set_property` instead.
+
+        :rtype: :class:`~.CompactProperties`
+        """
+        table = self._table()
+        properties = table.properties[self.ident]
+        if properties is None:
+            properties = self.graph._layouts.compact({})
+            table.properties[self.ident] = properties
+        return properties
+
+    def is_bound(self):
+        return True
+
+    def remove_property(self, key):
+        self.graph._remove_property(self._table(), self.ident, key)
+
+    def set_property(self, **kwargs):
+        if not kwargs:
+            raise interfaces.EntityUpdateError(
+                "Can not update with no key and values."
+            )
+        self.graph.set_property(self, **kwargs)
+
+    def as_dict(self, include_privates=False):
+        properties = self._table().properties[self.ident] or {}
+        return {
+            "metadata": {},
+            "id": self.ident,
+            "label": self.label,
+            "properties": dict(
+                (key, value)
+                for key, value in properties.iteritems()
+                if include_privates is True or not key.startswith("_")
+            ),
+        }
+
+    def __getattr__(self, name):
+        # only called for the names which are not attributes.
+        if name.startswith("prop__"):
+            _, key = name.split("prop__", 1)
+            properties = self._table().properties[self.ident]
+            if properties is not None and key in properties:
+                return properties[key]
+        raise AttributeError(
+            "{0!r} object has no attribute {1!r}".format(
+                self.__class__.__name__, name
+            )
+        )
+
+    def __str__(self):
+        return "<{0}> {1}".format(self.__class__.__name__, self.ident)
+
+    def __repr__(self):  # pragma: no cover
+        return "<{0}> ident: {1}, label: {2}, properties: {3}".format(
+            self.__class__.__name__, self.ident, self.label,
+            self._table().properties[self.ident]
+        )
+
+
+class ArrayVertex(interfaces.IVertex, ArrayEntity):
+    """
+    Handle on a vertex of a :class:`~.ArrayGraph`.
+
+    .. note::
+
+        See :class:`~.IVertex` for doco.
+
+    .. note::
+
+        Removing a edge from the vertex removes it from the graph, as the
+        vertex does not keep edges of its own.
+    """
+    __slots__ = []
+
+    def _table(self):
+        return self.graph._vertices
+
+    @property
+    def in_edges(self):
+        """
+        Edges coming into the vertex.
+
+        :rtype: :class:`~.EntitySet`
+        """
+        return self.get_in_edges()
+
+    @property
+    def out_edges(self):
+        """
+        Edges going out of the vertex.
+
+        :rtype: :class:`~.EntitySet`
+        """
+        return self.get_out_edges()
+
+    def in_edge_count(self, label=None):
+        return self._degree(self.graph._in, self.graph._in_counts, label)
+
+    def out_edge_count(self, label=None):
+        return self._degree(self.graph._out, self.graph._out_counts, label)
+
+    def _degree(self, adjacency, counts, label):
+        """
+        Return the number of edges of the vertex with the label.
+
+        :param adjacency: Adjacency of the graph, per vertex.
+        :type adjacency: :class:`list`
+        :param counts: Number of edges per vertex, for each edge label
+            code.
+        :type counts: :class:`dict` of :class:`int` to :class:`array`
+        :param label: Edge label, or :obj:`None` to count all the edges.
+        :type label: :class:`str` or :obj:`None`
+        :rtype: :class:`int`
+        """
+        if label is None:
+            return len(adjacency[self.ident] or ())
+        column = counts.get(self.graph._codes.get(label), ())
+        if self.ident < len(column):
+            return column[self.ident]
+        return 0
+
+    def add_in_edge(self, vertex, label=None, **kwargs):
+        return self.graph.add_edge(vertex, label, self, **kwargs)
+
+    def add_out_edge(self, vertex, label=None, **kwargs):
+        return self.graph.add_edge(self, label, vertex, **kwargs)
+
+    def remove_edge(self, edge):
+        if edge.head != self and edge.tail != self:
+            raise interfaces.VertexError(
+                "Unknown edge to this vertex: {}".format(edge)
+            )
+        self.graph.remove_edge(edge)
+
+    def get_in_edges(self, label=None, **kwargs):
+        return self.graph._edge_set(self.graph._in[self.ident], label, kwargs)
+
+    def get_out_edges(self, label=None, **kwargs):
+        return self.graph._edge_set(
+            self.graph._out[self.ident], label, kwargs
+        )
+
+    def get_both_edges(self, label=None, **kwargs):
+        graph = self.graph
+        idents = sorted(
+            set(graph._in[self.ident] or ()) |
+            set(graph._out[self.ident] or ())
+        )
+        return graph._edge_set(idents, label, kwargs)
+
+    def _far_ends(self, adjacency, ends, edge_label):
+        """
+        Return the identity numbers of the vertices at the far end of the
+        edges of the vertex.
+
+        :param adjacency: Adjacency of the graph, per vertex.
+        :type adjacency: :class:`list`
+        :param ends: Head or tail vertex identity numbers, per edge.
+        :type ends: :class:`array.array`
+        :param edge_label: Only follow the edges with this label, or all
+            the edges if :obj:`None`.
+        :type edge_label: :class:`str` or :obj:`None`
+        :rtype: Iterable of :class:`int`
+        """
+        graph = self.graph
+        edges = graph._select(
+            graph._edges, adjacency[self.ident] or (), edge_label, {}
+        )
+        return (ends[each] for each in edges)
+
+    def get_in_vertices(self, label=None, edge_label=None, **kwargs):
+        return self.graph._vertex_set(
+            self._far_ends(self.graph._in, self.graph._heads, edge_label),
+            label, kwargs
+        )
+
+    def get_out_vertices(self, label=None, edge_label=None, **kwargs):
+        return self.graph._vertex_set(
+            self._far_ends(self.graph._out, self.graph._tails, edge_label),
+            label, kwargs
+        )
+
+    def get_both_vertices(self, label=None, edge_label=None, **kwargs):
+        graph = self.graph
+        idents = list(self._far_ends(graph._in, graph._heads, edge_label))
+        idents.extend(self._far_ends(graph._out, graph._tails, edge_label))
+        return graph._vertex_set(idents, label, kwargs)
+
+    def as_dict(self, include_privates=False):
+        as_dict = super(ArrayVertex, self).as_dict(include_privates)
+        as_dict["metadata"].update(
+            {
+                "in_edge_count": self.in_edge_count(),
+                "out_edge_count": self.out_edge_count(),
+            }
+        )
+        return as_dict
+
+
+class ArrayEdge(interfaces.IEdge, ArrayEntity):
+    """
+    Handle on a edge of a :class:`~.ArrayGraph`.
+
+    .. note::
+
+        See :class:`~.IEdge` for doco.
+    """
+    __slots__ = []
+
+    def _table(self):
+        return self.graph._edges
+
+    @property
+    def head(self):
+        """
+        Head vertex of the edge.
+
+        :rtype: :class:`ArrayVertex`
+        """
+        return self.graph._vertex(self.graph._heads[self.ident])
+
+    @property
+    def tail(self):
+        """
+        Tail vertex of the edge.
+
+        :rtype: :class:`ArrayVertex`
+        """
+        return self.graph._vertex(self.graph._tails[self.ident])
+
+    def get_in_vertex(self):
+        return self.head
+
+    def get_out_vertex(self):
+        return self.tail
+
+    def as_dict(self, include_privates=False):
+        as_dict = super(ArrayEdge, self).as_dict(include_privates)
+        as_dict["head_id"] = self.graph._heads[self.ident]
+        as_dict["tail_id"] = self.graph._tails[self.ident]
+        return as_dict
+
+    def __str__(self):  # pragma: no cover
+        return "<{0}> ident: {1} [{3}-{2}-{4}]".format(
+            self.__class__.__name__, self.ident, self.label,
+            self.graph._heads[self.ident], self.graph._tails[self.ident]
+        )
@@ -0,0 +1,1097 @@
+"""
+Property indexes used by :class:`~.EntitySet` to answer filter operators
+without scanning every entity.
+
+Each index covers a single label and property key, and lists the filter
+``operators`` it can look up. The entities found for the ``exact``
+operators match the filter, while for the other operators they are
+candidates which still need to be checked.
+"""
+import bisect
+import sys
+from collections import namedtuple
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from ruruki.filters import OPERATORS
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # pylint: disable=invalid-name
+
+
+def _next_prefix(prefix):
+    """
+    Internal helper function that returns the smallest string which is
+    larger than all the strings starting with the prefix.
+
+    :param prefix: Prefix of the strings.
+    :type prefix: :class:`str` or :class:`unicode`
+    :returns: Next prefix, or :obj:`None` if the strings starting with the
+        prefix are the largest strings.
+    :rtype: :class:`str` or :class:`unicode` or :obj:`None`
+    """
+    if isinstance(prefix, unicode):
+        to_char, largest = unichr, sys.maxunicode
+    else:
+        to_char, largest = chr, 255
+    while prefix:
+        code = ord(prefix[-1])
+        if code < largest:
+            return prefix[:-1] + to_char(code + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+class SortedIndex(object):
+    """
+    Ordered index over the values of a single property key, which answers
+    the ``__lt``, ``__le``, ``__gt`` and ``__ge`` filter operators with a
+    bisect.
+
+    .. note::
+
+        Properties with a :obj:`None` value are not indexed because they
+        never match a filter.
+    """
+    operators = frozenset(["lt", "le", "gt", "ge"])
+    exact = operators
+
+    def __init__(self):
+        self._values = []
+        self._entities = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, entity, value):
+        """
+        Add the entity to the index.
+
+        :param entity: Entity being indexed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value of the indexed property.
+        :type value: Comparable value.
+        """
+        if value is None:
+            return
+        pos = bisect.bisect_right(self._values, value)
+        self._values.insert(pos, value)
+        self._entities.insert(pos, entity)
+
+    def build(self, pairs):
+        """
+        Add many entities to the index at once, sorting all the values
+        once instead of inserting them one at a time.
+
+        :param pairs: Entities being indexed and the values of their
+            indexed property.
+        :type pairs: Iterable of :class:`tuple` (:class:`~.IEntity`,
+            value)
+        """
+        pairs = [(value, entity) for entity, value in pairs
+                 if value is not None]
+        if not pairs:
+            return
+        # the sort is stable, so equal values keep the order they are
+        # added in, like :meth:`add` does.
+        pairs[:0] = zip(self._values, self._entities)
+        pairs.sort(key=itemgetter(0))
+        self._values = [value for value, _ in pairs]
+        self._entities = [entity for _, entity in pairs]
+
+    def remove(self, entity, value):
+        """
+        Remove the entity from the index.
+
+        :param entity: Entity being removed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value the entity was indexed with.
+        :type value: Comparable value.
+        """
+        if value is None:
+            return
+        start = bisect.bisect_left(self._values, value)
+        end = bisect.bisect_right(self._values, value, start)
+        for pos in xrange(start, end):
+            if self._entities[pos] is entity:
+                del self._values[pos]
+                del self._entities[pos]
+                return
+
+    def _bounds(self, verb, value):
+        """
+        Return the slice of the sorted values which satisfy the filter
+        operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: Comparable value.
+        :returns: Start and end position of the slice.
+        :rtype: :class:`tuple` (:class:`int`, :class:`int`)
+        """
+        values = self._values
+        if verb == "lt":
+            return 0, bisect.bisect_left(values, value)
+        if verb == "le":
+            return 0, bisect.bisect_right(values, value)
+        if verb == "gt":
+            return bisect.bisect_right(values, value), len(values)
+        if verb == "ge":
+            return bisect.bisect_left(values, value), len(values)
+        raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+    def _prefix_bounds(self, prefix):
+        """
+        Return the slice of the sorted values which start with the prefix.
+
+        :param prefix: Prefix of the indexed string values.
+        :type prefix: :class:`str`
+        :returns: Start and end position of the slice.
+        :rtype: :class:`tuple` (:class:`int`, :class:`int`)
+        """
+        # values sharing a prefix are adjacent in sorted order, and end
+        # before the first value not smaller than the next prefix.
+        values = self._values
+        start = bisect.bisect_left(values, prefix)
+        upper = _next_prefix(prefix)
+        if upper is None:
+            return start, len(values)
+        return start, bisect.bisect_left(values, upper, start)
+
+    def estimate(self, verb, value):
+        """
+        Return the number of entities that satisfy the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: Comparable value.
+        :returns: Number of entities matching the operator.
+        :rtype: :class:`int`
+        """
+        start, end = self._bounds(verb, value)
+        return end - start
+
+    def lookup(self, verb, value):
+        """
+        Return all the entities that satisfy the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: Comparable value.
+        :returns: Entities matching the operator.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        start, end = self._bounds(verb, value)
+        return set(self._entities[start:end])
+
+    def count_prefix(self, prefix):
+        """
+        Return the number of entities which have a indexed value starting
+        with the prefix.
+
+        :param prefix: Prefix of the indexed string values.
+        :type prefix: :class:`str`
+        :returns: Number of entities with values starting with the prefix.
+        :rtype: :class:`int`
+        """
+        start, end = self._prefix_bounds(prefix)
+        return end - start
+
+    def lookup_prefix(self, prefix):
+        """
+        Return all the entities which have a indexed value starting with
+        the prefix.
+
+        :param prefix: Prefix of the indexed string values.
+        :type prefix: :class:`str`
+        :returns: Entities with values starting with the prefix.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        start, end = self._prefix_bounds(prefix)
+        return set(self._entities[start:end])
+
+    def ordered(self, reverse=False, start=None):
+        """
+        Iterate over the indexed entities in value order, ordering the
+        entities with the same value by their :attr:`~.IEntity.ident`.
+
+        :param reverse: True to iterate from the largest value down.
+        :type reverse: :class:`bool`
+        :param start: Value to start from, skipping the smaller values, or
+            the larger ones if reversed.
+        :type start: Comparable value or :obj:`None`
+        :returns: Values and the entities that have them.
+        :rtype: Iterable of :class:`tuple` (value, :class:`~.IEntity`)
+        """
+        values = self._values
+        entities = self._entities
+        if reverse:
+            end = len(values)
+            if start is not None:
+                end = bisect.bisect_right(values, start)
+            positions = xrange(end - 1, -1, -1)
+        else:
+            begin = 0
+            if start is not None:
+                begin = bisect.bisect_left(values, start)
+            positions = xrange(begin, len(values))
+
+        for value, run in groupby(positions, values.__getitem__):
+            same = sorted(
+                (entities[pos] for pos in run),
+                key=attrgetter("ident"),
+                reverse=reverse,
+            )
+            for entity in same:
+                yield value, entity
+
+
+class PrefixIndex(object):
+    """
+    Sorted string index over the values of a single property key, which
+    answers the ``__startswith`` and ``__istartswith`` filter operators.
+    A case folded copy of each value is kept for the case insensitive
+    operator.
+
+    .. note::
+
+        Only string values are indexed.
+    """
+    operators = frozenset(["startswith", "istartswith"])
+    exact = operators
+
+    def __init__(self):
+        self._exact = SortedIndex()
+        self._folded = SortedIndex()
+
+    def __len__(self):
+        return len(self._exact)
+
+    def add(self, entity, value):
+        """
+        Add the entity to the index.
+
+        :param entity: Entity being indexed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value of the indexed property.
+        :type value: :class:`str`
+        """
+        if isinstance(value, basestring):
+            self._exact.add(entity, value)
+            self._folded.add(entity, value.lower())
+
+    def build(self, pairs):
+        """
+        Add many entities to the index at once, sorting the values once.
+
+        :param pairs: Entities being indexed and the values of their
+            indexed property.
+        :type pairs: Iterable of :class:`tuple` (:class:`~.IEntity`,
+            :class:`str`)
+        """
+        pairs = [(entity, value) for entity, value in pairs
+                 if isinstance(value, basestring)]
+        self._exact.build(pairs)
+        self._folded.build(
+            (entity, value.lower()) for entity, value in pairs
+        )
+
+    def remove(self, entity, value):
+        """
+        Remove the entity from the index.
+
+        :param entity: Entity being removed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value the entity was indexed with.
+        :type value: :class:`str`
+        """
+        if isinstance(value, basestring):
+            self._exact.remove(entity, value)
+            self._folded.remove(entity, value.lower())
+
+    def lookup(self, verb, value):
+        """
+        Return all the entities that satisfy the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Prefix the indexed property should start with.
+        :type value: :class:`str`
+        :returns: Entities matching the operator.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        if verb == "startswith":
+            return self._exact.lookup_prefix(value)
+        if verb == "istartswith":
+            return self._folded.lookup_prefix(value.lower())
+        raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+    def estimate(self, verb, value):
+        """
+        Return the number of entities that satisfy the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Prefix the indexed property should start with.
+        :type value: :class:`str`
+        :returns: Number of entities matching the operator.
+        :rtype: :class:`int`
+        """
+        if verb == "startswith":
+            return self._exact.count_prefix(value)
+        if verb == "istartswith":
+            return self._folded.count_prefix(value.lower())
+        raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+
+def _trigrams(value):
+    """
+    Internal helper function that returns the case folded trigrams of a
+    string.
+
+    :param value: String value being split into trigrams.
+    :type value: :class:`str`
+    :returns: Distinct trigrams of the string.
+    :rtype: :class:`set` of :class:`str`
+    """
+    value = value.lower()
+    return set(value[pos:pos + 3] for pos in xrange(len(value) - 2))
+
+
+class TrigramIndex(object):
+    """
+    Inverted trigram index over the values of a single property key, which
+    narrows down the candidates for the ``__contains`` and ``__icontains``
+    filter operators to the entities containing every trigram of the
+    searched value.
+
+    .. note::
+
+        Trigrams are case folded, so the candidates are a superset of the
+        matches and still need the exact check. Searched values shorter
+        than three characters can not be narrowed down.
+
+    .. note::
+
+        Only string values are indexed.
+    """
+    operators = frozenset(["contains", "icontains"])
+    exact = frozenset()
+
+    def __init__(self):
+        self._postings = {}
+
+    def add(self, entity, value):
+        """
+        Add the entity to the index.
+
+        :param entity: Entity being indexed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value of the indexed property.
+        :type value: :class:`str`
+        """
+        if isinstance(value, basestring):
+            for trigram in _trigrams(value):
+                self._postings.setdefault(trigram, set()).add(entity)
+
+    def build(self, pairs):
+        """
+        Add many entities to the index at once.
+
+        :param pairs: Entities being indexed and the values of their
+            indexed property.
+        :type pairs: Iterable of :class:`tuple` (:class:`~.IEntity`,
+            :class:`str`)
+        """
+        for entity, value in pairs:
+            self.add(entity, value)
+
+    def remove(self, entity, value):
+        """
+        Remove the entity from the index.
+
+        :param entity: Entity being removed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value the entity was indexed with.
+        :type value: :class:`str`
+        """
+        if isinstance(value, basestring):
+            for trigram in _trigrams(value):
+                posting = self._postings.get(trigram)
+                if posting is not None:
+                    posting.discard(entity)
+                    if not posting:
+                        del self._postings[trigram]
+
+    def lookup(self, verb, value):
+        """
+        Return the candidate entities for the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property should contain.
+        :type value: :class:`str`
+        :returns: Candidate entities which contain all the trigrams of the
+            value, or :obj:`None` if the value is too short to narrow down
+            the candidates.
+        :rtype: :class:`set` of :class:`~.IEntity` or :obj:`None`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+        trigrams = _trigrams(value)
+        if not trigrams:
+            return None
+
+        # intersect starting from the rarest trigram to keep it cheap.
+        postings = sorted(
+            (self._postings.get(trigram, set()) for trigram in trigrams),
+            key=len
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return candidates
+
+    def estimate(self, verb, value):
+        """
+        Return the upper bound of the number of candidate entities for the
+        filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property should contain.
+        :type value: :class:`str`
+        :returns: Size of the rarest trigram posting, or :obj:`None` if the
+            value is too short to narrow down the candidates.
+        :rtype: :class:`int` or :obj:`None`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+        trigrams = _trigrams(value)
+        if not trigrams:
+            return None
+        return min(
+            len(self._postings.get(trigram, ())) for trigram in trigrams
+        )
+
+
+class CaseFoldIndex(object):
+    """
+    Case folded shadow index over the string values of a single property
+    key, so that case insensitive filter operators do not need to fold
+    every stored value on every query.
+
+    The folded values are kept in a hash index answering ``__ieq`` and
+    ``__ine``, and reversed in a sorted index answering ``__iendswith``.
+    The reversed values also narrow down ``__endswith`` to the entities
+    which end with the value ignoring case.
+
+    .. note::
+
+        Only string values are indexed.
+    """
+    operators = frozenset(["ieq", "ine", "iendswith", "endswith"])
+    exact = frozenset(["ieq", "ine", "iendswith"])
+
+    def __init__(self):
+        self._entities = set()
+        self._folded = {}
+        self._reversed = SortedIndex()
+
+    def __len__(self):
+        return len(self._entities)
+
+    def add(self, entity, value):
+        """
+        Add the entity to the index.
+
+        :param entity: Entity being indexed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value of the indexed property.
+        :type value: :class:`str`
+        """
+        if isinstance(value, basestring):
+            folded = value.lower()
+            self._entities.add(entity)
+            self._folded.setdefault(folded, set()).add(entity)
+            self._reversed.add(entity, folded[::-1])
+
+    def build(self, pairs):
+        """
+        Add many entities to the index at once, sorting the reversed values
+        once.
+
+        :param pairs: Entities being indexed and the values of their
+            indexed property.
+        :type pairs: Iterable of :class:`tuple` (:class:`~.IEntity`,
+            :class:`str`)
+        """
+        reversed_pairs = []
+        for entity, value in pairs:
+            if isinstance(value, basestring):
+                folded = value.lower()
+                self._entities.add(entity)
+                self._folded.setdefault(folded, set()).add(entity)
+                reversed_pairs.append((entity, folded[::-1]))
+        self._reversed.build(reversed_pairs)
+
+    def remove(self, entity, value):
+        """
+        Remove the entity from the index.
+
+        :param entity: Entity being removed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value the entity was indexed with.
+        :type value: :class:`str`
+        """
+        if isinstance(value, basestring):
+            folded = value.lower()
+            self._entities.discard(entity)
+            bucket = self._folded.get(folded)
+            if bucket is not None:
+                bucket.discard(entity)
+                if not bucket:
+                    del self._folded[folded]
+            self._reversed.remove(entity, folded[::-1])
+
+    def lookup(self, verb, value):
+        """
+        Return all the entities that satisfy the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: :class:`str`
+        :returns: Entities matching the operator.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+        folded = value.lower()
+        if verb == "ieq":
+            return set(self._folded.get(folded, ()))
+        if verb == "ine":
+            return self._entities - self._folded.get(folded, set())
+        return self._reversed.lookup_prefix(folded[::-1])
+
+    def estimate(self, verb, value):
+        """
+        Return the number of entities that satisfy the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: :class:`str`
+        :returns: Number of entities matching the operator.
+        :rtype: :class:`int`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+
+        folded = value.lower()
+        if verb == "ieq":
+            return len(self._folded.get(folded, ()))
+        if verb == "ine":
+            return len(self._entities) - len(self._folded.get(folded, ()))
+        return self._reversed.count_prefix(folded[::-1])
+
+
+class CompositeIndex(object):
+    """
+    Hash index over the values of several property keys together, which
+    answers filters comparing all the keys for equality with a single
+    lookup.
+
+    The index is looked up with the ``eq`` operator and a :class:`tuple`
+    of values, in the same order as the indexed keys.
+
+    .. note::
+
+        Entities with a :obj:`None` or unhashable value for any of the keys
+        are not indexed.
+    """
+    operators = frozenset(["eq"])
+    exact = operators
+
+    def __init__(self):
+        self._buckets = {}
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.itervalues())
+
+    def add(self, entity, values):
+        """
+        Add the entity to the index.
+
+        :param entity: Entity being indexed.
+        :type entity: :class:`~.IEntity`
+        :param values: Values of the indexed properties.
+        :type values: :class:`tuple`
+        """
+        if None in values:
+            return
+        try:
+            self._buckets.setdefault(values, set()).add(entity)
+        except TypeError:
+            pass
+
+    def build(self, pairs):
+        """
+        Add many entities to the index at once.
+
+        :param pairs: Entities being indexed and the values of their
+            indexed properties.
+        :type pairs: Iterable of :class:`tuple` (:class:`~.IEntity`,
+            :class:`tuple`)
+        """
+        for entity, values in pairs:
+            self.add(entity, values)
+
+    def remove(self, entity, values):
+        """
+        Remove the entity from the index.
+
+        :param entity: Entity being removed.
+        :type entity: :class:`~.IEntity`
+        :param values: Values the entity was indexed with.
+        :type values: :class:`tuple`
+        """
+        try:
+            bucket = self._buckets.get(values)
+        except TypeError:
+            return
+        if bucket is not None:
+            bucket.discard(entity)
+            if not bucket:
+                del self._buckets[values]
+
+    def distinct(self):
+        """
+        Return the number of distinct combinations of values indexed.
+
+        :returns: Number of distinct combinations.
+        :rtype: :class:`int`
+        """
+        return len(self._buckets)
+
+    def lookup(self, verb, values):
+        """
+        Return all the entities that have the given values.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param values: Values the indexed properties are compared with.
+        :type values: :class:`tuple`
+        :returns: Entities matching the values, or :obj:`None` if the
+            values are unhashable.
+        :rtype: :class:`set` of :class:`~.IEntity` or :obj:`None`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+        try:
+            return set(self._buckets.get(values, ()))
+        except TypeError:
+            return None
+
+    def estimate(self, verb, values):
+        """
+        Return the number of entities that have the given values.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param values: Values the indexed properties are compared with.
+        :type values: :class:`tuple`
+        :returns: Number of entities matching the values, or :obj:`None` if
+            the values are unhashable.
+        :rtype: :class:`int` or :obj:`None`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+        try:
+            return len(self._buckets.get(values, ()))
+        except TypeError:
+            return None
+
+
+class ColumnIndex(object):
+    """
+    Columnar index over the numeric values of a single property key, kept
+    in a NumPy array at the position given by the :attr:`~.IEntity.ident`
+    of each entity, which answers the comparison operators with vectorized
+    comparisons.
+
+    Columns of the same entity set are aligned on the identity numbers, so
+    the masks of several columns can be combined and used to select values
+    from another column, see :meth:`~.EntitySet.aggregate`.
+
+    .. note::
+
+        This index is only available when NumPy is installed. Values which
+        are not numbers, or too large to be kept exactly as a float, and
+        entities without a integer ident are kept aside and checked one at
+        a time. Properties with a :obj:`None` value are not indexed.
+    """
+    operators = frozenset(["eq", "ne", "lt", "le", "gt", "ge"])
+    exact = operators
+
+    # largest integer that a float holds exactly.
+    _EXACT = 2 ** 53
+
+    _COMPARISONS = {
+        "eq": "equal",
+        "ne": "not_equal",
+        "lt": "less",
+        "le": "less_equal",
+        "gt": "greater",
+        "ge": "greater_equal",
+    }
+
+    def __init__(self):
+        self._values = numpy.zeros(0)
+        self._present = numpy.zeros(0, dtype=bool)
+        self._entities = []
+        self._count = 0
+        self._others = {}
+
+    def __len__(self):
+        return self._count + len(self._others)
+
+    @property
+    def complete(self):
+        """
+        True if all the indexed values are in the column, so that
+        :meth:`mask` and :meth:`values` cover every indexed entity.
+
+        :rtype: :class:`bool`
+        """
+        return not self._others
+
+    def _position(self, entity, value):
+        """
+        Return the position of the entity in the column, or :obj:`None` if
+        the entity and value have to be kept aside.
+        """
+        ident = entity.ident
+        if not isinstance(ident, (int, long)) or isinstance(ident, bool):
+            return None
+        if ident < 0 or not self._in_column(value):
+            return None
+        return ident
+
+    @classmethod
+    def _in_column(cls, value):
+        """
+        Return :obj:`True` if the value is a number which the float column
+        holds, and compares with, exactly.
+        """
+        if not _is_number(value):
+            return False
+        return isinstance(value, float) or abs(value) <= cls._EXACT
+
+    def _grow(self, size):
+        """
+        Grow the column to hold at least the given number of positions.
+
+        :param size: Number of positions needed.
+        :type size: :class:`int`
+        """
+        size = max(size, 2 * len(self._values))
+        values = numpy.zeros(size)
+        values[:len(self._values)] = self._values
+        present = numpy.zeros(size, dtype=bool)
+        present[:len(self._present)] = self._present
+        self._entities.extend([None] * (size - len(self._entities)))
+        self._values = values
+        self._present = present
+
+    def add(self, entity, value):
+        """
+        Add the entity to the index.
+
+        :param entity: Entity being indexed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value of the indexed property.
+        :type value: Number, or any comparable value.
+        """
+        if value is None:
+            return
+        pos = self._position(entity, value)
+        if pos is None:
+            self._others[entity] = value
+            return
+        if pos >= len(self._values):
+            self._grow(pos + 1)
+        if not self._present[pos]:
+            self._count += 1
+        self._values[pos] = value
+        self._present[pos] = True
+        self._entities[pos] = entity
+
+    def build(self, pairs):
+        """
+        Add many entities to the index at once.
+
+        :param pairs: Entities being indexed and the values of their
+            indexed property.
+        :type pairs: Iterable of :class:`tuple` (:class:`~.IEntity`,
+            number)
+        """
+        for entity, value in pairs:
+            self.add(entity, value)
+
+    def remove(self, entity, value):
+        """
+        Remove the entity from the index.
+
+        :param entity: Entity being removed.
+        :type entity: :class:`~.IEntity`
+        :param value: Value the entity was indexed with.
+        :type value: Number, or any comparable value.
+        """
+        if value is None:
+            return
+        pos = self._position(entity, value)
+        if pos is None:
+            self._others.pop(entity, None)
+            return
+        if pos < len(self._values) and self._entities[pos] is entity:
+            self._present[pos] = False
+            self._entities[pos] = None
+            self._count -= 1
+
+    def mask(self, verb, value):
+        """
+        Return a mask of the positions in the column which hold a value
+        satisfying the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Number the indexed property is compared with.
+        :type value: Number
+        :raises KeyError: If the operator is not supported.
+        :returns: Mask of the matching positions, or :obj:`None` if the
+            value is not a number or too large to compare with the floats
+            in the column.
+        :rtype: :class:`numpy.ndarray` of :class:`bool` or :obj:`None`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+        if not self._in_column(value):
+            return None
+        compare = getattr(numpy, self._COMPARISONS[verb])
+        return compare(self._values, value) & self._present
+
+    def values(self, mask=None):
+        """
+        Return the values in the column at the masked positions.
+
+        :param mask: Mask of the positions, which may be shorter than the
+            column. If :obj:`None`, all the values in the column are
+            returned.
+        :type mask: :class:`numpy.ndarray` of :class:`bool` or :obj:`None`
+        :returns: Values at the masked positions.
+        :rtype: :class:`numpy.ndarray`
+        """
+        if mask is None:
+            return self._values[self._present]
+        size = min(len(mask), len(self._values))
+        return self._values[:size][mask[:size] & self._present[:size]]
+
+    def lookup(self, verb, value):
+        """
+        Look up the entities with a value satisfying the filter operator.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: Number, or any comparable value.
+        :raises KeyError: If the operator is not supported.
+        :returns: Matching entities.
+        :rtype: :class:`set` of :class:`~.IEntity`
+        """
+        if verb not in self.operators:
+            raise KeyError("Unsupported operator {0!r}.".format(verb))
+        check = OPERATORS[verb]
+        mask = self.mask(verb, value)
+        if mask is not None:
+            entities = self._entities
+            found = set(entities[pos] for pos in numpy.flatnonzero(mask))
+        else:
+            found = set(
+                entity for entity in self._entities
+                if entity is not None and check(
+                    self._values[entity.ident], value, False
+                )
+            )
+        found.update(
+            entity for entity, prop_value in self._others.iteritems()
+            if check(prop_value, value, False)
+        )
+        return found
+
+    def estimate(self, verb, value):
+        """
+        Return the number of entities :meth:`lookup` would return.
+
+        :param verb: Filter operator, one of :attr:`operators`.
+        :type verb: :class:`str`
+        :param value: Value the indexed property is compared with.
+        :type value: Number, or any comparable value.
+        :raises KeyError: If the operator is not supported.
+        :returns: Number of matching entities, or :obj:`None` if the value
+            is not a number, or too large, and can not be compared in the
+            column.
+        :rtype: :class:`int` or :obj:`None`
+        """
+        mask = self.mask(verb, value)
+        if mask is None:
+            return None
+        return int(numpy.count_nonzero(mask)) + len(self._others)
+
+
+class IndexStats(namedtuple("IndexStats", ["count", "distinct", "histogram"])):
+    """
+    Statistics of the values of a property key, as returned by
+    :meth:`~.EntitySet.get_stats`.
+
+    :param count: Number of entities that have the property key.
+    :type count: :class:`int`
+    :param distinct: Number of distinct hashable values, not counting
+        :obj:`None`.
+    :type distinct: :class:`int`
+    :param histogram: Equi-depth histogram of the numeric values, as
+        returned by :func:`equi_depth_histogram`, or :obj:`None` if the
+        property has no numeric values.
+    :type histogram: :class:`list` of :class:`tuple` or :obj:`None`
+    """
+    __slots__ = ()
+
+
+def _is_number(value):
+    """
+    Internal helper function that returns :obj:`True` if the value is a
+    number, not counting booleans.
+    """
+    return (
+        isinstance(value, (int, long, float)) and
+        not isinstance(value, bool)
+    )
+
+
+def equi_depth_histogram(value_counts, buckets=10):
+    """
+    Return a equi-depth histogram of the numeric values, where each bucket
+    holds about the same number of entities.
+
+    .. note::
+
+        Entities with the same value always fall in the same bucket, so
+        frequent values give deeper buckets.
+
+    :param value_counts: Property values and the number of entities that
+        have each value. Values which are not numbers are ignored.
+    :type value_counts: Iterable of :class:`tuple` (value, :class:`int`)
+    :param buckets: Number of buckets wanted.
+    :type buckets: :class:`int`
+    :returns: Lowest value, highest value and number of entities of each
+        bucket, in ascending order, or :obj:`None` if there are no numbers.
+    :rtype: :class:`list` of :class:`tuple` or :obj:`None`
+    """
+    numbers = sorted(
+        (value, count) for value, count in value_counts
+        if _is_number(value)
+    )
+    if not numbers:
+        return None
+
+    total = sum(count for _, count in numbers)
+    depth = float(total) / buckets
+    histogram = []
+    low = None
+    filled = 0
+    seen = 0
+    for value, count in numbers:
+        if low is None:
+            low = value
+        filled += count
+        seen += count
+        if seen >= depth * (len(histogram) + 1):
+            histogram.append((low, value, filled))
+            low = None
+            filled = 0
+    if filled:
+        histogram.append((low, numbers[-1][0], filled))
+    return histogram
+
+
+AGGREGATES = frozenset(["sum", "min", "max", "mean"])
+
+
+def aggregate_values(func, parts):
+    """
+    Aggregate numeric values, using NumPy for the values of
+    :class:`ColumnIndex` columns.
+
+    .. note::
+
+        Values which are not numbers are ignored. The values of a
+        :class:`ColumnIndex` are floats, so are the aggregates computed
+        from them, while plain property values are aggregated with the
+        Python built-ins so that integers stay exact.
+
+    :param func: Aggregate function, one of :data:`AGGREGATES`.
+    :type func: :class:`str`
+    :param parts: Groups of values being aggregated together, either
+        NumPy arrays of numbers or iterables of property values.
+    :type parts: Iterable of :class:`numpy.ndarray` or iterables
+    :raises KeyError: If the aggregate function is not supported.
+    :returns: The aggregate, or :obj:`None` for the minimum, maximum or
+        mean of no values, while the sum of no values is zero.
+    :rtype: Number or :obj:`None`
+    """
+    if func not in AGGREGATES:
+        raise KeyError("Unsupported aggregate {0!r}.".format(func))
+
+    parts = list(parts)
+    arrays = [
+        part for part in parts
+        if numpy is not None and isinstance(part, numpy.ndarray)
+    ]
+    if arrays and len(arrays) == len(parts):
+        values = numpy.concatenate(arrays)
+        if not len(values):
+            return 0 if func == "sum" else None
+        return getattr(values, func)().item()
+
+    numbers = []
+    for part in parts:
+        if numpy is not None and isinstance(part, numpy.ndarray):
+            numbers.extend(part.tolist())
+        else:
+            numbers.extend(value for value in part if _is_number(value))
+    if not numbers:
+        return 0 if func == "sum" else None
+    if func == "mean":
+        return float(sum(numbers)) / len(numbers)
+    return {"sum": sum, "min": min, "max": max}[func](numbers)
+
+
+INDEXES = {
+    "sorted": SortedIndex,
+    "prefix": PrefixIndex,
+    "trigram": TrigramIndex,
+    "casefold": CaseFoldIndex,
+    "composite": CompositeIndex,
+}
+
+if numpy is not None:
+    INDEXES["column"] = ColumnIndex
@@ -67,6 +67,12 @@ class DumplicateConstraintError(EntitySetException):
     """
 
 
+class UnknownIndexError(EntitySetException):
+    """
+    Raised if you are trying to add an index of an unknown kind.
+    """
+
+
 class DatabaseException(RurukiException):
     """
     Database Exception.
@@ -173,10 +179,16 @@ class IGraph(object):
         Add a constraint to ensure uniqueness for a particular label and
         property key.
 
+        .. note::
+
+            If ``key`` is a :class:`tuple` of property keys, the combination
+            of their values has to be unique, and vertices having only some
+            of the keys are not constrained.
+
         :param label: Vertex label which the constraint is meant for.
         :type label: :class:`str`
-        :param key: Vertex property key used to ensure uniqueness.
-        :type key: :class:`str`
+        :param key: Vertex property key, or keys, used to ensure uniqueness.
+        :type key: :class:`str` or :class:`tuple` of :class:`str`
         """
 
     @abc.abstractmethod
@@ -190,6 +202,85 @@ class IGraph(object):
             :class:`tuple` of label :class:`str`, key :class:`str`
         """
 
+    @abc.abstractmethod
+    def get_vertex_stats(self, label, key, buckets=10):
+        """
+        Return statistics about the values of a vertex label and property
+        key.
+
+        .. note::
+
+            See :meth:`~.IEntitySet.get_stats` for the details.
+
+        :param label: Vertex label.
+        :type label: :class:`str`
+        :param key: Vertex property key.
+        :type key: :class:`str` or :class:`tuple` of :class:`str`
+        :param buckets: Number of buckets in the histogram of numeric
+            values.
+        :type buckets: :class:`int`
+        :returns: Vertex count, distinct value count and histogram.
+        :rtype: :class:`~.IndexStats`
+        """
+
+    @abc.abstractmethod
+    def get_edge_stats(self, label, key, buckets=10):
+        """
+        Return statistics about the values of a edge label and property key.
+
+        .. note::
+
+            See :meth:`~.IEntitySet.get_stats` for the details.
+
+        :param label: Edge label.
+        :type label: :class:`str`
+        :param key: Edge property key.
+        :type key: :class:`str` or :class:`tuple` of :class:`str`
+        :param buckets: Number of buckets in the histogram of numeric
+            values.
+        :type buckets: :class:`int`
+        :returns: Edge count, distinct value count and histogram.
+        :rtype: :class:`~.IndexStats`
+        """
+
+    @abc.abstractmethod
+    def get_degree_distribution(self, label=None, direction="out"):
+        """
+        Return the number of vertices having each degree, counting only
+        the edges with a label.
+
+        .. note::
+
+            Vertices without any of the edges are counted with a degree
+            of 0. A edge from a vertex to itself counts twice towards its
+            ``both`` degree.
+
+        :param label: Edge label. If :obj:`None`, all the edges are
+            counted.
+        :type label: :class:`str` or :obj:`None`
+        :param direction: Count the ``in``, the ``out`` or ``both`` edges
+            of each vertex.
+        :type direction: :class:`str`
+        :raises KeyError: If the direction is not supported.
+        :returns: Number of vertices for each degree.
+        :rtype: :class:`dict` of :class:`int` to :class:`int`
+        """
+
+    @abc.abstractmethod
+    def to_csr(self, direction="out"):
+        """
+        Take a frozen compressed sparse row snapshot of the edges of the
+        graph, for read only analytics over NumPy arrays.
+
+        :param direction: ``out`` to snapshot the ``out`` edges of each
+            vertex, ``in`` for the ``in`` edges.
+        :type direction: :class:`str`
+        :raises ImportError: If NumPy is not installed.
+        :raises KeyError: If the direction is not supported.
+        :returns: Snapshot of the edges.
+        :rtype: :class:`~.CSRGraph`
+        """
+
     @abc.abstractmethod
     def get_or_create_edge(self, head, label, tail, **kwargs):
         """
@@ -341,6 +432,22 @@ class IGraph(object):
             :class:`~.Ivertex` and :class:`~.IEdge`.
         """
 
+    @abc.abstractmethod
+    def remove_property(self, entity, key):
+        """
+        Remove a property key and its value from the entity.
+
+        :param entity: Entity which is losing the property.
+        :type entity: :class:`~.IEntity`
+        :param key: Property key being removed.
+        :type key: :class:`str`
+        :raises UnknownEntityError: If you are trying to remove a property
+            from a :class:`~.IEntity` that is not known in the database.
+        :raises TypeError: If the entity is not supported by the database.
+            Property removals only support :class:`~.Ivertex` and
+            :class:`~.IEdge`.
+        """
+
     @abc.abstractmethod
     def get_edge(self, id_num):
         """
@@ -407,6 +514,158 @@ class IGraph(object):
         :rtype: :class:`~.IEntitySet`
         """
 
+    @abc.abstractmethod
+    def iter_vertices(self, label=None, **kwargs):
+        """
+        Return a generator of the vertices in the graph that have a particular
+        key/value property, without building a new :class:`~.IEntitySet`.
+
+        .. note::
+
+            See :meth:`.IEntitySet.ifilter` for details.
+
+        :param label: Vertex label. If :obj:`None`
+            then all vertices will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: :class:`~.IVertex` that matched the filter criteria.
+        :rtype: Iterable of :class:`~.IVertex`
+        """
+
+    @abc.abstractmethod
+    def first_vertex(self, label=None, **kwargs):
+        """
+        Return the first vertex found in the graph that has a particular
+        key/value property.
+
+        .. note::
+
+            See :meth:`.IEntitySet.first` for details.
+
+        :param label: Vertex label. If :obj:`None`
+            then all vertices will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: A matching vertex or :obj:`None`.
+        :rtype: :class:`~.IVertex` or :obj:`None`
+        """
+
+    @abc.abstractmethod
+    def vertex_exists(self, label=None, **kwargs):
+        """
+        Return :obj:`True` if any vertex in the graph has a particular
+        key/value property.
+
+        .. note::
+
+            See :meth:`.IEntitySet.exists` for details.
+
+        :param label: Vertex label. If :obj:`None`
+            then all vertices will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: True if there is a matching vertex.
+        :rtype: :class:`bool`
+        """
+
+    @abc.abstractmethod
+    def count_vertices(self, label=None, **kwargs):
+        """
+        Return the number of vertices in the graph that have a particular
+        key/value property.
+
+        .. note::
+
+            See :meth:`.IEntitySet.count` for details.
+
+        :param label: Vertex label. If :obj:`None`
+            then all vertices will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: Number of matching vertices.
+        :rtype: :class:`int`
+        """
+
+    @abc.abstractmethod
+    def iter_edges(self, label=None, **kwargs):
+        """
+        Return a generator of the edges in the graph that have a particular
+        key/value property, without building a new :class:`~.IEntitySet`.
+
+        .. note::
+
+            See :meth:`.IEntitySet.ifilter` for details.
+
+        :param label: Edge label. If :obj:`None`
+            then all edges will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: :class:`~.IEdge` that matched the filter criteria.
+        :rtype: Iterable of :class:`~.IEdge`
+        """
+
+    @abc.abstractmethod
+    def first_edge(self, label=None, **kwargs):
+        """
+        Return the first edge found in the graph that has a particular
+        key/value property.
+
+        .. note::
+
+            See :meth:`.IEntitySet.first` for details.
+
+        :param label: Edge label. If :obj:`None`
+            then all edges will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: A matching edge or :obj:`None`.
+        :rtype: :class:`~.IEdge` or :obj:`None`
+        """
+
+    @abc.abstractmethod
+    def edge_exists(self, label=None, **kwargs):
+        """
+        Return :obj:`True` if any edge in the graph has a particular
+        key/value property.
+
+        .. note::
+
+            See :meth:`.IEntitySet.exists` for details.
+
+        :param label: Edge label. If :obj:`None`
+            then all edges will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: True if there is a matching edge.
+        :rtype: :class:`bool`
+        """
+
+    @abc.abstractmethod
+    def count_edges(self, label=None, **kwargs):
+        """
+        Return the number of edges in the graph that have a particular
+        key/value property.
+
+        .. note::
+
+            See :meth:`.IEntitySet.count` for details.
+
+        :param label: Edge label. If :obj:`None`
+            then all edges will be checked for key and value.
+        :type label: :class:`str` or :obj:`None`
+        :param kwargs: Property key and value.
+        :type kwargs: :class:`str` and value.
+        :returns: Number of matching edges.
+        :rtype: :class:`int`
+        """
+
     @abc.abstractmethod
     def remove_edge(self, edge):
         """
@@ -585,19 +844,37 @@ class IVertex(IEntity):
         """
 
     @abc.abstractmethod
-    def out_edge_count(self):
+    def out_edge_count(self, label=None):
         """
-        Return the total number of out edges.
+        Return the total number of out edges, or the number of out edges
+        with a label.
 
+        .. note::
+
+            The edges of each label are counted as they are added and
+            removed, so the count does not look at the edges.
+
+        :param label: Edge label. If :obj:`None`, all the edges are
+            counted.
+        :type label: :class:`str` or :obj:`None`
         :returns: Total number of ``out`` edges.
         :rtype: :class:`int`
         """
 
     @abc.abstractmethod
-    def in_edge_count(self):
+    def in_edge_count(self, label=None):
         """
-        Return the total number of in edges.
+        Return the total number of in edges, or the number of in edges
+        with a label.
 
+        .. note::
+
+            The edges of each label are counted as they are added and
+            removed, so the count does not look at the edges.
+
+        :param label: Edge label. If :obj:`None`, all the edges are
+            counted.
+        :type label: :class:`str` or :obj:`None`
         :returns: Total number of ``in`` edges.
         :rtype: :class:`int`
         """
@@ -617,7 +894,7 @@ class IVertex(IEntity):
         """
 
     @abc.abstractmethod
-    def get_in_vertices(self, label=None, **kwargs):
+    def get_in_vertices(self, label=None, edge_label=None, **kwargs):
         """
         Return the ``in`` vertices adjacent to the vertex according to the
         edge.
@@ -625,6 +902,9 @@ class IVertex(IEntity):
         :param label: Vertices label.
             If :obj:`None`, all edges will be returned.
         :type label: :class:`str`
+        :param edge_label: Only follow the edges with this label.
+            If :obj:`None`, all the edges are followed.
+        :type edge_label: :class:`str` or :obj:`None`
         :param kwargs: Vertices property key and value pairs.
         :type kwargs: key :class:`str` and value.
         :returns: New :class:`~.IEntitySet` with filtered entities.
@@ -632,7 +912,7 @@ class IVertex(IEntity):
         """
 
     @abc.abstractmethod
-    def get_out_vertices(self, label=None, **kwargs):
+    def get_out_vertices(self, label=None, edge_label=None, **kwargs):
         """
         Return the ``out`` vertices adjacent to the vertex according to the
         edge.
@@ -640,6 +920,9 @@ class IVertex(IEntity):
         :param label: Vertices label.
             If :obj:`None`, all edges will be returned.
         :type label: :class:`str`
+        :param edge_label: Only follow the edges with this label.
+            If :obj:`None`, all the edges are followed.
+        :type edge_label: :class:`str` or :obj:`None`
         :param kwargs: Vertices property key and value pairs.
         :type kwargs: key :class:`str` and value.
         :returns: New :class:`~.IEntitySet` with filtered entities.
@@ -647,7 +930,7 @@ class IVertex(IEntity):
         """
 
     @abc.abstractmethod
-    def get_both_vertices(self, label=None, **kwargs):
+    def get_both_vertices(self, label=None, edge_label=None, **kwargs):
         """
         Return the ``in`` and ``out`` vertices adjacent to the vertex
         according to the edges.
@@ -655,6 +938,9 @@ class IVertex(IEntity):
         :param label: Vertices label.
             If :obj:`None`, all edges will be returned.
         :type label: :class:`str`
+        :param edge_label: Only follow the edges with this label.
+            If :obj:`None`, all the edges are followed.
+        :type edge_label: :class:`str` or :obj:`None`
         :param kwargs: Vertices property key and value pair.
         :type kwargs: key :class:`str` and value.
         :returns: New :class:`~.IEntitySet` with filtered entities.
@@ -744,10 +1030,73 @@ class IEntitySet(MutableSet):
         """
         Return all the index labels and properties.
 
+        .. note::
+
+            Composite indexes are returned with a :class:`tuple` of all
+            their property keys.
+
         :returns: All the index label and property keys.
         :rtype: Iterable of :class:`tuple` of :class:`str`, :class:`str`
         """
 
+    @abc.abstractmethod
+    def get_stats(self, label, key, buckets=10):
+        """
+        Return statistics about the values of a label and property key,
+        which are useful for tuning filters.
+
+        .. note::
+
+            For a composite index, ``key`` is the :class:`tuple` of its
+            property keys and no histogram is returned.
+
+        :param label: Label of the entities.
+        :type label: :class:`str`
+        :param key: Property key, or keys of a composite index.
+        :type key: :class:`str` or :class:`tuple` of :class:`str`
+        :param buckets: Number of buckets in the histogram of numeric
+            values.
+        :type buckets: :class:`int`
+        :returns: Entity count, distinct value count and histogram.
+        :rtype: :class:`~.IndexStats`
+        """
+
+    @abc.abstractmethod
+    def add_index(self, label, key, kind="sorted"):
+        """
+        Add an additional index for a particular label and property key
+        which :meth:`.filter` uses to answer the operators supported by the
+        index instead of checking every entity.
+
+        .. note::
+
+            Supported index kinds are:
+
+            * sorted: answers __lt, __le, __gt and __ge
+            * prefix: answers __startswith and __istartswith
+            * trigram: narrows down __contains and __icontains
+            * casefold: answers __ieq, __ine and __iendswith, and
+              narrows down __endswith
+            * composite: answers equality filters on all the keys together,
+              ``key`` being a :class:`tuple` of property keys
+            * column: answers __eq, __ne, __lt, __le, __gt and __ge on
+              numeric values with vectorized comparisons, and speeds up
+              :meth:`.aggregate` (only available when NumPy is installed)
+
+            Adding an index that already exists returns the existing index.
+
+        :param label: Label of the entities being indexed.
+        :type label: :class:`str`
+        :param key: Property key being indexed, or the property keys for a
+            composite index.
+        :type key: :class:`str` or :class:`tuple` of :class:`str`
+        :param kind: Kind of index.
+        :type kind: :class:`str`
+        :raises UnknownIndexError: If the index kind is unknown, or the
+            keys do not suit the kind of index.
+        :returns: The index.
+        """
+
     @abc.abstractmethod
     def get_labels(self):
         """
@@ -785,6 +1134,18 @@ class IEntitySet(MutableSet):
         :type kwargs: :class:`str`, value.
         """
 
+    @abc.abstractmethod
+    def unindex(self, entity, key):
+        """
+        Remove a property of the entity from the index, ahead of the
+        property being removed from the entity.
+
+        :param entity: Entity which is losing the property.
+        :type entity: :class:`~.IEntity`
+        :param key: Property key being removed.
+        :type key: :class:`str`
+        """
+
     @abc.abstractmethod
     def filter(self, label=None, **kwargs):
         """
@@ -815,6 +1176,9 @@ class IEntitySet(MutableSet):
             * __ieq
             * __ne
             * __ine
+            * __in (one of an iterable of values)
+            * __regex (regular expression found anywhere in the value)
+            * __iregex
 
         :param label: Filter for entities that have a particular label. If
             :obj:`None`, all entities are returned.
@@ -826,6 +1190,137 @@ class IEntitySet(MutableSet):
         :rtype: :class:`~.IEntitySet`
         """
 
+    @abc.abstractmethod
+    def ifilter(self, label=None, **kwargs):
+        """
+        Like :meth:`.filter`, but return a generator which finds the
+        matching entities one at a time, without building a new
+        :class:`~.IEntitySet`.
+
+        .. note::
+
+            The entity set should not be changed while the generator is in
+            use.
+
+        :param label: Filter for entities that have a particular label. If
+            :obj:`None`, all entities are returned.
+        :type label: :class:`str`
+        :param kwargs: Property key and value.
+        :type kwargs: key=value
+        :returns: Entities that match the filter criteria.
+        :rtype: Iterable of :class:`~.IEntity`
+        """
+
+    def first(self, label=None, **kwargs):
+        """
+        Return the first entity found that matches the given label and
+        properties, stopping the search as soon as one is found.
+
+        .. note::
+
+            See :meth:`.filter` for the supported filters.
+
+        :param label: Filter for entities that have a particular label. If
+            :obj:`None`, all entities are checked.
+        :type label: :class:`str`
+        :param kwargs: Property key and value.
+        :type kwargs: key=value
+        :returns: A matching entity or :obj:`None` if nothing matched.
+        :rtype: :class:`~.IEntity` or :obj:`None`
+        """
+        return next(self.ifilter(label, **kwargs), None)
+
+    def exists(self, label=None, **kwargs):
+        """
+        Return :obj:`True` if any entity matches the given label and
+        properties, stopping the search as soon as one is found.
+
+        .. note::
+
+            See :meth:`.filter` for the supported filters.
+
+        :param label: Filter for entities that have a particular label. If
+            :obj:`None`, all entities are checked.
+        :type label: :class:`str`
+        :param kwargs: Property key and value.
+        :type kwargs: key=value
+        :returns: True if there is a matching entity.
+        :rtype: :class:`bool`
+        """
+        for _ in self.ifilter(label, **kwargs):
+            return True
+        return False
+
+    def count(self, label=None, **kwargs):
+        """
+        Return the number of entities that match the given label and
+        properties, without collecting them.
+
+        .. note::
+
+            See :meth:`.filter` for the supported filters.
+
+        :param label: Filter for entities that have a particular label. If
+            :obj:`None`, all entities are counted.
+        :type label: :class:`str`
+        :param kwargs: Property key and value.
+        :type kwargs: key=value
+        :returns: Number of matching entities.
+        :rtype: :class:`int`
+        """
+        return sum(1 for _ in self.ifilter(label, **kwargs))
+
+    @abc.abstractmethod
+    def aggregate(self, key, func="sum", label=None, **kwargs):
+        """
+        Aggregate the values of a property key of the entities that match
+        the given label and properties.
+
+        .. note::
+
+            See :meth:`.filter` for the supported filters. Values which are
+            not numbers are ignored. When the property key and all the
+            filtered keys have a ``column`` index, the values are selected
+            and aggregated with vectorized NumPy operations.
+
+        :param key: Property key of the values being aggregated.
+        :type key: :class:`str`
+        :param func: Aggregate function, one of ``sum``, ``min``, ``max``
+            or ``mean``.
+        :type func: :class:`str`
+        :param label: Filter for entities that have a particular label. If
+            :obj:`None`, all entities are aggregated.
+        :type label: :class:`str`
+        :param kwargs: Property key and value.
+        :type kwargs: key=value
+        :raises KeyError: If the aggregate function is not supported.
+        :returns: The aggregate, or :obj:`None` for the minimum, maximum or
+            mean of no values, while the sum of no values is zero.
+        :rtype: Number or :obj:`None`
+        """
+
+    @abc.abstractmethod
+    def explain(self, label=None, **kwargs):
+        """
+        Return the plan that :meth:`.filter` uses for the given label and
+        properties, which is useful for debugging slow filters.
+
+        .. note::
+
+            Filter conditions are ordered by the estimated number of
+            entities matching them. Conditions that can be answered by an
+            index are intersected, starting with the most selective one, and
+            the remaining conditions are checked against each entity found.
+
+        :param label: Filter for entities that have a particular label. If
+            :obj:`None`, all entities are checked.
+        :type label: :class:`str`
+        :param kwargs: Property key and value.
+        :type kwargs: key=value
+        :returns: Plan steps in the order they are executed.
+        :rtype: :class:`list` of :class:`~.PlanStep`
+        """
+
     @abc.abstractmethod
     def all(self, label=None, **kwargs):
         """
@@ -841,18 +1336,37 @@ class IEntitySet(MutableSet):
         """
 
     @abc.abstractmethod
-    def sorted(self, key=None, reverse=False):
+    def sorted(self, key=None, reverse=False, limit=None, offset=0,
+               cursor=None):
         """
-        Sort and return all items in the container.
+        Sort and return the items in the container, or a page of them.
+
+        .. note::
+
+            When a page is requested, ties are broken on the
+            :attr:`~.IEntity.ident` so that consecutive pages neither
+            repeat nor skip entities. When sorting on a property key, the
+            entities without a value for the key come last, or first when
+            the order is reversed. A page sorted on a property key with a
+            sorted index is read in the order of the index.
 
         :param key: Key specifies a function of one argument that is used to
-            extract a comparison key from each list element. The default
-            is to compare the elements directly.
-        :type key: callable
+            extract a comparison key from each list element, or the property
+            key to sort on. The default is to compare the elements directly,
+            or their :attr:`~.IEntity.ident` when a page is requested.
+        :type key: callable or :class:`str`
         :param reverse: If set to True, then the list elements are sorted as
             if each comparison were reverted.
         :type reverse: :class:`bool`
-        :returns: All the items in the container.
+        :param limit: Maximum number of items returned. If :obj:`None`, all
+            the remaining items are returned.
+        :type limit: :class:`int` or :obj:`None`
+        :param offset: Number of items skipped at the start.
+        :type offset: :class:`int`
+        :param cursor: Only return the items after this entity, usually the
+            last entity of the previous page.
+        :type cursor: :class:`~.IEntity` or :obj:`None`
+        :returns: The sorted items in the container.
         :rtype: :class:`list` containing :class:`~.IEntity`
         """
 
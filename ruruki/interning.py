@@ -0,0 +1,104 @@
+"""
+Interning of the strings held by the entities of a graph.
+
+Labels and property keys are repeated by every entity, and the same string
+values often are too, while strings loaded from JSON are new objects each
+time. Interning hands out a single canonical object for equal strings, so
+that the duplicates can be freed.
+"""
+
+
+class Interner(object):
+    """
+    Table of canonical strings for the labels, property keys and the
+    string values of the low cardinality properties.
+
+    .. note::
+
+        A :class:`str` and a :class:`unicode` string are never exchanged
+        for one another, even if they are equal.
+
+    :param value_limit: String values of a label and property key are only
+        interned while the label and key have at most this many distinct
+        string values, after which their table is dropped. If :obj:`None`,
+        property values are not interned.
+    :type value_limit: :class:`int` or :obj:`None`
+    """
+    __slots__ = ("value_limit", "_strings", "_values")
+
+    def __init__(self, value_limit=None):
+        self.value_limit = value_limit
+        self._strings = {}
+        self._values = {}
+
+    def __len__(self):
+        return len(self._strings) + sum(
+            len(table) for table in self._values.itervalues() if table
+        )
+
+    def intern(self, string):
+        """
+        Return the canonical object for the string.
+
+        :param string: String being interned. Any other value is returned
+            as is.
+        :type string: :class:`str` or :class:`unicode`
+        :returns: The canonical string equal to the given one.
+        :rtype: :class:`str` or :class:`unicode`
+        """
+        kind = type(string)
+        if kind is not str and kind is not unicode:
+            return string
+        return self._strings.setdefault((kind, string), string)
+
+    def intern_value(self, label, key, value):
+        """
+        Return the canonical object for a property value, if the label and
+        property key still have a low cardinality.
+
+        :param label: Label of the entity.
+        :type label: :class:`str`
+        :param key: Property key.
+        :type key: :class:`str`
+        :param value: Property value. Values other than strings are
+            returned as is.
+        :type value: Value
+        :returns: The canonical value equal to the given one.
+        :rtype: Value
+        """
+        kind = type(value)
+        if self.value_limit is None or (kind is not str and
+                                        kind is not unicode):
+            return value
+
+        signature = (label, key, kind)
+        table = self._values.get(signature, {})
+        if table is None:
+            return value
+        found = table.get(value)
+        if found is not None:
+            return found
+
+        # too many distinct values to be worth keeping a table for.
+        if len(table) >= self.value_limit:
+            self._values[signature] = None
+            return value
+        table[value] = value
+        self._values[signature] = table
+        return value
+
+    def intern_properties(self, label, properties):
+        """
+        Intern the keys and values of the properties of a entity in place.
+
+        :param label: Label of the entity.
+        :type label: :class:`str`
+        :param properties: Properties being interned.
+        :type properties: :class:`dict`
+        """
+        items = [
+            (self.intern(key), self.intern_value(label, key, value))
+            for key, value in properties.iteritems()
+        ]
+        properties.clear()
+        properties.update(items)
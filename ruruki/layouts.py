@@ -0,0 +1,220 @@
+"""
+Compact property storage for entities sharing the same property keys.
+
+Most entities of a label have exactly the same property keys, so rather
+than each entity keeping its own :class:`dict`, the keys are kept once in
+a shared :class:`Layout` and each entity only keeps a :class:`tuple` of its
+values, in the order of the layout keys.
+
+Adding or removing a key moves the properties to another layout. The
+layouts reached this way are remembered, so that entities going through
+the same changes find the next layout without looking it up again.
+"""
+from collections import MutableMapping
+from itertools import izip
+
+
+class Layout(object):
+    """
+    Sorted property keys shared by all the :class:`CompactProperties` with
+    the same keys.
+
+    .. note::
+
+        Use :meth:`LayoutTable.layout` to get the layout for some keys.
+
+    :param table: Table the layout belongs to.
+    :type table: :class:`LayoutTable`
+    :param keys: Sorted property keys.
+    :type keys: :class:`tuple` of :class:`str`
+    """
+    __slots__ = ("keys", "positions", "_table", "_next")
+
+    def __init__(self, table, keys):
+        self.keys = keys
+        self.positions = dict((key, pos) for pos, key in enumerate(keys))
+        self._table = table
+        self._next = {}
+
+    def add(self, key):
+        """
+        Return the layout with the key added.
+
+        :param key: Property key being added.
+        :type key: :class:`str`
+        :returns: Layout with the keys of this layout and the new key.
+        :rtype: :class:`Layout`
+        """
+        found = self._next.get((key, True))
+        if found is None:
+            found = self._table.layout(self.keys + (key,))
+            self._next[(key, True)] = found
+        return found
+
+    def remove(self, key):
+        """
+        Return the layout with the key removed.
+
+        :param key: Property key being removed.
+        :type key: :class:`str`
+        :returns: Layout with the keys of this layout except the key.
+        :rtype: :class:`Layout`
+        """
+        found = self._next.get((key, False))
+        if found is None:
+            found = self._table.layout(
+                each for each in self.keys if each != key
+            )
+            self._next[(key, False)] = found
+        return found
+
+    def __repr__(self):  # pragma: no cover
+        return "<{0}> keys: {1}".format(self.__class__.__name__, self.keys)
+
+
+class LayoutTable(object):
+    """
+    Table of the layouts used by the properties of a graph, handing out a
+    single :class:`Layout` for the same property keys.
+    """
+    __slots__ = ("_layouts",)
+
+    def __init__(self):
+        self._layouts = {}
+
+    def __len__(self):
+        return len(self._layouts)
+
+    def layout(self, keys):
+        """
+        Return the layout for the property keys.
+
+        :param keys: Property keys, in any order.
+        :type keys: Iterable of :class:`str`
+        :returns: Shared layout of the keys.
+        :rtype: :class:`Layout`
+        """
+        keys = tuple(sorted(keys))
+        found = self._layouts.get(keys)
+        if found is None:
+            found = self._layouts[keys] = Layout(self, keys)
+        return found
+
+    def compact(self, properties):
+        """
+        Return compact properties holding the same keys and values.
+
+        :param properties: Properties being compacted.
+        :type properties: :class:`dict`
+        :returns: Compact properties.
+        :rtype: :class:`CompactProperties`
+        """
+        layout = self.layout(properties)
+        return CompactProperties(
+            layout, tuple(properties[key] for key in layout.keys)
+        )
+
+
+class CompactProperties(MutableMapping):
+    """
+    Properties of a entity stored as a :class:`tuple` of values, with the
+    keys kept in a shared :class:`Layout`.
+
+    The properties behave like a :class:`dict`, but are iterated in the
+    sorted order of their keys.
+
+    .. note::
+
+        Use :meth:`LayoutTable.compact` to compact the properties of a
+        entity. Changing a value copies the values, so the properties are
+        meant for entities which are read more often than updated.
+
+    :param layout: Layout of the property keys.
+    :type layout: :class:`Layout`
+    :param values: Values in the order of the layout keys.
+    :type values: :class:`tuple`
+    """
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, layout, values):
+        self._layout = layout
+        self._values = values
+
+    @property
+    def layout(self):
+        """
+        Layout of the property keys.
+
+        :rtype: :class:`Layout`
+        """
+        return self._layout
+
+    def __getitem__(self, key):
+        return self._values[self._layout.positions[key]]
+
+    def get(self, key, default=None):
+        pos = self._layout.positions.get(key)
+        if pos is None:
+            return default
+        return self._values[pos]
+
+    def __contains__(self, key):
+        return key in self._layout.positions
+
+    def __setitem__(self, key, value):
+        values = list(self._values)
+        pos = self._layout.positions.get(key)
+        if pos is None:
+            self._layout = self._layout.add(key)
+            values.insert(self._layout.positions[key], value)
+        else:
+            values[pos] = value
+        self._values = tuple(values)
+
+    def __delitem__(self, key):
+        pos = self._layout.positions[key]
+        self._layout = self._layout.remove(key)
+        self._values = self._values[:pos] + self._values[pos + 1:]
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def iteritems(self):
+        return izip(self._layout.keys, self._values)
+
+    def items(self):
+        return zip(self._layout.keys, self._values)
+
+    def keys(self):
+        return list(self._layout.keys)
+
+    def itervalues(self):
+        return iter(self._values)
+
+    def values(self):
+        return list(self._values)
+
+    def update(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        # work out the final keys first, so that the properties only move
+        # to a new layout once.
+        merged = dict(self.iteritems())
+        merged.update(*args, **kwargs)
+        layout = self._layout
+        if len(merged) != len(self._values):
+            layout = layout._table.layout(merged)  # pylint: disable=protected-access
+        self._layout = layout
+        self._values = tuple(merged[key] for key in layout.keys)
+
+    def copy(self):
+        """
+        Return a :class:`dict` with the same properties.
+
+        :rtype: :class:`dict`
+        """
+        return dict(self.iteritems())
+
+    def __repr__(self):
+        return repr(self.copy())
@@ -0,0 +1,89 @@
+"""
+Ordering helpers used by :meth:`~.EntitySet.sorted` to return a page of
+sorted entities without sorting all of them.
+
+Pages are ordered by the position of each entity, which breaks ties on the
+:attr:`~.IEntity.ident` so that the order is the same from one page to the
+next. Sorting on a property key puts the entities without a value for the
+key after all the others, or before them when the order is reversed.
+"""
+import heapq
+
+
+def position_of(key=None):
+    """
+    Return a function giving the position of a entity in the sort order.
+
+    :param key: Function extracting the comparison key from a entity, or
+        the property key to sort on. If :obj:`None`, the entities are
+        ordered by :attr:`~.IEntity.ident`.
+    :type key: :func:`callable` or :class:`str` or :obj:`None`
+    :returns: Function of a entity returning its position.
+    :rtype: :func:`callable`
+    """
+    if key is None:
+        return lambda entity: (entity.ident,)
+
+    if callable(key):
+        return lambda entity: (key(entity), entity.ident)
+
+    def position(entity):  # pylint: disable=missing-docstring
+        value = entity.properties.get(key)
+        if value is None:
+            return (1, entity.ident)
+        return (0, value, entity.ident)
+    return position
+
+
+def is_after(position, after, reverse=False):
+    """
+    Return :obj:`True` if the position comes after the cursor position in
+    the sort order.
+
+    :param position: Position of a entity.
+    :type position: :class:`tuple`
+    :param after: Position of the cursor.
+    :type after: :class:`tuple`
+    :param reverse: True if the order is reversed.
+    :type reverse: :class:`bool`
+    :rtype: :class:`bool`
+    """
+    if reverse:
+        return position < after
+    return position > after
+
+
+def top(entities, position, reverse=False, offset=0, limit=None, after=None):
+    """
+    Return a page of the entities in sort order, keeping only the entities
+    up to the end of the page in a bounded heap.
+
+    :param entities: Entities being sorted.
+    :type entities: Iterable of :class:`~.IEntity`
+    :param position: Function giving the position of a entity, as returned
+        by :func:`position_of`.
+    :type position: :func:`callable`
+    :param reverse: True to reverse the sort order.
+    :type reverse: :class:`bool`
+    :param offset: Number of entities skipped at the start of the page.
+    :type offset: :class:`int`
+    :param limit: Maximum number of entities in the page. If :obj:`None`,
+        all the remaining entities are returned.
+    :type limit: :class:`int` or :obj:`None`
+    :param after: Only return the entities which come after this cursor
+        position.
+    :type after: :class:`tuple` or :obj:`None`
+    :returns: Sorted page of entities.
+    :rtype: :class:`list` of :class:`~.IEntity`
+    """
+    if after is not None:
+        entities = (
+            entity for entity in entities
+            if is_after(position(entity), after, reverse)
+        )
+
+    if limit is None:
+        return sorted(entities, key=position, reverse=reverse)[offset:]
+
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    return select(offset + limit, entities, key=position)[offset:]
@@ -0,0 +1,411 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+# pylint: disable=protected-access
+# pylint: disable=too-many-public-methods
+
+import gc
+import json
+import unittest2
+from ruruki import interfaces
+from ruruki.arrays import ArrayGraph
+from ruruki.entities import Edge, Vertex
+from ruruki.handles import ArrayEdge, ArrayEntity, ArrayVertex
+from ruruki.layouts import CompactProperties
+from ruruki.test_utils import helpers
+
+
+class TestArrayGraphBase(unittest2.TestCase):
+    def setUp(self):
+        self.graph = ArrayGraph()
+        self.graph.load(helpers.get_test_dump_graph_file_handler())
+
+        # See test_utils/small_people_graph.dump
+        self.marko = self.graph.first_vertex(name="marko")
+        self.vadas = self.graph.first_vertex(name="vadas")
+        self.lop = self.graph.first_vertex(name="lop")
+        self.josh = self.graph.first_vertex(name="josh")
+        self.ripple = self.graph.first_vertex(name="ripple")
+        self.peter = self.graph.first_vertex(name="peter")
+
+        self.marko_knows_josh = self.graph.get_edges(
+            self.marko, "knows", self.josh
+        ).all()[0]
+        self.josh_created_lop = self.graph.get_edges(
+            self.josh, "created", self.lop
+        ).all()[0]
+
+
+class TestArrayGraph(TestArrayGraphBase):
+    def test_load(self):
+        self.assertEqual(self.graph.count_vertices(), 6)
+        self.assertEqual(self.graph.count_edges(), 6)
+        self.assertEqual(self.marko.label, "person")
+        self.assertEqual(
+            dict(self.marko.properties), {"age": 29, "name": "marko"}
+        )
+        self.assertIsInstance(self.marko.properties, CompactProperties)
+
+    def test_dump(self):
+        tmp_file = helpers.create_tmp_file_handler()
+        self.graph.dump(tmp_file)
+        tmp_file.seek(0)
+
+        loaded_temp = json.load(tmp_file)
+        for key in loaded_temp:
+            loaded_temp[key].sort()
+
+        loaded_dump = json.load(helpers.get_test_dump_graph_file_handler())
+        for key in loaded_dump:
+            loaded_dump[key].sort()
+
+        self.assertDictEqual(loaded_temp, loaded_dump)
+
+    def test_handles_shared(self):
+        self.assertIs(self.graph.get_vertex(self.marko.ident), self.marko)
+        self.assertIs(self.marko_knows_josh.head, self.marko)
+        self.assertIs(self.marko_knows_josh.tail, self.josh)
+
+    def test_handles_freed(self):
+        handles = self.graph._vertices.handles
+        ident = self.graph.add_vertex("person", name="temp").ident
+        gc.collect()
+        self.assertNotIn(ident, handles)
+        self.assertIn(self.marko.ident, handles)
+        self.assertEqual(self.graph.get_vertex(ident).prop__name, "temp")
+
+    def test_contains(self):
+        self.assertIn(self.marko, self.graph)
+        self.assertIn(self.marko_knows_josh, self.graph)
+        self.assertNotIn(Vertex("person"), self.graph)
+        self.assertNotIn(ArrayGraph().add_vertex("person"), self.graph)
+        self.assertRaises(TypeError, lambda: "marko" in self.graph)
+
+    def test_get_vertices(self):
+        self.assertEqual(
+            sorted(each.prop__name for each in self.graph.get_vertices(
+                "person", age__gt=30
+            )),
+            ["josh", "peter"],
+        )
+        self.assertEqual(len(self.graph.get_vertices("unknown")), 0)
+        self.assertEqual(self.graph.count_vertices("app"), 2)
+        self.assertTrue(self.graph.vertex_exists(name__startswith="rip"))
+        self.assertIsNone(self.graph.first_vertex(name="nobody"))
+
+    def test_get_vertex_unknown(self):
+        self.assertRaises(KeyError, self.graph.get_vertex, 100)
+
+    def test_get_edges(self):
+        self.assertEqual(
+            set(self.graph.get_edges(self.marko)),
+            set(self.marko.get_out_edges()),
+        )
+        self.assertEqual(
+            sorted(
+                each.head.prop__name
+                for each in self.graph.get_edges(tail=self.lop)
+            ),
+            ["josh", "marko", "peter"],
+        )
+        self.assertEqual(self.graph.count_edges("knows"), 2)
+        self.assertEqual(
+            len(self.graph.get_edges(label="created", weight__gte=1.0)), 1
+        )
+
+    def test_get_or_create_vertex(self):
+        self.assertIs(
+            self.graph.get_or_create_vertex("person", name="marko"),
+            self.marko,
+        )
+        created = self.graph.get_or_create_vertex("person", name="john")
+        self.assertEqual(created.prop__name, "john")
+        self.assertIsNone(self.graph.get_or_create_vertex())
+        self.assertRaises(
+            interfaces.MultipleFoundExpectedOne,
+            self.graph.get_or_create_vertex, "person",
+        )
+
+    def test_get_or_create_edge(self):
+        self.assertIs(
+            self.graph.get_or_create_edge(self.marko, "knows", self.josh),
+            self.marko_knows_josh,
+        )
+        edge = self.graph.get_or_create_edge(
+            self.marko, "likes", ("person", {"name": "john"})
+        )
+        self.assertEqual(edge.tail.prop__name, "john")
+        self.assertEqual(self.marko.out_edge_count(), 4)
+
+    def test_duplicate_edge(self):
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.graph.add_edge, self.marko, "knows", self.josh,
+        )
+
+    def test_vertex_constraint(self):
+        self.assertItemsEqual(
+            self.graph.get_vertex_constraints(),
+            [("person", "name"), ("app", "name")],
+        )
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.graph.add_vertex, "person", name="marko",
+        )
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.josh.set_property, name="marko",
+        )
+        self.josh.set_property(name="joshua")
+        self.graph.add_vertex("person", name="josh")
+        self.assertIs(
+            self.graph.get_or_create_vertex("person", name="joshua"),
+            self.josh,
+        )
+
+    def test_composite_constraint(self):
+        self.graph.add_vertex_constraint("city", ("name", "country"))
+        self.graph.add_vertex("city", name="paris", country="fr")
+        self.graph.add_vertex("city", name="paris", country="us")
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.graph.add_vertex, "city", name="paris", country="fr",
+        )
+
+    def test_constraint_existing_violation(self):
+        self.graph.add_vertex("person", age=29)
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.graph.add_vertex_constraint, "person", "age",
+        )
+
+    def test_set_property_unknown(self):
+        self.assertRaises(
+            interfaces.UnknownEntityError,
+            self.graph.set_property, Vertex("person"), name="john",
+        )
+
+    def test_append_vertex(self):
+        vertex = Vertex("person", name="john")
+        handle = self.graph.append_vertex(vertex)
+        self.assertIsInstance(handle, ArrayVertex)
+        self.assertIs(vertex.graph, self.graph)
+        self.assertEqual(vertex.ident, handle.ident)
+        self.assertIs(self.graph.append_vertex(vertex), handle)
+
+        vertex.set_property(age=30)
+        self.assertEqual(handle.prop__age, 30)
+        self.assertEqual(vertex.properties["age"], 30)
+
+    def test_append_vertex_bound_elsewhere(self):
+        other = ArrayGraph().add_vertex("person")
+        self.assertRaises(
+            interfaces.DatabaseException, self.graph.append_vertex, other
+        )
+        vertex = Vertex("person")
+        vertex.ident = 10
+        self.assertRaises(
+            interfaces.EntityIDError, self.graph.append_vertex, vertex
+        )
+
+    def test_append_edge(self):
+        head = Vertex("person", name="john")
+        edge = self.graph.append_edge(Edge(head, "knows", self.marko))
+        self.assertIsInstance(edge, ArrayEdge)
+        self.assertEqual(edge.head.prop__name, "john")
+        self.assertIs(edge.tail, self.marko)
+        self.graph.append_edge(Edge(head, "likes", self.marko))
+        self.assertEqual(self.graph.count_vertices(name="john"), 1)
+
+    def test_remove_edge(self):
+        self.graph.remove_edge(self.marko_knows_josh)
+        self.assertNotIn(self.marko_knows_josh, self.graph)
+        self.assertEqual(self.marko_knows_josh.label, "knows")
+        self.assertIsNone(
+            self.graph._edges.properties[self.marko_knows_josh.ident]
+        )
+        self.assertEqual(self.marko.out_edge_count(), 2)
+        self.assertEqual(self.josh.in_edge_count(), 0)
+        self.assertEqual(self.graph.count_edges("knows"), 1)
+        self.assertRaises(
+            interfaces.UnknownEntityError,
+            self.graph.remove_edge, self.marko_knows_josh,
+        )
+
+    def test_remove_vertex(self):
+        self.assertRaises(
+            interfaces.VertexBoundByEdges,
+            self.graph.remove_vertex, self.vadas,
+        )
+        self.graph.remove_edge(self.vadas.get_in_edges().all()[0])
+        self.graph.remove_vertex(self.vadas)
+        self.assertNotIn(self.vadas, self.graph)
+        self.assertIsNone(self.graph._vertices.properties[self.vadas.ident])
+        self.assertEqual(self.graph.count_vertices("person"), 3)
+        self.assertIsNot(
+            self.graph.get_or_create_vertex("person", name="vadas"),
+            self.vadas,
+        )
+
+    def test_stats(self):
+        stats = self.graph.get_vertex_stats("person", "age", buckets=2)
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.distinct, 4)
+        self.assertEqual(stats.histogram, [(27, 29, 2), (32, 35, 2)])
+        stats = self.graph.get_edge_stats("created", "weight")
+        self.assertEqual(stats.count, 4)
+        composite = self.graph.get_vertex_stats("person", ("name", "age"))
+        self.assertEqual(composite.count, 4)
+        self.assertIsNone(composite.histogram)
+
+
+    def test_get_degree_distribution(self):
+        self.assertEqual(
+            self.graph.get_degree_distribution("created"),
+            {0: 3, 1: 2, 2: 1},
+        )
+        self.assertEqual(
+            self.graph.get_degree_distribution("created", "in"),
+            {0: 4, 1: 1, 3: 1},
+        )
+        self.assertEqual(
+            self.graph.get_degree_distribution(direction="both"),
+            {1: 3, 3: 3},
+        )
+        self.graph.remove_edge(self.marko_knows_josh)
+        self.assertEqual(
+            self.graph.get_degree_distribution("knows"), {0: 5, 1: 1}
+        )
+        self.assertRaises(
+            KeyError, self.graph.get_degree_distribution, None, "sideways"
+        )
+
+
+class TestArrayHandles(TestArrayGraphBase):
+    def test_properties(self):
+        self.assertEqual(self.marko.prop__age, 29)
+        self.assertRaises(AttributeError, getattr, self.marko, "prop__nope")
+        self.assertRaises(AttributeError, getattr, self.marko, "nope")
+
+    def test_properties_created(self):
+        vertex = self.graph.add_vertex("person")
+        self.assertIsNone(self.graph._vertices.properties[vertex.ident])
+        self.assertEqual(dict(vertex.properties), {})
+        vertex.properties["name"] = "john"
+        self.assertEqual(vertex.prop__name, "john")
+
+    def test_set_property(self):
+        self.marko.set_property(age=30, city="cape town")
+        self.assertEqual(
+            dict(self.marko.properties),
+            {"age": 30, "city": "cape town", "name": "marko"},
+        )
+        self.assertEqual(self.graph.first_vertex(age=30), self.marko)
+        self.assertRaises(
+            interfaces.EntityUpdateError, self.marko.set_property
+        )
+
+    def test_remove_property(self):
+        self.marko.remove_property("name")
+        self.marko.remove_property("name")
+        self.assertNotIn("name", self.marko.properties)
+        self.graph.add_vertex("person", name="marko")
+
+    def test_as_dict(self):
+        self.marko.set_property(_secret=1)
+        self.assertDictEqual(
+            self.marko.as_dict(),
+            {
+                "metadata": {"in_edge_count": 0, "out_edge_count": 3},
+                "id": self.marko.ident,
+                "label": "person",
+                "properties": {"age": 29, "name": "marko"},
+            },
+        )
+        self.assertIn("_secret", self.marko.as_dict(True)["properties"])
+        as_dict = self.marko_knows_josh.as_dict()
+        self.assertEqual(as_dict["head_id"], self.marko.ident)
+        self.assertEqual(as_dict["tail_id"], self.josh.ident)
+
+    def test_get_edges(self):
+        self.assertEqual(len(self.marko.get_out_edges()), 3)
+        self.assertEqual(len(self.marko.out_edges), 3)
+        self.assertEqual(len(self.lop.in_edges), 3)
+        self.assertEqual(len(self.marko.get_out_edges("knows")), 2)
+        self.assertEqual(
+            set(self.josh.get_both_edges()),
+            set([self.marko_knows_josh]) | set(self.josh.get_out_edges()),
+        )
+        self.assertEqual(len(self.vadas.get_out_edges()), 0)
+
+    def test_get_vertices(self):
+        self.assertEqual(
+            sorted(each.prop__name for each in self.marko.get_out_vertices(
+                "person"
+            )),
+            ["josh", "vadas"],
+        )
+        self.assertEqual(
+            sorted(each.prop__name for each in self.lop.get_in_vertices(
+                age__gt=30
+            )),
+            ["josh", "peter"],
+        )
+        self.assertEqual(
+            sorted(each.prop__name for each in self.josh.get_both_vertices()),
+            ["lop", "marko", "ripple"],
+        )
+
+    def test_get_vertices_by_edge_label(self):
+        self.assertEqual(
+            sorted(each.prop__name for each in self.marko.get_out_vertices(
+                edge_label="knows", age__gt=30
+            )),
+            ["josh"],
+        )
+        self.assertEqual(
+            sorted(each.prop__name for each in self.josh.get_both_vertices(
+                edge_label="knows"
+            )),
+            ["marko"],
+        )
+        self.assertEqual(
+            len(self.lop.get_in_vertices(edge_label="knows")), 0
+        )
+
+    def test_edge_count_by_label(self):
+        self.assertEqual(self.marko.out_edge_count("knows"), 2)
+        self.assertEqual(self.marko.out_edge_count("unknown"), 0)
+        self.assertEqual(self.lop.in_edge_count("created"), 3)
+        self.assertEqual(self.lop.in_edge_count(), 3)
+
+    def test_edge_count_by_label_follows_changes(self):
+        self.graph.remove_edge(self.marko_knows_josh)
+        self.assertEqual(self.marko.out_edge_count("knows"), 1)
+        self.assertEqual(self.josh.in_edge_count("knows"), 0)
+        self.graph.add_edge(self.josh, "knows", self.marko)
+        self.assertEqual(self.josh.out_edge_count("knows"), 1)
+        self.assertEqual(self.marko.in_edge_count("knows"), 1)
+
+    def test_add_edges(self):
+        edge = self.vadas.add_out_edge(self.lop, "created", weight=0.1)
+        self.assertIs(edge.head, self.vadas)
+        self.assertIs(edge.get_out_vertex(), self.lop)
+        edge = self.vadas.add_in_edge(self.peter, "knows")
+        self.assertIs(edge.get_in_vertex(), self.peter)
+        self.assertEqual(self.vadas.in_edge_count(), 2)
+
+    def test_entity_is_abstract(self):
+        self.assertRaises(TypeError, ArrayEntity, self.graph, 0)
+
+    def test_remove_edge(self):
+        self.josh.remove_edge(self.marko_knows_josh)
+        self.assertNotIn(self.marko_knows_josh, self.graph)
+        self.assertRaises(
+            interfaces.VertexError,
+            self.vadas.remove_edge, self.josh_created_lop,
+        )
+
+    def test_entity_set(self):
+        people = self.graph.get_vertices("person")
+        self.assertIn(self.marko, people)
+        self.assertEqual(len(people.filter(name__contains="a")), 2)
@@ -0,0 +1,151 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+# pylint: disable=protected-access
+
+import unittest2
+from ruruki.bitmaps import BLOCK_BITS, IdentBitmap
+from ruruki.entities import Vertex
+
+
+class TestIdentBitmap(unittest2.TestCase):
+    def setUp(self):
+        self.lookup = {}
+        self.vertices = []
+        for ident in range(6):
+            vertex = Vertex("person", age=ident)
+            vertex.ident = ident
+            self.lookup[ident] = vertex
+            self.vertices.append(vertex)
+        self.even = IdentBitmap(self.lookup, self.vertices[::2])
+        self.low = IdentBitmap(self.lookup, self.vertices[:3])
+
+    def test_len(self):
+        self.assertEqual(len(self.even), 3)
+
+    def test_add_twice(self):
+        self.even.add(self.vertices[0])
+        self.assertEqual(len(self.even), 3)
+
+    def test_contains(self):
+        self.assertIn(self.vertices[2], self.even)
+        self.assertNotIn(self.vertices[1], self.even)
+
+    def test_contains_other_entity_same_ident(self):
+        other = Vertex("person")
+        other.ident = 2
+        self.assertNotIn(other, self.even)
+
+    def test_contains_unbound_entity(self):
+        self.assertNotIn(Vertex("person"), self.even)
+
+    def test_iter(self):
+        self.assertEqual(list(self.even), self.vertices[::2])
+
+    def test_idents(self):
+        self.assertEqual(list(self.even.idents()), [0, 2, 4])
+
+    def test_discard(self):
+        self.even.discard(self.vertices[2])
+        self.even.discard(self.vertices[1])
+        self.assertEqual(list(self.even.idents()), [0, 4])
+        self.assertEqual(len(self.even), 2)
+
+    def test_and(self):
+        found = self.even & self.low
+        self.assertIsInstance(found, IdentBitmap)
+        self.assertEqual(list(found.idents()), [0, 2])
+        self.assertEqual(len(found), 2)
+
+    def test_and_set(self):
+        found = self.even & set(self.vertices[:3])
+        self.assertEqual(list(found.idents()), [0, 2])
+
+    def test_rand_set(self):
+        self.assertEqual(
+            set(self.vertices[:3]) & self.even,
+            set([self.vertices[0], self.vertices[2]]),
+        )
+
+    def test_or(self):
+        self.assertEqual(
+            list((self.even | self.low).idents()), [0, 1, 2, 4]
+        )
+
+    def test_sub(self):
+        self.assertEqual(list((self.even - self.low).idents()), [4])
+
+    def test_rsub_set(self):
+        self.assertEqual(
+            set(self.vertices[:3]) - self.even, set([self.vertices[1]])
+        )
+
+    def test_xor(self):
+        self.assertEqual(list((self.even ^ self.low).idents()), [1, 4])
+
+    def test_inplace(self):
+        self.even |= self.low
+        self.assertEqual(len(self.even), 4)
+        self.even &= self.low
+        self.assertEqual(list(self.even.idents()), [0, 1, 2])
+        self.even -= self.low
+        self.assertEqual(len(self.even), 0)
+
+    def test_eq(self):
+        self.assertEqual(
+            self.even, IdentBitmap(self.lookup, self.vertices[::2])
+        )
+        self.assertEqual(self.even, set(self.vertices[::2]))
+        self.assertNotEqual(self.even, self.low)
+
+    def test_clear(self):
+        self.even.clear()
+        self.assertEqual(len(self.even), 0)
+        self.assertEqual(list(self.even), [])
+
+
+class TestIdentBitmapBlocks(unittest2.TestCase):
+    def setUp(self):
+        self.lookup = {}
+        self.vertices = {}
+        for ident in (0, BLOCK_BITS - 1, BLOCK_BITS, 10 * BLOCK_BITS + 3,
+                      10 ** 9):
+            vertex = Vertex("person")
+            vertex.ident = ident
+            self.lookup[ident] = vertex
+            self.vertices[ident] = vertex
+        self.bitmap = IdentBitmap(self.lookup, self.vertices.values())
+
+    def test_only_used_blocks_kept(self):
+        self.assertEqual(len(self.bitmap._blocks), 4)
+        self.assertEqual(len(self.bitmap), 5)
+
+    def test_idents_across_blocks(self):
+        self.assertEqual(list(self.bitmap.idents()), sorted(self.vertices))
+
+    def test_contains_across_blocks(self):
+        for vertex in self.vertices.itervalues():
+            self.assertIn(vertex, self.bitmap)
+        other = Vertex("person")
+        other.ident = 2 * BLOCK_BITS
+        self.assertNotIn(other, self.bitmap)
+
+    def test_discard_drops_empty_block(self):
+        self.bitmap.discard(self.vertices[10 ** 9])
+        self.assertEqual(len(self.bitmap._blocks), 3)
+        self.assertEqual(len(self.bitmap), 4)
+
+    def test_operations_across_blocks(self):
+        other = IdentBitmap(
+            self.lookup,
+            [self.vertices[BLOCK_BITS], self.vertices[10 ** 9]],
+        )
+        self.assertEqual(
+            list((self.bitmap & other).idents()), [BLOCK_BITS, 10 ** 9]
+        )
+        self.assertEqual(
+            list((self.bitmap - other).idents()),
+            [0, BLOCK_BITS - 1, 10 * BLOCK_BITS + 3],
+        )
+        self.assertEqual(len((self.bitmap - other)._blocks), 2)
+        self.assertEqual(self.bitmap ^ other, self.bitmap - other)
+        self.assertEqual(other | self.bitmap, self.bitmap)
@@ -0,0 +1,170 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest2
+from ruruki import csr
+from ruruki.arrays import ArrayGraph
+from ruruki.graphs import Graph
+from ruruki.test_utils import helpers
+
+
+@unittest2.skipIf(csr.numpy is None, "NumPy is not installed")
+class TestCSRGraph(unittest2.TestCase):
+    graph_class = Graph
+
+    def setUp(self):
+        self.graph = self.graph_class()
+        self.graph.load(helpers.get_test_dump_graph_file_handler())
+
+        # See test_utils/small_people_graph.dump
+        self.marko = self.graph.first_vertex(name="marko")
+        self.vadas = self.graph.first_vertex(name="vadas")
+        self.lop = self.graph.first_vertex(name="lop")
+        self.josh = self.graph.first_vertex(name="josh")
+        self.ripple = self.graph.first_vertex(name="ripple")
+        self.peter = self.graph.first_vertex(name="peter")
+        self.out = self.graph.to_csr()
+        self.into = self.graph.to_csr("in")
+
+    def names(self, snapshot, positions):
+        return sorted(
+            snapshot.vertex(each).properties["name"] for each in positions
+        )
+
+    def test_counts(self):
+        self.assertEqual(len(self.out), 6)
+        self.assertEqual(self.out.edge_count, 6)
+        self.assertEqual(self.out.offsets[-1], 6)
+        self.assertEqual(self.out.direction, "out")
+        self.assertEqual(self.into.direction, "in")
+
+    def test_position(self):
+        for vertex in self.graph.get_vertices():
+            position = self.out.position(vertex)
+            self.assertEqual(self.out.position(vertex.ident), position)
+            self.assertEqual(self.out.vertex(position), vertex)
+
+    def test_position_unknown(self):
+        self.assertRaises(KeyError, self.out.position, -1)
+        self.assertRaises(KeyError, self.out.position, 1000)
+
+    def test_neighbours_of(self):
+        marko = self.out.position(self.marko)
+        self.assertEqual(
+            self.names(self.out, self.out.neighbours_of(marko)),
+            ["josh", "lop", "vadas"],
+        )
+        self.assertEqual(
+            self.names(self.out, self.out.neighbours_of(marko, "knows")),
+            ["josh", "vadas"],
+        )
+        self.assertEqual(
+            len(self.out.neighbours_of(marko, "unknown")), 0
+        )
+
+    def test_neighbours_of_in(self):
+        lop = self.into.position(self.lop)
+        self.assertEqual(
+            self.names(self.into, self.into.neighbours_of(lop)),
+            ["josh", "marko", "peter"],
+        )
+        self.assertEqual(len(self.into.neighbours_of(lop, "knows")), 0)
+
+    def test_edges_of(self):
+        josh = self.out.position(self.josh)
+        self.assertEqual(
+            sorted(self.out.edges_of(josh)),
+            sorted(edge.ident for edge in self.josh.out_edges),
+        )
+        for each in self.out.edges_of(josh, "created"):
+            edge = self.graph.get_edge(int(each))
+            self.assertEqual(edge.head, self.josh)
+            self.assertEqual(edge.label, "created")
+
+    def test_edge(self):
+        slot = self.out.offsets[self.out.position(self.peter)]
+        edge = self.out.edge(slot)
+        self.assertEqual(edge.head, self.peter)
+        self.assertEqual(edge.tail, self.lop)
+        self.assertEqual(self.out.label_names[self.out.labels[slot]],
+                         "created")
+
+    def test_degrees(self):
+        for vertex in self.graph.get_vertices():
+            position = self.out.position(vertex)
+            self.assertEqual(
+                self.out.degrees()[position], len(vertex.out_edges)
+            )
+            self.assertEqual(
+                self.out.degrees("created")[position],
+                vertex.out_edge_count("created"),
+            )
+            self.assertEqual(
+                self.into.degrees("created")[position],
+                vertex.in_edge_count("created"),
+            )
+
+    def test_distances(self):
+        distances = self.out.distances(self.out.position(self.marko))
+        self.assertEqual(
+            dict(
+                (self.out.vertex(pos).properties["name"], distance)
+                for pos, distance in enumerate(distances)
+            ),
+            {
+                "marko": 0, "vadas": 1, "josh": 1, "lop": 1,
+                "ripple": 2, "peter": -1,
+            },
+        )
+
+    def test_distances_label(self):
+        distances = self.out.distances(
+            self.out.position(self.marko), "knows"
+        )
+        self.assertEqual(distances[self.out.position(self.josh)], 1)
+        self.assertEqual(distances[self.out.position(self.lop)], -1)
+        self.assertEqual(distances[self.out.position(self.ripple)], -1)
+
+    def test_distances_in(self):
+        distances = self.into.distances(self.into.position(self.lop))
+        self.assertEqual(distances[self.into.position(self.marko)], 1)
+        self.assertEqual(distances[self.into.position(self.peter)], 1)
+        self.assertEqual(distances[self.into.position(self.vadas)], -1)
+
+    def test_frozen(self):
+        with self.assertRaises(ValueError):
+            self.out.offsets[0] = 1
+        with self.assertRaises(ValueError):
+            self.out.neighbours[0] = 1
+        self.graph.add_edge(self.peter, "knows", self.marko)
+        self.assertEqual(self.out.edge_count, 6)
+        self.assertEqual(self.graph.to_csr().edge_count, 7)
+
+    def test_removed(self):
+        self.graph.remove_edge(self.josh.out_edges.all("created")[0])
+        self.graph.remove_edge(self.vadas.in_edges.all()[0])
+        self.graph.remove_vertex(self.vadas)
+        snapshot = self.graph.to_csr()
+        self.assertEqual(len(snapshot), 5)
+        self.assertEqual(snapshot.edge_count, 4)
+        self.assertRaises(KeyError, snapshot.position, self.vadas.ident)
+
+    def test_empty(self):
+        snapshot = self.graph_class().to_csr()
+        self.assertEqual(len(snapshot), 0)
+        self.assertEqual(snapshot.edge_count, 0)
+        self.assertEqual(list(snapshot.offsets), [0])
+
+    def test_unsupported_direction(self):
+        self.assertRaises(KeyError, self.graph.to_csr, "both")
+
+    def test_without_numpy(self):
+        numpy, csr.numpy = csr.numpy, None
+        try:
+            self.assertRaises(ImportError, self.graph.to_csr)
+        finally:
+            csr.numpy = numpy
+
+
+class TestArrayCSRGraph(TestCSRGraph):
+    graph_class = ArrayGraph
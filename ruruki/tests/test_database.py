@@ -12,8 +12,9 @@ import tempfile
 import unittest2
 from ruruki import interfaces
 from ruruki.graphs import Graph, PersistentGraph
-from ruruki.entities import Entity, Edge, Vertex
+from ruruki.entities import Entity, EntitySet, Edge, Vertex
 from ruruki.entities import PersistentVertex, PersistentEdge
+from ruruki.layouts import CompactProperties
 from ruruki.test_utils import base, helpers
 
 
@@ -434,6 +435,65 @@ class TestGraph(base.TestBase):
             ),
         )
 
+    def test_get_edges_by_head_and_label(self):
+        self.assertEqual(
+            sorted(self.graph.get_edges(head=self.marko, label="knows")),
+            sorted([self.marko_knows_josh, self.marko_knows_vadas]),
+        )
+
+    def test_get_edges_by_tail_with_property(self):
+        self.assertEqual(
+            sorted(self.graph.get_edges(tail=self.lop, weight=0.4)),
+            sorted([self.marko_created_lop, self.josh_created_lop]),
+        )
+
+    def test_get_edges_by_head_and_tail(self):
+        self.graph.add_edge(self.marko, "friend", self.josh)
+        self.assertEqual(
+            sorted(self.graph.get_edges(self.marko, tail=self.josh)),
+            sorted(
+                [
+                    self.marko_knows_josh,
+                    self.marko.out_edges.all("friend")[0],
+                ]
+            ),
+        )
+        self.assertEqual(
+            sorted(self.graph.get_edges(self.josh, tail=self.marko)), []
+        )
+
+    def test_get_edges_by_head_and_tail_with_property(self):
+        self.assertEqual(
+            self.graph.get_edges(self.marko, "knows", self.josh, weight=1)
+            .all(),
+            [self.marko_knows_josh],
+        )
+        self.assertEqual(
+            self.graph.get_edges(self.marko, "knows", self.josh, weight=2)
+            .all(),
+            [],
+        )
+
+    def test_get_edges_exact(self):
+        edges = self.graph.get_edges(self.josh, "created", self.lop)
+        self.assertIsInstance(edges, EntitySet)
+        self.assertEqual(edges.all(), [self.josh_created_lop])
+        self.assertEqual(
+            self.graph.get_edges(self.josh, "knows", self.lop).all(), []
+        )
+
+    def test_get_edges_exact_removed(self):
+        self.graph.remove_edge(self.josh_created_lop)
+        self.assertEqual(
+            self.graph.get_edges(self.josh, "created", self.lop).all(), []
+        )
+
+    def test_get_edges_by_head_of_another_graph(self):
+        other = Graph()
+        head = other.add_vertex("person", name="marko")
+        other.add_edge(head, "knows", Vertex("person"))
+        self.assertEqual(self.graph.get_edges(head=head).all(), [])
+
     def test_get_edges_by_label(self):
         self.assertEqual(
             sorted(self.graph.get_edges(label="knows")),
@@ -581,6 +641,123 @@ class TestGraph(base.TestBase):
             surname="Doe",
         )
 
+    def test_composite_constraint_violation(self):
+        self.graph.add_vertex_constraint("stock", ("exchange", "symbol"))
+        self.graph.add_vertex("stock", exchange="NYSE", symbol="ABC")
+        self.graph.add_vertex("stock", exchange="LSE", symbol="ABC")
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.graph.add_vertex,
+            "stock",
+            exchange="NYSE",
+            symbol="ABC",
+        )
+
+    def test_composite_constraint_set_property_violation(self):
+        self.graph.add_vertex_constraint("stock", ("exchange", "symbol"))
+        self.graph.add_vertex("stock", exchange="NYSE", symbol="ABC")
+        stock = self.graph.add_vertex("stock", exchange="NYSE")
+        self.assertRaises(
+            interfaces.ConstraintViolation,
+            self.graph.set_property,
+            stock,
+            symbol="ABC",
+        )
+
+    def test_composite_constraint_get_or_create(self):
+        self.graph.add_vertex_constraint("stock", ["exchange", "symbol"])
+        stock = self.graph.get_or_create_vertex(
+            "stock", exchange="NYSE", symbol="ABC", price=10
+        )
+        self.assertIs(
+            self.graph.get_or_create_vertex(
+                "stock", exchange="NYSE", symbol="ABC", price=11
+            ),
+            stock,
+        )
+        self.assertIn(
+            ("stock", ("exchange", "symbol")),
+            self.graph.get_vertex_constraints(),
+        )
+        self.assertIn(
+            ("stock", ("exchange", "symbol")),
+            list(self.graph.vertices.get_indexes()),
+        )
+
+    def test_get_vertex_stats(self):
+        stats = self.graph.get_vertex_stats("person", "age", buckets=2)
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.distinct, 4)
+        self.assertEqual(sum(bucket[2] for bucket in stats.histogram), 4)
+
+    def test_get_edge_stats(self):
+        stats = self.graph.get_edge_stats("knows", "weight")
+        self.assertEqual(stats.count, 2)
+
+    def test_get_degree_distribution(self):
+        self.assertEqual(
+            self.graph.get_degree_distribution("created"),
+            {0: 3, 1: 2, 2: 1},
+        )
+        self.assertEqual(
+            self.graph.get_degree_distribution("created", "in"),
+            {0: 4, 1: 1, 3: 1},
+        )
+        self.assertEqual(
+            self.graph.get_degree_distribution(direction="both"),
+            {1: 3, 3: 3},
+        )
+        self.assertEqual(
+            self.graph.get_degree_distribution("unknown"), {0: 6}
+        )
+
+    def test_get_degree_distribution_after_remove(self):
+        self.graph.remove_edge(self.marko_knows_josh)
+        self.assertEqual(
+            self.graph.get_degree_distribution("knows"), {0: 5, 1: 1}
+        )
+
+    def test_get_degree_distribution_unknown_direction(self):
+        self.assertRaises(
+            KeyError, self.graph.get_degree_distribution, None, "sideways"
+        )
+
+    def test_iter_vertices(self):
+        self.assertEqual(
+            sorted(self.graph.iter_vertices("person", age__gt=30)),
+            sorted([self.josh, self.peter]),
+        )
+
+    def test_first_vertex(self):
+        self.assertIs(self.graph.first_vertex(name="marko"), self.marko)
+        self.assertIsNone(self.graph.first_vertex(name="sue"))
+
+    def test_vertex_exists(self):
+        self.assertTrue(self.graph.vertex_exists("app", name="lop"))
+        self.assertFalse(self.graph.vertex_exists("person", name="lop"))
+
+    def test_count_vertices(self):
+        self.assertEqual(self.graph.count_vertices("person"), 4)
+
+    def test_iter_edges(self):
+        self.assertEqual(
+            sorted(self.graph.iter_edges("knows")),
+            sorted([self.marko_knows_josh, self.marko_knows_vadas]),
+        )
+
+    def test_first_edge(self):
+        self.assertIs(
+            self.graph.first_edge("knows", weight=0.5),
+            self.marko_knows_vadas,
+        )
+
+    def test_edge_exists(self):
+        self.assertTrue(self.graph.edge_exists("created"))
+        self.assertFalse(self.graph.edge_exists("likes"))
+
+    def test_count_edges(self):
+        self.assertEqual(self.graph.count_edges("created", weight__lt=1), 3)
+
     def test_set_property_on_edge(self):
         self.graph.set_property(self.marko_knows_josh, new_prop="prop_value")
 
@@ -592,6 +769,17 @@ class TestGraph(base.TestBase):
             }
         )
 
+    def test_set_property_on_edge_updates_vertex_edges(self):
+        self.graph.set_property(self.marko_knows_josh, weight=5)
+        self.assertEqual(
+            self.marko.get_out_edges("knows", weight=5).sorted(),
+            [self.marko_knows_josh],
+        )
+        self.assertEqual(
+            self.josh.get_in_edges("knows", weight=1).sorted(),
+            [],
+        )
+
     def test_set_property_unknown_type(self):
         some_entity = Entity("SomeEntity")
         self.assertRaises(
@@ -606,6 +794,55 @@ class TestGraph(base.TestBase):
             {},
         )
 
+    def test_remove_property(self):
+        self.marko.remove_property("name")
+        self.assertDictEqual(self.marko.properties, {"age": 29})
+        self.assertEqual(
+            self.graph.get_vertices("person", name="marko").sorted(), []
+        )
+        self.assertEqual(self.graph.get_vertices(name="marko").sorted(), [])
+        self.assertEqual(
+            self.graph.get_vertices("person", age=29).sorted(),
+            [self.marko],
+        )
+
+    def test_remove_property_indexed(self):
+        self.graph.vertices.add_index("person", "age")
+        self.marko.remove_property("age")
+        self.assertEqual(
+            self.graph.get_vertices("person", age__gt=5).sorted(),
+            sorted([self.vadas, self.josh, self.peter]),
+        )
+
+    def test_remove_property_constrained(self):
+        self.graph.add_vertex_constraint("person", "name")
+        self.marko.remove_property("name")
+        self.graph.add_vertex("person", name="marko")
+        self.assertEqual(
+            len(self.graph.get_vertices("person", name="marko")), 1
+        )
+
+    def test_remove_property_on_edge(self):
+        self.marko_knows_josh.remove_property("weight")
+        self.assertEqual(
+            self.graph.get_edges(label="knows", weight=1).sorted(), []
+        )
+        self.assertEqual(
+            self.marko.get_out_edges("knows", weight=1).sorted(), []
+        )
+        self.assertEqual(
+            self.josh.get_in_edges("knows", weight=1).sorted(), []
+        )
+
+    def test_remove_property_on_an_unknown_entity(self):
+        dog = Vertex("dog", name="socks")
+        self.assertRaises(
+            interfaces.UnknownEntityError,
+            self.graph.remove_property,
+            dog,
+            "name",
+        )
+
     def test_get_vertex_constraints(self):
         self.assertEqual(
             sorted(self.graph.get_vertex_constraints()),
@@ -652,6 +889,96 @@ class TestGraph(base.TestBase):
         )
 
 
+class TestGraphInterning(unittest2.TestCase):
+    def setUp(self):
+        self.graph = Graph(intern_values=10)
+        fh = helpers.get_test_dump_graph_file_handler()
+        self.graph.load(fh)
+
+    def test_load_interns_labels_and_keys(self):
+        marko = self.graph.get_vertex(0)
+        vadas = self.graph.get_vertex(1)
+        self.assertIs(marko.label, vadas.label)
+        marko_key = [key for key in marko.properties if key == "name"][0]
+        vadas_key = [key for key in vadas.properties if key == "name"][0]
+        self.assertIs(marko_key, vadas_key)
+
+    def test_load_interns_values(self):
+        lop = self.graph.get_vertex(2)
+        ripple = self.graph.get_vertex(4)
+        self.assertIs(lop.properties["lang"], ripple.properties["lang"])
+
+    def test_add_vertex_interns_values(self):
+        first = self.graph.add_vertex("city", name="".join(["Per", "th"]))
+        second = self.graph.add_vertex("city", name="".join(["Per", "th"]))
+        self.assertIs(first.properties["name"], second.properties["name"])
+
+    def test_set_property_interns_values(self):
+        vadas = self.graph.get_vertex(1)
+        vadas.set_property(lang="".join(["ja", "va"]))
+        lop = self.graph.get_vertex(2)
+        self.assertEqual(vadas.properties["lang"], "java")
+        self.assertIsNot(vadas.properties["lang"], lop.properties["lang"])
+        josh = self.graph.get_vertex(3)
+        josh.set_property(lang="".join(["ja", "va"]))
+        self.assertIs(josh.properties["lang"], vadas.properties["lang"])
+
+    def test_values_not_interned_by_default(self):
+        graph = Graph()
+        first = graph.add_vertex("city", name="".join(["Per", "th"]))
+        second = graph.add_vertex("city", name="".join(["Per", "th"]))
+        self.assertIsNot(first.properties["name"], second.properties["name"])
+
+
+class TestGraphCompactProperties(unittest2.TestCase):
+    def setUp(self):
+        self.graph = Graph(compact_properties=True)
+        fh = helpers.get_test_dump_graph_file_handler()
+        self.graph.load(fh)
+
+    def test_layouts_shared(self):
+        marko = self.graph.get_vertex(0)
+        vadas = self.graph.get_vertex(1)
+        self.assertIsInstance(marko.properties, CompactProperties)
+        self.assertIs(marko.properties.layout, vadas.properties.layout)
+        self.assertEqual(marko.properties, {"name": "marko", "age": 29})
+        self.assertEqual(marko.prop__name, "marko")
+
+    def test_filter(self):
+        self.assertEqual(
+            self.graph.get_vertices("person", age__gt=30).sorted(limit=5),
+            [self.graph.get_vertex(3), self.graph.get_vertex(5)],
+        )
+
+    def test_set_and_remove_property(self):
+        marko = self.graph.get_vertex(0)
+        marko.set_property(city="Sydney")
+        self.assertEqual(marko.properties["city"], "Sydney")
+        self.assertEqual(
+            self.graph.get_vertices(city="Sydney").all(), [marko]
+        )
+        marko.remove_property("city")
+        self.assertEqual(marko.properties, {"name": "marko", "age": 29})
+
+    def test_dump(self):
+        tmp_file = helpers.create_tmp_file_handler()
+        self.graph.dump(tmp_file)
+        tmp_file.seek(0)
+        graph = Graph()
+        graph.load(tmp_file)
+        self.assertEqual(len(graph.vertices), len(self.graph.vertices))
+
+    def test_as_dict(self):
+        marko = self.graph.get_vertex(0)
+        self.assertEqual(
+            marko.as_dict(include_privates=True)["properties"],
+            {"name": "marko", "age": 29},
+        )
+        self.assertIsInstance(
+            marko.as_dict(include_privates=True)["properties"], dict
+        )
+
+
 class TestGraphGetOrCreateVertices(base.TestBase):
     def test_add_new(self):
         vertices = self.graph.get_vertices().all()
@@ -247,6 +247,18 @@ class TestVertex(base.TestBase, TestEntityBase):
             len(self.marko.get_out_edges()),
         )
 
+    def test_edge_count_by_label(self):
+        self.assertEqual(self.marko.out_edge_count("knows"), 2)
+        self.assertEqual(self.marko.out_edge_count("created"), 1)
+        self.assertEqual(self.marko.out_edge_count("unknown"), 0)
+        self.assertEqual(self.lop.in_edge_count("created"), 3)
+
+        self.marko.remove_edge(self.marko_knows_josh)
+        self.marko.add_out_edge(self.lop, "likes")
+        self.assertEqual(self.marko.out_edge_count("knows"), 1)
+        self.assertEqual(self.marko.out_edge_count("likes"), 1)
+        self.assertEqual(self.lop.in_edge_count("likes"), 1)
+
     def test_out_edge_count_remove_edge(self):
         edge = self.marko.get_out_edges().all()[0]
         self.marko.remove_edge(edge)
@@ -479,6 +491,34 @@ class TestVertex(base.TestBase, TestEntityBase):
             sorted([self.lop])
         )
 
+    def test_get_in_vertices_by_edge_label(self):
+        self.assertEqual(
+            self.lop.get_in_vertices(edge_label="created").sorted(),
+            sorted([self.marko, self.josh, self.peter])
+        )
+        self.assertEqual(len(self.lop.get_in_vertices(edge_label="knows")), 0)
+
+    def test_get_out_vertices_by_edge_label(self):
+        self.assertEqual(
+            self.marko.get_out_vertices(edge_label="knows").sorted(),
+            sorted([self.vadas, self.josh])
+        )
+        self.assertEqual(
+            self.marko.get_out_vertices(
+                "person", edge_label="knows", age__gt=30
+            ).sorted(),
+            sorted([self.josh])
+        )
+        self.assertEqual(
+            len(self.marko.get_out_vertices("app", edge_label="knows")), 0
+        )
+
+    def test_get_both_vertices_by_edge_label(self):
+        self.assertEqual(
+            self.josh.get_both_vertices(edge_label="created").sorted(),
+            sorted([self.lop, self.ripple])
+        )
+
     def test_get_both_vertices(self):
         self.assertEqual(
             self.josh.get_both_vertices().sorted(),
@@ -6,7 +6,11 @@
 
 import unittest2 as unittest
 from ruruki.graphs import IDGenerator
-from ruruki.entities import Vertex, EntitySet, Edge
+from ruruki.entities import Vertex, EntitySet, EntitySetView, Edge, PlanStep
+from ruruki.entities import AdjacencySet
+from ruruki.bitmaps import IdentBitmap
+from ruruki.indexes import INDEXES, IndexStats
+from ruruki.interfaces import UnknownIndexError
 from ruruki.test_utils import base
 
 
@@ -87,6 +91,30 @@ class TestEntitySet(base.TestBase):
             sorted([self.josh, self.peter])
         )
 
+    def test_remove_from_value_index(self):
+        self.container.remove(self.marko)
+        self.assertEqual(
+            self.container.filter("person", name="marko").sorted(),
+            [],
+        )
+        self.assertEqual(
+            self.container.filter("person").sorted(),
+            sorted([self.josh, self.peter])
+        )
+
+    def test_unindex(self):
+        self.container.unindex(self.marko, "name")
+        del self.marko.properties["name"]
+        self.assertEqual(
+            self.container.filter("person", name="marko").sorted(), []
+        )
+        self.assertEqual(self.container.filter(name="marko").sorted(), [])
+        self.container.remove(self.marko)
+        self.assertEqual(
+            self.container.sorted(),
+            sorted([self.josh, self.peter])
+        )
+
     def test_remove_unknown_entity_id(self):
         sue = Vertex(100, name="sue")
         self.assertRaises(
@@ -145,6 +173,139 @@ class TestEntitySet(base.TestBase):
         )
 
 
+class TestBitmapEntitySet(TestEntitySet):
+    def setUp(self):
+        super(TestBitmapEntitySet, self).setUp()
+        self.container = EntitySet(
+            [self.marko, self.josh, self.peter],
+            bitmaps=True,
+        )
+
+    def test_references_are_bitmaps(self):
+        self.assertIsInstance(
+            self.container._prop_reference["person"]["_all"], IdentBitmap
+        )
+        self.assertIsInstance(
+            self.container._value_reference["person"]["name"]["josh"],
+            IdentBitmap
+        )
+
+    def test_filter_intersects_bitmaps(self):
+        self.assertEqual(
+            self.container.filter("person", name="josh", age=32).all(),
+            [self.josh],
+        )
+
+
+class TestAdjacencySet(base.TestBase):
+    def setUp(self):
+        super(TestAdjacencySet, self).setUp()
+        self.edges = self.marko.out_edges
+
+    def test_vertex_edges(self):
+        self.assertIsInstance(self.edges, AdjacencySet)
+        self.assertIsInstance(self.marko.in_edges, AdjacencySet)
+        self.assertEqual(len(self.edges), 3)
+        self.assertEqual(len(self.marko.in_edges), 0)
+        self.assertEqual(list(self.marko.in_edges), [])
+        self.assertIn(self.marko_knows_josh, self.edges)
+        self.assertNotIn(self.josh_created_lop, self.edges)
+        self.assertNotIn(self.marko, self.edges)
+
+    def test_slots(self):
+        self.edges.filter(weight=1)
+        self.assertIsNotNone(self.edges._indexed)
+        self.assertEqual(vars(self.edges), {})
+
+    def test_partitions(self):
+        self.assertEqual(
+            sorted(self.edges.get_labels()), ["created", "knows"]
+        )
+        self.assertEqual(
+            self.edges._partitions["knows"],
+            set([self.marko_knows_josh, self.marko_knows_vadas]),
+        )
+
+    def test_filter_label(self):
+        knows = self.edges.filter("knows")
+        self.assertIsInstance(knows, AdjacencySet)
+        self.assertEqual(
+            set(knows), set([self.marko_knows_josh, self.marko_knows_vadas])
+        )
+        self.assertIs(self.edges.filter(), self.edges)
+        self.assertEqual(len(self.edges.filter("unknown")), 0)
+        self.assertEqual(self.edges.count("knows"), 2)
+        self.assertEqual(self.edges.all("created"), [self.marko_created_lop])
+        self.assertFalse(self.edges.is_indexed)
+
+    def test_filter_properties(self):
+        found = self.edges.filter("knows", weight__gt=0.6)
+        self.assertTrue(self.edges.is_indexed)
+        self.assertEqual(found.all(), [self.marko_knows_josh])
+        self.assertEqual(self.edges.count(weight__lt=0.6), 2)
+        self.assertIs(
+            self.edges.first("knows", weight=1.0), self.marko_knows_josh
+        )
+
+    def test_index_kept_up_to_date(self):
+        self.edges.filter(weight=1.0)
+        self.marko_knows_josh.set_property(weight=0.1)
+        self.assertEqual(self.edges.count(weight=1.0), 0)
+        self.assertEqual(
+            self.edges.all(weight=0.1), [self.marko_knows_josh]
+        )
+
+        self.graph.remove_edge(self.marko_knows_josh)
+        self.assertEqual(self.edges.count(weight=0.1), 0)
+        edge = self.graph.add_edge(self.marko, "knows", self.peter, weight=3)
+        self.assertEqual(self.edges.all(weight__gt=2), [edge])
+
+    def test_remove(self):
+        self.edges.remove(self.marko_created_lop)
+        self.assertEqual(self.edges.get_labels(), ["knows"])
+        self.assertRaises(KeyError, self.edges.remove, self.marko_created_lop)
+        self.edges.discard(self.marko_created_lop)
+        self.assertEqual(len(self.edges), 2)
+
+    def test_union(self):
+        both = self.josh.in_edges | self.josh.out_edges
+        self.assertIsInstance(both, AdjacencySet)
+        self.assertEqual(len(both), 3)
+
+    def test_get(self):
+        self.assertIs(
+            self.edges.get(self.marko_knows_josh.ident), self.marko_knows_josh
+        )
+        self.assertRaises(KeyError, self.edges.get, 100)
+
+    def test_sorted(self):
+        self.assertEqual(
+            self.edges.sorted(limit=2),
+            sorted(self.edges, key=lambda edge: edge.ident)[:2],
+        )
+        self.assertFalse(self.edges.is_indexed)
+        self.assertEqual(
+            self.edges.sorted("weight", reverse=True, limit=1),
+            [self.marko_knows_josh],
+        )
+
+    def test_aggregate(self):
+        self.assertEqual(self.edges.aggregate("weight", "max"), 1.0)
+        self.assertEqual(
+            self.edges.aggregate("weight", "sum", "knows"), 1.5
+        )
+        self.assertFalse(self.edges.is_indexed)
+        self.assertEqual(
+            self.edges.aggregate("weight", "min", weight__lt=1), 0.4
+        )
+
+    def test_get_indexes(self):
+        self.assertEqual(
+            sorted(self.edges.get_indexes()),
+            [("created", "weight"), ("knows", "weight")],
+        )
+
+
 class FilteringBase(unittest.TestCase):
     def setUp(self):
         id_generator = IDGenerator()
@@ -265,6 +426,186 @@ class TestFiltering(FilteringBase):
         )
 
 
+class TestEntitySetView(FilteringBase):
+    def setUp(self):
+        super(TestEntitySetView, self).setUp()
+        self.view = self.container.filter(surname="Jones")
+
+    def test_filter_returns_view(self):
+        self.assertIsInstance(self.view, EntitySetView)
+
+    def test_lazy_evaluation(self):
+        self.assertIsNone(self.view._entities)
+        self.assertEqual(len(self.view), 2)
+        self.assertIsNotNone(self.view._entities)
+
+    def test_snapshot_when_parent_changes(self):
+        sue = Vertex("Sister", name="Sue", surname="Jones")
+        sue.ident = 100
+        self.container.add(sue)
+        self.container.remove(self.john)
+        self.assertEqual(
+            self.view.sorted(),
+            sorted([self.marko, self.john]),
+        )
+
+    def test_chained_filter_on_parent(self):
+        view = self.view.filter("Father", age=30)
+        self.assertIs(view._parent, self.container)
+        self.assertEqual(view.sorted(), [self.marko])
+
+    def test_chained_filter_conflicting_labels(self):
+        self.assertEqual(
+            self.container.filter("Father").filter("Brother").sorted(),
+            [],
+        )
+
+    def test_chained_filter_on_evaluated_view(self):
+        self.assertEqual(len(self.view), 2)
+        view = self.view.filter("Brother", name__startswith="J")
+        self.assertIs(view._parent, self.view)
+        self.assertEqual(view.sorted(), [self.john])
+
+    def test_chained_filter_snapshot_when_view_changes(self):
+        self.assertEqual(len(self.view), 2)
+        view = self.view.filter(age=30)
+        self.view.remove(self.john)
+        self.assertEqual(view.sorted(), sorted([self.marko, self.john]))
+
+    def test_add_materializes(self):
+        self.view.add(self.peter)
+        self.assertIsInstance(self.view._materialized, EntitySet)
+        self.assertEqual(
+            self.view.sorted(),
+            sorted([self.marko, self.john, self.peter]),
+        )
+        self.assertEqual(self.view.filter("Uncle").sorted(), [self.peter])
+        self.assertNotIn(self.peter, self.container.filter(surname="Jones"))
+
+    def test_remove_materializes(self):
+        self.view.remove(self.john)
+        self.assertEqual(self.view.sorted(), [self.marko])
+        self.assertIn(self.john, self.container)
+
+    def test_copy(self):
+        copy = self.view.copy()
+        self.assertIsInstance(copy, EntitySet)
+        self.assertEqual(copy.sorted(), sorted([self.marko, self.john]))
+        self.assertIsNone(self.view._materialized)
+
+    def test_union(self):
+        union = self.view | self.container.filter("Uncle")
+        self.assertIsInstance(union, EntitySet)
+        self.assertEqual(union.sorted(), self.container.sorted())
+
+    def test_get(self):
+        self.assertEqual(self.view.get(self.john.ident), self.john)
+        self.assertRaises(KeyError, self.view.get, self.peter.ident)
+
+    def test_get_labels(self):
+        self.assertEqual(
+            sorted(self.view.get_labels()),
+            ["Brother", "Father"],
+        )
+
+    def test_get_indexes(self):
+        self.assertEqual(
+            sorted(self.view.get_indexes()),
+            sorted(
+                [
+                    ("Brother", "age"),
+                    ("Brother", "name"),
+                    ("Brother", "surname"),
+                    ("Father", "age"),
+                    ("Father", "name"),
+                    ("Father", "surname"),
+                ]
+            ),
+        )
+
+
+class TestFilterPlanner(FilteringBase):
+    def setUp(self):
+        super(TestFilterPlanner, self).setUp()
+        self.sons = []
+        for age in range(20):
+            son = Vertex("Father", name="Son", surname="Jones", age=age)
+            son.ident = 100 + age
+            self.container.add(son)
+            self.sons.append(son)
+        self.container.add_index("Father", "age")
+
+    def test_explain_orders_by_estimate(self):
+        self.assertEqual(
+            self.container.explain(
+                "Father", surname="Jones", name="Marko", age__ge=19
+            ),
+            [
+                PlanStep("name", None, "Marko", "value", 1, False),
+                PlanStep("age", "ge", 19, "sorted", 2, False),
+                PlanStep("surname", None, "Jones", None, 21, True),
+            ],
+        )
+
+    def test_explain_unindexed(self):
+        self.assertEqual(
+            self.container.explain("Father", name__contains="o"),
+            [PlanStep("name", "contains", "o", None, 21, True)],
+        )
+
+    def test_explain_without_label(self):
+        self.assertEqual(
+            self.container.explain(name="Marko"),
+            [PlanStep("name", None, "Marko", "value", 1, False)],
+        )
+
+    def test_explain_without_label_mixed_indexes(self):
+        self.assertEqual(
+            self.container.explain(age__ge=19),
+            [PlanStep("age", "ge", 19, None, 4, True)],
+        )
+
+    def test_filter_without_label_uses_indexes(self):
+        self.assertEqual(
+            self.container.filter(age__lt=2).sorted(),
+            sorted(self.sons[:2]),
+        )
+        self.assertEqual(
+            self.container.filter(name="Son", age=3).all(),
+            [self.sons[3]],
+        )
+
+    def test_explain_view(self):
+        view = self.container.filter("Father", age__lt=5)
+        self.assertEqual(
+            view.explain(name="Son"),
+            [
+                PlanStep("age", "lt", 5, "sorted", 5, False),
+                PlanStep("name", None, "Son", "value", 20, False),
+            ],
+        )
+
+    def test_filter_intersects_indexes(self):
+        self.assertEqual(
+            self.container.filter(
+                "Father", name="Son", age__ge=18, surname__startswith="J"
+            ).sorted(),
+            sorted(self.sons[18:]),
+        )
+
+    def test_filter_stops_when_empty(self):
+        self.assertEqual(
+            self.container.filter("Father", age__gt=100, name="Son").all(),
+            [],
+        )
+
+    def test_filter_missing_key(self):
+        self.assertEqual(
+            self.container.filter("Father", name="Son", job="dev").all(),
+            [],
+        )
+
+
 class TestSetOperations(FilteringBase):
     def test_union(self):
         sue = Vertex(
@@ -381,6 +722,276 @@ class TestSetOperations(FilteringBase):
         )
 
 
+class TestShortCircuitFiltering(FilteringBase):
+    def test_ifilter(self):
+        found = self.container.ifilter("Father", name="Marko")
+        self.assertNotIsInstance(found, EntitySet)
+        self.assertEqual(list(found), [self.marko])
+
+    def test_ifilter_without_label(self):
+        self.assertEqual(
+            sorted(self.container.ifilter(surname="Jones")),
+            sorted([self.marko, self.john]),
+        )
+
+    def test_ifilter_all(self):
+        self.assertEqual(
+            sorted(self.container.ifilter()),
+            sorted([self.marko, self.john, self.peter]),
+        )
+
+    def test_first(self):
+        self.assertIs(self.container.first(name__startswith="P"), self.peter)
+        self.assertIsNone(self.container.first("Father", name="Peter"))
+
+    def test_exists(self):
+        self.assertTrue(self.container.exists("Brother"))
+        self.assertFalse(self.container.exists("Sister"))
+        self.assertFalse(self.container.exists(name="Sue"))
+
+    def test_count(self):
+        self.assertEqual(self.container.count(), 3)
+        self.assertEqual(self.container.count(surname="Jones"), 2)
+        self.assertEqual(self.container.count(age__gt=25, name__ne="John"), 1)
+        self.assertEqual(self.container.count("Sister"), 0)
+
+    def test_view(self):
+        view = self.container.filter(surname="Jones")
+        self.assertEqual(view.count(), 2)
+        self.assertIs(view.first("Brother"), self.john)
+        self.assertFalse(view.exists("Uncle"))
+        self.assertEqual(list(view.ifilter(name="Marko")), [self.marko])
+
+    def test_evaluated_view(self):
+        view = self.container.filter(surname="Jones")
+        view.evaluate()
+        self.assertEqual(list(view.ifilter("Father")), [self.marko])
+        self.assertEqual(view.count(age=30), 2)
+
+    def test_view_label_conflict(self):
+        view = self.container.filter("Father")
+        self.assertEqual(list(view.ifilter("Brother")), [])
+
+
+class TestSortedPaging(FilteringBase):
+    def setUp(self):
+        super(TestSortedPaging, self).setUp()
+        self.sons = []
+        for ident, age in enumerate([5, 3, None, 3, 8, 1, None, 6] * 5):
+            son = Vertex("Son", name="Son", age=age)
+            son.ident = 100 + ident
+            self.sons.append(son)
+        self.indexed = EntitySet(self.sons)
+        self.indexed.add_index("Son", "age")
+        self.unindexed = EntitySet(self.sons)
+
+    def expected(self, reverse=False):
+        def position(entity):
+            age = entity.properties["age"]
+            if age is None:
+                return (1, entity.ident)
+            return (0, age, entity.ident)
+        return sorted(self.sons, key=position, reverse=reverse)
+
+    def pages(self, container, size, **kwargs):
+        found = []
+        page = container.sorted(limit=size, **kwargs)
+        while page:
+            found.extend(page)
+            page = container.sorted(limit=size, cursor=page[-1], **kwargs)
+        return found
+
+    def test_sorted_unchanged(self):
+        self.assertEqual(
+            self.container.sorted(),
+            sorted([self.marko, self.john, self.peter]),
+        )
+        self.assertEqual(
+            self.container.sorted(key=lambda each: each.ident, reverse=True),
+            [self.peter, self.john, self.marko],
+        )
+
+    def test_limit(self):
+        self.assertEqual(
+            self.container.sorted(limit=2),
+            [self.marko, self.john],
+        )
+
+    def test_offset(self):
+        for container in [self.indexed, self.unindexed]:
+            self.assertEqual(
+                container.sorted("age", limit=3, offset=4),
+                self.expected()[4:7],
+            )
+
+    def test_property_key(self):
+        for container in [self.indexed, self.unindexed]:
+            self.assertEqual(container.sorted("age"), self.expected())
+            self.assertEqual(
+                container.sorted("age", reverse=True),
+                self.expected(reverse=True),
+            )
+
+    def test_cursor(self):
+        for container in [self.indexed, self.unindexed]:
+            self.assertEqual(self.pages(container, 3, key="age"),
+                             self.expected())
+            self.assertEqual(
+                self.pages(container, 3, key="age", reverse=True),
+                self.expected(reverse=True),
+            )
+
+    def test_cursor_callable_key(self):
+        key = lambda each: each.properties["name"]
+        self.assertEqual(
+            self.pages(self.indexed, 7, key=key),
+            sorted(self.sons, key=lambda each: each.ident),
+        )
+
+    def test_index_order_used(self):
+        expected = self.expected()[:3]
+        for son in self.sons:
+            son.properties["age"] = -1
+        # the index was not updated, so reading it gives the old order.
+        self.assertEqual(self.indexed.sorted("age", limit=3), expected)
+
+    def test_filtered(self):
+        view = self.indexed.filter("Son", age__gt=3)
+        self.assertEqual(
+            view.sorted("age", limit=4, offset=1),
+            [son for son in self.expected()
+             if son.properties["age"] > 3][1:5],
+        )
+
+    def test_filtered_evaluated(self):
+        view = self.indexed.filter("Son", age__gt=3)
+        view.evaluate()
+        self.assertEqual(
+            self.pages(view.filter(age__lt=8), 2, key="age"),
+            [son for son in self.expected()
+             if 3 < son.properties["age"] < 8],
+        )
+
+    def test_view_label_conflict(self):
+        view = self.indexed.filter("Son")
+        self.assertEqual(view.filter("Father").sorted(limit=1), [])
+
+
+class TestNativeSetOperations(FilteringBase):
+    def setUp(self):
+        super(TestNativeSetOperations, self).setUp()
+        self.container.add_index("Father", "age")
+        self.sue = Vertex("Sister", name="Sue", age=20)
+        self.sue.ident = 10
+        self.other = EntitySet([self.sue, self.marko])
+
+    def test_union_keeps_indexes(self):
+        union = self.container | self.other
+        self.assertIsInstance(union, EntitySet)
+        self.assertEqual(
+            union.explain("Father", age__gt=3)[0].index,
+            "sorted",
+        )
+        self.assertEqual(union.filter("Sister", name="Sue").all(), [self.sue])
+        self.assertEqual(len(self.container), 3)
+
+    def test_union_merges_other_indexes(self):
+        self.other.add_index("Sister", "age")
+        union = self.container | self.other
+        self.assertEqual(
+            union.explain("Sister", age__lt=30)[0].index,
+            "sorted",
+        )
+        self.assertEqual(union.filter("Sister", age__lt=30).all(), [self.sue])
+
+    def test_union_conflict(self):
+        dup = Vertex("Sister", name="Dup")
+        dup.ident = self.marko.ident
+        self.assertRaises(KeyError, self.container.__or__, EntitySet([dup]))
+
+    def test_union_with_view(self):
+        union = self.container | self.other.filter("Sister")
+        self.assertEqual(len(union), 4)
+
+    def test_union_with_list(self):
+        self.assertEqual(len(self.container | [self.sue]), 4)
+
+    def test_union_does_not_share_references(self):
+        union = self.container | self.other
+        union.remove(self.marko)
+        self.assertEqual(
+            self.container.filter("Father", name="Marko").all(),
+            [self.marko],
+        )
+
+    def test_intersection_keeps_indexes(self):
+        intersection = self.container & self.other
+        self.assertEqual(intersection.all(), [self.marko])
+        self.assertEqual(
+            intersection.filter("Father", age__gt=3).all(),
+            [self.marko],
+        )
+        self.assertEqual(intersection.filter("Brother").all(), [])
+
+    def test_difference_keeps_references(self):
+        diff = self.container - self.other
+        self.assertEqual(
+            diff.filter(surname="Jones").sorted(),
+            sorted([self.john]),
+        )
+        self.assertEqual(diff.filter("Uncle").all(), [self.peter])
+
+    def test_in_place_union(self):
+        self.container |= self.other
+        self.assertEqual(len(self.container), 4)
+        self.assertEqual(
+            self.container.filter("Sister", name="Sue").all(), [self.sue]
+        )
+
+    def test_in_place_union_updates_indexes(self):
+        son = Vertex("Father", name="Son", age=1)
+        son.ident = 11
+        self.container |= EntitySet([son])
+        self.assertEqual(
+            self.container.filter("Father", age__lt=2).all(), [son]
+        )
+
+    def test_in_place_intersection(self):
+        self.container &= self.other
+        self.assertEqual(self.container.all(), [self.marko])
+        self.assertEqual(self.container.filter("Father", age=30).all(), [
+            self.marko
+        ])
+
+    def test_in_place_difference(self):
+        self.container -= self.other
+        self.assertEqual(
+            self.container.sorted(), sorted([self.john, self.peter])
+        )
+        self.assertEqual(self.container.filter(name="Marko").all(), [])
+
+    def test_bitmaps_union(self):
+        left = EntitySet([self.marko, self.john], bitmaps=True)
+        right = EntitySet([self.peter, self.sue], bitmaps=True)
+        union = left | right
+        self.assertIsInstance(
+            union._prop_reference["Father"]["_all"], IdentBitmap
+        )
+        self.assertEqual(
+            union.filter(name__startswith="P").all(),
+            [self.peter],
+        )
+        self.assertEqual(len(left), 2)
+
+    def test_bitmaps_intersection(self):
+        left = EntitySet([self.marko, self.john, self.peter], bitmaps=True)
+        intersection = left & EntitySet([self.marko, self.john, self.sue])
+        self.assertEqual(
+            intersection.filter(surname="Jones").sorted(),
+            sorted([self.marko, self.john]),
+        )
+
+
 class TestStartsWithFiltering(FilteringBase):
     def test_filter_with_label(self):
         self.assertEqual(
@@ -512,7 +1123,7 @@ class TestEndsWithFiltering(FilteringBase):
                 surname__endswith="s",
                 age=30,
             ).sorted(),
-            [self.marko, self.john],
+            sorted([self.marko, self.john]),
         )
 
     def test_filter_with_label_not_all_props_match(self):
@@ -723,6 +1334,535 @@ class TestGreaterThanFiltering(FilteringBase):
         )
 
 
+class TestSortedIndexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestSortedIndexFiltering, self).setUp()
+        self.container.add_index("Father", "age")
+        self.container.add_index("Brother", "age")
+
+    def test_add_index_unknown_kind(self):
+        self.assertRaises(
+            UnknownIndexError,
+            self.container.add_index,
+            "Father",
+            "age",
+            "unknown",
+        )
+
+    def test_add_index_twice(self):
+        self.assertIs(
+            self.container.add_index("Father", "age"),
+            self.container.add_index("Father", "age", "sorted"),
+        )
+
+    def test_filter_range(self):
+        self.assertEqual(
+            self.container.filter("Father", age__ge=30, age__lt=31).sorted(),
+            sorted([self.marko]),
+        )
+        self.assertEqual(
+            self.container.filter("Father", age__gt=30).sorted(),
+            [],
+        )
+
+    def test_filter_range_after_add(self):
+        sam = Vertex("Brother", name="Sam", age=12)
+        sam.ident = 100
+        self.container.add(sam)
+        self.assertEqual(
+            self.container.filter("Brother", age__le=12).sorted(),
+            sorted([sam]),
+        )
+
+    def test_filter_range_after_remove(self):
+        self.container.remove(self.john)
+        self.assertEqual(
+            self.container.filter("Brother", age__le=30).sorted(),
+            [],
+        )
+
+    def test_filter_range_after_update_index(self):
+        self.container.update_index(self.john, age=40)
+        self.john.properties["age"] = 40
+        self.assertEqual(
+            self.container.filter("Brother", age__gt=35).sorted(),
+            sorted([self.john]),
+        )
+        self.assertEqual(
+            self.container.filter("Brother", age__lt=35).sorted(),
+            [],
+        )
+
+    def test_filter_range_after_unindex(self):
+        self.container.unindex(self.john, "age")
+        del self.john.properties["age"]
+        self.assertEqual(
+            self.container.filter("Brother", age__gt=5).sorted(),
+            [],
+        )
+
+
+class TestStats(FilteringBase):
+    def setUp(self):
+        super(TestStats, self).setUp()
+        for age in range(4):
+            son = Vertex("Father", name="Son", age=age)
+            son.ident = 100 + age
+            self.container.add(son)
+
+    def test_get_stats(self):
+        self.assertEqual(
+            self.container.get_stats("Father", "age", buckets=2),
+            IndexStats(5, 5, [(0, 2, 3), (3, 30, 2)]),
+        )
+
+    def test_get_stats_strings(self):
+        self.assertEqual(
+            self.container.get_stats("Father", "name"),
+            IndexStats(5, 2, None),
+        )
+
+    def test_get_stats_unknown(self):
+        self.assertEqual(
+            self.container.get_stats("Dog", "age"),
+            IndexStats(0, 0, None),
+        )
+
+    def test_get_stats_composite(self):
+        self.container.add_index("Father", ("name", "age"), "composite")
+        self.assertEqual(
+            self.container.get_stats("Father", ("name", "age")),
+            IndexStats(5, 5, None),
+        )
+        self.assertEqual(
+            self.container.get_stats("Father", ("name", "surname")),
+            IndexStats(0, 0, None),
+        )
+
+    def test_get_stats_updated(self):
+        self.container.update_index(self.marko, age=0)
+        self.marko.properties["age"] = 0
+        self.assertEqual(
+            self.container.get_stats("Father", "age"),
+            IndexStats(5, 4, [(0, 0, 2), (1, 1, 1), (2, 2, 1), (3, 3, 1)]),
+        )
+
+    def test_get_stats_view(self):
+        view = self.container.filter("Father", age__lt=2)
+        self.assertEqual(
+            view.get_stats("Father", "age"),
+            IndexStats(2, 2, [(0, 0, 1), (1, 1, 1)]),
+        )
+
+
+class TestAggregate(FilteringBase):
+    def test_aggregate(self):
+        self.assertEqual(self.container.aggregate("age"), 80)
+        self.assertEqual(self.container.aggregate("age", "max"), 30)
+        self.assertEqual(
+            self.container.aggregate("age", "mean", surname="Jones"), 30.0
+        )
+        self.assertIsNone(self.container.aggregate("age", "min", "Sister"))
+
+    def test_aggregate_view(self):
+        view = self.container.filter(age__lt=30)
+        self.assertEqual(view.aggregate("age", "sum"), 20)
+        self.assertEqual(view.aggregate("age", "sum", "Father"), 0)
+        view.evaluate()
+        self.assertEqual(view.aggregate("age", "min"), 20)
+
+    def test_aggregate_unsupported(self):
+        self.assertRaises(KeyError, self.container.aggregate, "age", "mode")
+
+
+@unittest.skipIf("column" not in INDEXES, "NumPy is not installed")
+class TestColumnIndexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestColumnIndexFiltering, self).setUp()
+        for label in ["Father", "Brother", "Uncle"]:
+            self.container.add_index(label, "age", "column")
+        self.container.add_index("Father", "height", "column")
+        for ident in range(6):
+            son = Vertex("Father", name="Son", age=ident, height=100 + ident)
+            son.ident = 10 + ident
+            self.container.add(son)
+
+    def test_filter_range(self):
+        self.assertEqual(
+            sorted(self.container.filter(age__ge=4, age__lt=30)),
+            sorted(self.container.get(ident) for ident in [2, 14, 15]),
+        )
+
+    def test_explain(self):
+        step = self.container.explain("Father", age__gt=3)[0]
+        self.assertEqual(step.index, "column")
+        self.assertEqual(step.estimate, 3)
+
+    def test_filter_range_past_exact(self):
+        edge = Vertex("Father", name="Edge", age=2 ** 53)
+        edge.ident = 20
+        self.container.add(edge)
+        self.assertIsNone(
+            self.container.explain("Father", age__lt=2 ** 53 + 1)[0].index
+        )
+        self.assertEqual(
+            len(self.container.filter("Father", age__lt=2 ** 53 + 1)), 8
+        )
+        self.assertIn(
+            edge, self.container.filter("Father", age__ne=2 ** 53 + 1)
+        )
+        self.assertNotIn(
+            edge, self.container.filter("Father", age__lt=2 ** 53)
+        )
+
+    def test_filter_range_after_unindex(self):
+        son = self.container.get(15)
+        self.container.unindex(son, "age")
+        del son.properties["age"]
+        self.assertEqual(
+            sorted(self.container.filter("Father", age__gt=3)),
+            sorted([self.marko, self.container.get(14)]),
+        )
+
+    def test_aggregate_columns(self):
+        self.assertEqual(
+            self.container._column_values("Father", "height", [
+                ("age", "gt", 3),
+            ]).tolist(),
+            [104.0, 105.0],
+        )
+        self.assertEqual(
+            self.container.aggregate("height", "sum", age__gt=3), 209.0
+        )
+        self.assertEqual(
+            self.container.aggregate("age", "mean", "Father", height=102),
+            2.0,
+        )
+
+    def test_aggregate_without_columns(self):
+        self.assertIsNone(
+            self.container._column_values("Father", "age", [
+                ("name", None, "Son"),
+            ])
+        )
+        self.assertEqual(
+            self.container.aggregate("age", "sum", name="Son"), 15
+        )
+
+    def test_aggregate_after_update(self):
+        son = self.container.get(15)
+        self.container.update_index(son, height=None, age="unknown")
+        son.properties.update(height=None, age="unknown")
+        self.assertEqual(self.container.aggregate("height", "max"), 104.0)
+        self.assertEqual(self.container.aggregate("age", "max"), 30)
+        self.container.remove(self.marko)
+        self.assertEqual(self.container.aggregate("age", "max"), 30)
+        self.assertEqual(self.container.aggregate("age", "max", "Father"), 4)
+
+
+class TestCompositeIndexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestCompositeIndexFiltering, self).setUp()
+        self.container.add_index("Father", ("name", "surname"), "composite")
+
+    def test_add_index_requires_keys_tuple(self):
+        self.assertRaises(
+            UnknownIndexError,
+            self.container.add_index,
+            "Father",
+            "name",
+            "composite",
+        )
+        self.assertRaises(
+            UnknownIndexError,
+            self.container.add_index,
+            "Father",
+            ("name", "surname"),
+        )
+
+    def test_get_indexes(self):
+        self.assertIn(
+            ("Father", ("name", "surname")),
+            list(self.container.get_indexes()),
+        )
+
+    def test_explain(self):
+        self.assertEqual(
+            self.container.explain(
+                "Father", surname="Jones", name="Marko", age__gt=3
+            ),
+            [
+                PlanStep(
+                    ("name", "surname"), "eq", ("Marko", "Jones"),
+                    "composite", 1, False
+                ),
+                PlanStep("age", "gt", 3, None, 1, True),
+            ],
+        )
+
+    def test_filter(self):
+        self.assertEqual(
+            self.container.filter(
+                "Father", name="Marko", surname="Jones"
+            ).all(),
+            [self.marko],
+        )
+        self.assertEqual(
+            self.container.filter(
+                "Father", name="Marko", surname="Smith"
+            ).all(),
+            [],
+        )
+
+    def test_filter_after_unindex(self):
+        self.container.unindex(self.marko, "surname")
+        del self.marko.properties["surname"]
+        self.assertEqual(
+            self.container.filter(
+                "Father", name="Marko", surname="Jones"
+            ).all(),
+            [],
+        )
+
+    def test_filter_updated_property(self):
+        self.container.update_index(self.marko, surname="Smith")
+        self.marko.properties["surname"] = "Smith"
+        self.assertEqual(
+            self.container.filter(
+                "Father", name="Marko", surname="Jones"
+            ).all(),
+            [],
+        )
+        self.assertEqual(
+            self.container.filter(
+                "Father", name="Marko", surname="Smith"
+            ).all(),
+            [self.marko],
+        )
+
+    def test_filter_removed_entity(self):
+        self.container.remove(self.marko)
+        index = self.container._indexes["Father"][("name", "surname")]
+        self.assertEqual(len(index["composite"]), 0)
+
+
+class TestInFiltering(FilteringBase):
+    def test_filter_in(self):
+        self.assertEqual(
+            self.container.filter(name__in=["Marko", "Peter", "Sue"]).sorted(),
+            sorted([self.marko, self.peter]),
+        )
+        self.assertEqual(
+            self.container.filter("Brother", age__in=set([20, 30])).all(),
+            [self.john],
+        )
+        self.assertEqual(self.container.filter(name__in=[]).all(), [])
+
+    def test_filter_in_generator(self):
+        self.assertEqual(
+            self.container.filter(
+                age__in=(age for age in [20])
+            ).all(),
+            [self.peter],
+        )
+
+    def test_filter_in_unhashable(self):
+        self.assertEqual(
+            self.container.filter(name__in=[["Marko"], "John"]).all(),
+            [self.john],
+        )
+
+    def test_filter_in_string(self):
+        self.assertRaises(
+            TypeError, self.container.filter(name__in="Marko").all
+        )
+        self.assertRaises(
+            TypeError, self.container.filter(name__in=u"Marko").all
+        )
+
+    def test_explain(self):
+        self.assertEqual(
+            self.container.explain("Father", name__in=["Marko", "Sam"]),
+            [PlanStep("name", "in", ("Marko", "Sam"), "value", 1, False)],
+        )
+
+
+class TestRegexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestRegexFiltering, self).setUp()
+        self.mary = Vertex("Father", name="Mary", surname="Jones", age=3)
+        self.mary.ident = 10
+        self.container.add(self.mary)
+
+    def test_filter_regex(self):
+        self.assertEqual(
+            self.container.filter(name__regex="^Mar[ky]").sorted(),
+            sorted([self.marko, self.mary]),
+        )
+        self.assertEqual(
+            self.container.filter(name__regex="^mar").all(), []
+        )
+
+    def test_filter_iregex(self):
+        self.assertEqual(
+            self.container.filter("Father", name__iregex="RKO$").all(),
+            [self.marko],
+        )
+
+    def test_filter_regex_prefix_index(self):
+        self.container.add_index("Father", "name", "prefix")
+        self.assertEqual(
+            self.container.explain("Father", name__regex="^Mark"),
+            [PlanStep("name", "regex", "^Mark", "prefix", 1, True)],
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__regex="^Mar.$").all(),
+            [self.mary],
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__iregex="^MAR.o").all(),
+            [self.marko],
+        )
+
+    def test_filter_regex_trigram_index(self):
+        self.container.add_index("Father", "name", "trigram")
+        self.assertEqual(
+            self.container.explain("Father", name__iregex="a.*RKO"),
+            [PlanStep("name", "iregex", "a.*RKO", "trigram", 1, True)],
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__iregex="a.*RKO").all(),
+            [self.marko],
+        )
+
+    def test_filter_regex_unindexed(self):
+        self.container.add_index("Father", "name", "prefix")
+        self.assertEqual(
+            self.container.explain("Father", name__regex="Mar|Jo"),
+            [PlanStep("name", "regex", "Mar|Jo", None, 2, True)],
+        )
+
+
+class TestPrefixIndexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestPrefixIndexFiltering, self).setUp()
+        self.container.add_index("Father", "name", "prefix")
+
+    def test_filter_startswith(self):
+        self.assertEqual(
+            self.container.filter("Father", name__startswith="Ma").sorted(),
+            sorted([self.marko]),
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__startswith="ma").sorted(),
+            [],
+        )
+
+    def test_filter_istartswith(self):
+        self.assertEqual(
+            self.container.filter("Father", name__istartswith="MA").sorted(),
+            sorted([self.marko]),
+        )
+
+    def test_filter_startswith_after_update_index(self):
+        self.container.update_index(self.marko, name="Polo")
+        self.marko.properties["name"] = "Polo"
+        self.assertEqual(
+            self.container.filter("Father", name__startswith="Po").sorted(),
+            sorted([self.marko]),
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__startswith="Ma").sorted(),
+            [],
+        )
+
+    def test_filter_startswith_after_unindex(self):
+        self.container.unindex(self.marko, "name")
+        del self.marko.properties["name"]
+        self.assertEqual(
+            self.container.filter("Father", name__startswith="Ma").sorted(),
+            [],
+        )
+
+
+class TestTrigramIndexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestTrigramIndexFiltering, self).setUp()
+        self.container.add_index("Father", "name", "trigram")
+
+    def test_filter_contains(self):
+        self.assertEqual(
+            self.container.filter("Father", name__contains="ark").sorted(),
+            sorted([self.marko]),
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__contains="ARK").sorted(),
+            [],
+        )
+
+    def test_filter_icontains(self):
+        self.assertEqual(
+            self.container.filter("Father", name__icontains="ARK").sorted(),
+            sorted([self.marko]),
+        )
+
+    def test_filter_contains_short_value(self):
+        self.assertEqual(
+            self.container.filter("Father", name__contains="k").sorted(),
+            sorted([self.marko]),
+        )
+
+    def test_filter_contains_after_unindex(self):
+        self.container.unindex(self.marko, "name")
+        del self.marko.properties["name"]
+        self.assertEqual(
+            self.container.filter("Father", name__contains="ark").sorted(),
+            [],
+        )
+
+
+class TestCaseFoldIndexFiltering(FilteringBase):
+    def setUp(self):
+        super(TestCaseFoldIndexFiltering, self).setUp()
+        self.container.add_index("Father", "name", "casefold")
+
+    def test_filter_ieq(self):
+        self.assertEqual(
+            self.container.filter("Father", name__ieq="MARKO").sorted(),
+            sorted([self.marko]),
+        )
+
+    def test_filter_ine(self):
+        self.assertEqual(
+            self.container.filter("Father", name__ine="MARKO").sorted(),
+            [],
+        )
+
+    def test_filter_iendswith(self):
+        self.assertEqual(
+            self.container.filter("Father", name__iendswith="RKO").sorted(),
+            sorted([self.marko]),
+        )
+
+    def test_filter_endswith(self):
+        self.assertEqual(
+            self.container.filter("Father", name__endswith="RKO").sorted(),
+            [],
+        )
+        self.assertEqual(
+            self.container.filter("Father", name__endswith="rko").sorted(),
+            sorted([self.marko]),
+        )
+
+    def test_filter_ieq_after_unindex(self):
+        self.container.unindex(self.marko, "name")
+        del self.marko.properties["name"]
+        self.assertEqual(
+            self.container.filter("Father", name__ieq="MARKO").sorted(),
+            [],
+        )
+
+
 class TestNotEqualFiltering(FilteringBase):
     def test_filter_not_equal(self):
         self.assertEqual(
@@ -749,3 +1889,28 @@ class TestEqualFiltering(FilteringBase):
             self.container.filter(name__ieq="marko").sorted(),
             sorted([self.marko]),
         )
+
+    def test_filter_equal_after_update_index(self):
+        self.container.update_index(self.marko, name="Polo")
+        self.marko.properties["name"] = "Polo"
+        self.assertEqual(
+            self.container.filter("Father", name="Polo").sorted(),
+            sorted([self.marko]),
+        )
+        self.assertEqual(
+            self.container.filter("Father", name="Marko").sorted(),
+            [],
+        )
+
+    def test_filter_equal_unhashable_value(self):
+        sue = Vertex("Father", name=["Sue", "Sam"])
+        sue.ident = 100
+        self.container.add(sue)
+        self.assertEqual(
+            self.container.filter("Father", name=["Sue", "Sam"]).sorted(),
+            sorted([sue]),
+        )
+        self.assertEqual(
+            self.container.filter("Father", name="Marko").sorted(),
+            sorted([self.marko]),
+        )
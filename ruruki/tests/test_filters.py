@@ -0,0 +1,279 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+# pylint: disable=protected-access
+
+import unittest2
+from ruruki import filters
+from ruruki.entities import Vertex, EntitySet
+
+
+class TestCompileFilter(unittest2.TestCase):
+    def setUp(self):
+        self.cache_size = filters.CACHE_SIZE
+        filters._CACHE.clear()
+
+    def tearDown(self):
+        filters.CACHE_SIZE = self.cache_size
+        filters._CACHE.clear()
+
+    def test_cached(self):
+        self.assertIs(
+            filters.compile_filter("person", "name", "age__gt"),
+            filters.compile_filter("person", "name", "age__gt"),
+        )
+
+    def test_cached_any_key_order(self):
+        self.assertIs(
+            filters.compile_filter("person", "name", "age__gt"),
+            filters.compile_filter("person", "age__gt", "name"),
+        )
+
+    def test_split_predicates_keyed_by_label(self):
+        compiled = filters.compile_filter("person", "name", "age__gt")
+        self.assertEqual(
+            filters.split_predicates(
+                [("age__gt", 1), ("name", "x")], "person"
+            ),
+            [("age", "gt", 1), ("name", None, "x")],
+        )
+        self.assertEqual(
+            filters._CACHE.keys(),
+            [("person", frozenset(["name", "age__gt"]))],
+        )
+        self.assertIs(filters._CACHE.values()[0], compiled)
+
+    def test_different_signature(self):
+        self.assertIsNot(
+            filters.compile_filter("person", "name"),
+            filters.compile_filter("dog", "name"),
+        )
+
+    def test_least_recently_used_dropped(self):
+        filters.CACHE_SIZE = 2
+        name = filters.compile_filter("person", "name")
+        age = filters.compile_filter("person", "age")
+        self.assertIs(filters.compile_filter("person", "name"), name)
+        filters.compile_filter("person", "surname")
+        self.assertIs(filters.compile_filter("person", "name"), name)
+        self.assertIsNot(filters.compile_filter("person", "age"), age)
+
+
+class TestCompiledFilter(unittest2.TestCase):
+    def setUp(self):
+        self.compiled = filters.CompiledFilter(
+            "person", ["name__istartswith", "age__gt"]
+        )
+        self.marko = Vertex("person", name="Marko", age=29)
+        self.marko.ident = 0
+        self.josh = Vertex("person", name="Josh", age=32)
+        self.josh.ident = 1
+
+    def test_conditions(self):
+        self.assertEqual(
+            self.compiled.conditions(["ma", 20]),
+            [("name", "istartswith", "ma"), ("age", "gt", 20)],
+        )
+
+    def test_predicate(self):
+        predicate = self.compiled.predicate(name__istartswith="MA", age__gt=20)
+        self.assertTrue(predicate(self.marko))
+        self.assertFalse(predicate(self.josh))
+
+    def test_predicate_other_label(self):
+        predicate = self.compiled.predicate(name__istartswith="MA", age__gt=20)
+        self.assertFalse(predicate(Vertex("dog", name="Max", age=30)))
+
+    def test_predicate_missing_property(self):
+        predicate = self.compiled.predicate(name__istartswith="MA", age__gt=20)
+        self.assertFalse(predicate(Vertex("person", name="Mary")))
+
+    def test_predicate_wrong_keys(self):
+        self.assertRaises(
+            TypeError,
+            self.compiled.predicate,
+            name__istartswith="MA",
+        )
+
+    def test_filter(self):
+        container = EntitySet([self.marko, self.josh])
+        self.assertEqual(
+            self.compiled.filter(
+                container, name__istartswith="j", age__gt=30
+            ).all(),
+            [self.josh],
+        )
+
+    def test_filter_reuses_compiled(self):
+        filters._CACHE.clear()
+        compiled = filters.compile_filter(
+            "person", "name__istartswith", "age__gt"
+        )
+        container = EntitySet([self.marko, self.josh])
+        self.assertEqual(
+            compiled.filter(
+                container, name__istartswith="m", age__gt=20
+            ).all(),
+            [self.marko],
+        )
+        self.assertEqual(filters._CACHE.values(), [compiled])
+
+    def test_filter_wrong_keys(self):
+        self.assertRaises(
+            TypeError,
+            self.compiled.filter,
+            EntitySet([self.marko]),
+            name__istartswith="MA",
+        )
+
+    def test_split(self):
+        self.assertEqual(
+            self.compiled.split([("age__gt", 20), ("name__istartswith", "m")]),
+            [("age", "gt", 20), ("name", "istartswith", "m")],
+        )
+
+    def test_checks_reused(self):
+        conditions = self.compiled.conditions(["ma", 20])
+        checks = self.compiled.checks(conditions)
+        self.assertIs(self.compiled.checks(list(conditions)), checks)
+        self.assertIsNot(
+            self.compiled.checks(self.compiled.conditions(["ma", 20.0])),
+            checks,
+        )
+        self.assertIsNot(
+            self.compiled.checks(self.compiled.conditions(["jo", 20])),
+            checks,
+        )
+
+
+class TestChecks(unittest2.TestCase):
+    def test_split_predicates(self):
+        self.assertEqual(
+            filters.split_predicates([("name__ieq", "x"), ("age", 1)]),
+            [("name", "ieq", "x"), ("age", None, 1)],
+        )
+
+    def test_match(self):
+        checks = filters.compile_checks(
+            [("name", "icontains", "ARK"), ("age", None, 29)]
+        )
+        self.assertTrue(
+            filters.match(Vertex("person", name="Marko", age=29), checks)
+        )
+        self.assertFalse(
+            filters.match(Vertex("person", name="Marko", age=30), checks)
+        )
+
+    def test_split_predicates_in(self):
+        self.assertEqual(
+            filters.split_predicates([("age__in", iter([1, 2]))]),
+            [("age", "in", (1, 2))],
+        )
+
+    def test_split_predicates_in_string(self):
+        self.assertRaises(
+            TypeError, filters.split_predicates, [("name__in", "marko")]
+        )
+
+    def test_match_in(self):
+        checks = filters.compile_checks([("age", "in", (29, 30))])
+        self.assertTrue(filters.match(Vertex("person", age=29), checks))
+        self.assertFalse(filters.match(Vertex("person", age=31), checks))
+        self.assertFalse(filters.match(Vertex("person", age=[29]), checks))
+
+    def test_match_in_unhashable(self):
+        checks = filters.compile_checks([("tags", "in", ([1], [2]))])
+        self.assertTrue(filters.match(Vertex("person", tags=[2]), checks))
+
+    def test_match_regex(self):
+        checks = filters.compile_checks([("name", "regex", r"^Ma\w+o$")])
+        self.assertTrue(filters.match(Vertex("person", name="Marko"), checks))
+        self.assertFalse(filters.match(Vertex("person", name="marko"), checks))
+        self.assertFalse(filters.match(Vertex("person", name=5), checks))
+
+    def test_match_iregex(self):
+        checks = filters.compile_checks([("name", "iregex", r"\bARK")])
+        self.assertFalse(filters.match(Vertex("person", name="Marko"), checks))
+        self.assertTrue(filters.match(Vertex("person", name="Ark"), checks))
+
+    def test_operators(self):
+        self.assertTrue(filters.OPERATORS["in"](1, [1, 2], False))
+        self.assertFalse(filters.OPERATORS["in"]([1], [1, 2], False))
+        self.assertTrue(filters.OPERATORS["iregex"]("Marko", "^ma", True))
+        self.assertFalse(filters.OPERATORS["regex"]("Marko", "^ma", False))
+
+    def test_match_none_value(self):
+        checks = filters.compile_checks([("age", "ne", 29)])
+        self.assertFalse(filters.match(Vertex("person", age=None), checks))
+
+    def test_scan_plan(self):
+        self.assertEqual(
+            filters.scan_plan(10, [("name__ieq", "x")]),
+            [filters.PlanStep("name", "ieq", "x", None, 10, True)],
+        )
+
+    def test_merge_plans(self):
+        self.assertEqual(
+            filters.merge_plans([
+                [
+                    filters.PlanStep("name", None, "x", "value", 2, False),
+                    filters.PlanStep("age", "gt", 3, "sorted", 5, False),
+                ],
+                [
+                    filters.PlanStep("age", "gt", 3, None, 1, True),
+                    filters.PlanStep("name", None, "x", "value", 1, False),
+                ],
+            ]),
+            [
+                filters.PlanStep("name", None, "x", "value", 3, False),
+                filters.PlanStep("age", "gt", 3, None, 6, True),
+            ],
+        )
+
+
+class TestPatterns(unittest2.TestCase):
+    def test_compile_pattern_cached(self):
+        compiled = filters.compile_pattern("^a+$")
+        self.assertIs(filters.compile_pattern("^a+$"), compiled)
+        self.assertIsNot(filters.compile_pattern("^a+$", True), compiled)
+
+    def test_compile_pattern_compiled(self):
+        compiled = filters.compile_pattern("abc")
+        self.assertIs(filters.compile_pattern(compiled), compiled)
+        self.assertTrue(
+            filters.compile_pattern(compiled, True).search("ABC")
+        )
+
+    def test_compile_pattern_evicts(self):
+        cache_size = filters.CACHE_SIZE
+        filters.CACHE_SIZE = 2
+        try:
+            filters.compile_pattern("a")
+            filters.compile_pattern("b")
+            filters.compile_pattern("c")
+            self.assertEqual(len(filters._PATTERNS), 2)
+        finally:
+            filters.CACHE_SIZE = cache_size
+
+    def test_regex_literals(self):
+        self.assertEqual(
+            filters.regex_literals(r"^Mar\w+ko"),
+            ("Mar", ["Mar", "ko"], False),
+        )
+        self.assertEqual(
+            filters.regex_literals("(?i)abc.d"),
+            (None, ["abc", "d"], True),
+        )
+        self.assertEqual(
+            filters.regex_literals("^a?bc", True),
+            (None, ["bc"], True),
+        )
+
+    def test_regex_literals_alternatives(self):
+        self.assertEqual(
+            filters.regex_literals("^ab|cd"), (None, [], False)
+        )
+
+    def test_regex_literals_multiline(self):
+        self.assertEqual(
+            filters.regex_literals("(?m)^abc"), (None, ["abc"], False)
+        )
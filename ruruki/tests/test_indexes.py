@@ -0,0 +1,510 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest2
+from ruruki import indexes
+from ruruki.entities import Vertex
+from ruruki.indexes import SortedIndex, PrefixIndex, TrigramIndex
+from ruruki.indexes import CaseFoldIndex, CompositeIndex, ColumnIndex
+from ruruki.indexes import aggregate_values, equi_depth_histogram
+
+
+class TestSortedIndex(unittest2.TestCase):
+    def setUp(self):
+        self.index = SortedIndex()
+        self.young = Vertex("person", age=10)
+        self.old = Vertex("person", age=50)
+        self.twin_a = Vertex("person", age=30)
+        self.twin_b = Vertex("person", age=30)
+        for each in [self.old, self.twin_a, self.young, self.twin_b]:
+            self.index.add(each, each.properties["age"])
+
+    def test_len(self):
+        self.assertEqual(len(self.index), 4)
+
+    def test_add_none_value(self):
+        self.index.add(Vertex("person", age=None), None)
+        self.assertEqual(len(self.index), 4)
+
+    def test_lookup_lt(self):
+        self.assertEqual(self.index.lookup("lt", 30), set([self.young]))
+
+    def test_lookup_le(self):
+        self.assertEqual(
+            self.index.lookup("le", 30),
+            set([self.young, self.twin_a, self.twin_b]),
+        )
+
+    def test_lookup_gt(self):
+        self.assertEqual(self.index.lookup("gt", 30), set([self.old]))
+
+    def test_lookup_ge(self):
+        self.assertEqual(
+            self.index.lookup("ge", 30),
+            set([self.old, self.twin_a, self.twin_b]),
+        )
+
+    def test_lookup_unsupported_operator(self):
+        self.assertRaises(KeyError, self.index.lookup, "contains", 30)
+
+    def test_estimate(self):
+        self.assertEqual(self.index.estimate("lt", 30), 1)
+        self.assertEqual(self.index.estimate("le", 30), 3)
+        self.assertEqual(self.index.estimate("gt", 30), 1)
+        self.assertEqual(self.index.estimate("ge", 30), 3)
+
+    def test_count_prefix(self):
+        index = SortedIndex()
+        for name in ["ant", "bee", "beetle", "cat"]:
+            index.add(Vertex("animal", name=name), name)
+        self.assertEqual(index.count_prefix("bee"), 2)
+        self.assertEqual(index.count_prefix("dog"), 0)
+
+    def test_count_prefix_edges(self):
+        index = SortedIndex()
+        for name in ["a", "a\xff", "a\xff\xff", "b", "\xff"]:
+            index.add(Vertex("animal", name=name), name)
+        self.assertEqual(index.count_prefix(""), 5)
+        self.assertEqual(index.count_prefix("a"), 3)
+        self.assertEqual(index.count_prefix("a\xff"), 2)
+        self.assertEqual(index.count_prefix("\xff"), 1)
+
+    def test_count_prefix_unicode(self):
+        index = SortedIndex()
+        for name in [u"b", u"b\u00e9", u"b\u00e9t", u"c"]:
+            index.add(Vertex("animal", name=name), name)
+        self.assertEqual(index.count_prefix(u"b"), 3)
+        self.assertEqual(index.count_prefix(u"b\u00e9"), 2)
+        self.assertEqual(index.count_prefix(u"\U0010ffff"), 0)
+
+    def test_remove(self):
+        self.index.remove(self.twin_b, 30)
+        self.assertEqual(
+            self.index.lookup("ge", 30),
+            set([self.old, self.twin_a]),
+        )
+
+    def test_remove_unknown(self):
+        self.index.remove(Vertex("person", age=30), 30)
+        self.assertEqual(len(self.index), 4)
+
+    def test_build(self):
+        index = SortedIndex()
+        index.build(
+            (each, each.properties["age"])
+            for each in [self.old, self.twin_a, self.young, self.twin_b]
+        )
+        self.assertEqual(index._values, self.index._values)
+        self.assertEqual(index._entities, self.index._entities)
+
+    def test_build_merges(self):
+        middle = Vertex("person", age=20)
+        self.index.build([(middle, 20), (Vertex("person"), None)])
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index._values, [10, 20, 30, 30, 50])
+        self.assertEqual(self.index.lookup("lt", 30),
+                         set([self.young, middle]))
+
+    def test_ordered(self):
+        self.twin_a.ident = 2
+        self.twin_b.ident = 1
+        self.assertEqual(
+            list(self.index.ordered()),
+            [
+                (10, self.young),
+                (30, self.twin_b),
+                (30, self.twin_a),
+                (50, self.old),
+            ],
+        )
+
+    def test_ordered_reverse(self):
+        self.twin_a.ident = 2
+        self.twin_b.ident = 1
+        self.assertEqual(
+            [entity for _, entity in self.index.ordered(reverse=True)],
+            [self.old, self.twin_a, self.twin_b, self.young],
+        )
+
+    def test_ordered_start(self):
+        self.assertEqual(
+            [value for value, _ in self.index.ordered(start=30)],
+            [30, 30, 50],
+        )
+        self.assertEqual(
+            [value for value, _ in self.index.ordered(True, start=30)],
+            [30, 30, 10],
+        )
+
+
+class TestPrefixIndex(unittest2.TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.marko = Vertex("person", name="Marko")
+        self.mark = Vertex("person", name="mark")
+        self.john = Vertex("person", name="John")
+        for each in [self.marko, self.mark, self.john]:
+            self.index.add(each, each.properties["name"])
+
+    def test_len(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_add_non_string_value(self):
+        self.index.add(Vertex("person", name=10), 10)
+        self.assertEqual(len(self.index), 3)
+
+    def test_build(self):
+        index = PrefixIndex()
+        index.build(
+            [(each, each.properties["name"])
+             for each in [self.marko, self.mark, self.john]] +
+            [(Vertex("person", name=10), 10)]
+        )
+        self.assertEqual(len(index), 3)
+        self.assertEqual(
+            index.lookup("istartswith", "MAR"), set([self.marko, self.mark])
+        )
+        self.assertEqual(index.lookup("startswith", "J"), set([self.john]))
+
+    def test_lookup_startswith(self):
+        self.assertEqual(
+            self.index.lookup("startswith", "Mar"),
+            set([self.marko]),
+        )
+
+    def test_lookup_startswith_no_match(self):
+        self.assertEqual(self.index.lookup("startswith", "Z"), set())
+
+    def test_lookup_istartswith(self):
+        self.assertEqual(
+            self.index.lookup("istartswith", "MAR"),
+            set([self.marko, self.mark]),
+        )
+
+    def test_lookup_unsupported_operator(self):
+        self.assertRaises(KeyError, self.index.lookup, "lt", "M")
+
+    def test_estimate(self):
+        self.assertEqual(self.index.estimate("startswith", "Mar"), 1)
+        self.assertEqual(self.index.estimate("istartswith", "MAR"), 2)
+        self.assertRaises(KeyError, self.index.estimate, "lt", "M")
+
+    def test_remove(self):
+        self.index.remove(self.marko, "Marko")
+        self.assertEqual(
+            self.index.lookup("istartswith", "mar"),
+            set([self.mark]),
+        )
+
+
+class TestTrigramIndex(unittest2.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.entities = Vertex("module", name="ruruki/entities.py")
+        self.graphs = Vertex("module", name="ruruki/graphs.py")
+        self.readme = Vertex("module", name="README.md")
+        for each in [self.entities, self.graphs, self.readme]:
+            self.index.add(each, each.properties["name"])
+
+    def test_add_non_string_value(self):
+        self.index.add(Vertex("module", name=10), 10)
+        self.assertEqual(self.index.lookup("contains", "10x"), set())
+
+    def test_lookup_contains(self):
+        self.assertEqual(
+            self.index.lookup("contains", "ties"),
+            set([self.entities]),
+        )
+
+    def test_lookup_contains_superset(self):
+        # trigrams are case folded, so the candidates are a superset.
+        self.assertEqual(
+            self.index.lookup("contains", "RURUKI"),
+            set([self.entities, self.graphs]),
+        )
+
+    def test_lookup_icontains(self):
+        self.assertEqual(
+            self.index.lookup("icontains", "readme"),
+            set([self.readme]),
+        )
+
+    def test_lookup_no_match(self):
+        self.assertEqual(self.index.lookup("contains", "locks"), set())
+
+    def test_lookup_short_value(self):
+        self.assertIsNone(self.index.lookup("contains", "py"))
+
+    def test_estimate(self):
+        self.assertEqual(self.index.estimate("contains", "ruruki"), 2)
+        self.assertEqual(self.index.estimate("icontains", "locks"), 0)
+        self.assertIsNone(self.index.estimate("contains", "py"))
+        self.assertRaises(KeyError, self.index.estimate, "lt", "ruruki")
+
+    def test_lookup_unsupported_operator(self):
+        self.assertRaises(KeyError, self.index.lookup, "lt", "ruruki")
+
+    def test_remove(self):
+        self.index.remove(self.graphs, "ruruki/graphs.py")
+        self.assertEqual(
+            self.index.lookup("contains", "ruruki/"),
+            set([self.entities]),
+        )
+
+
+class TestCaseFoldIndex(unittest2.TestCase):
+    def setUp(self):
+        self.index = CaseFoldIndex()
+        self.marko = Vertex("person", name="Marko")
+        self.marko_lower = Vertex("person", name="marko")
+        self.john = Vertex("person", name="John")
+        for each in [self.marko, self.marko_lower, self.john]:
+            self.index.add(each, each.properties["name"])
+
+    def test_len(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_add_non_string_value(self):
+        self.index.add(Vertex("person", name=10), 10)
+        self.assertEqual(len(self.index), 3)
+
+    def test_lookup_ieq(self):
+        self.assertEqual(
+            self.index.lookup("ieq", "MARKO"),
+            set([self.marko, self.marko_lower]),
+        )
+
+    def test_lookup_ine(self):
+        self.assertEqual(self.index.lookup("ine", "MARKO"), set([self.john]))
+
+    def test_lookup_iendswith(self):
+        self.assertEqual(
+            self.index.lookup("iendswith", "KO"),
+            set([self.marko, self.marko_lower]),
+        )
+
+    def test_lookup_endswith_superset(self):
+        self.assertEqual(
+            self.index.lookup("endswith", "hN"),
+            set([self.john]),
+        )
+
+    def test_lookup_unsupported_operator(self):
+        self.assertRaises(KeyError, self.index.lookup, "lt", "M")
+
+    def test_estimate(self):
+        self.assertEqual(self.index.estimate("ieq", "MARKO"), 2)
+        self.assertEqual(self.index.estimate("ine", "MARKO"), 1)
+        self.assertEqual(self.index.estimate("iendswith", "KO"), 2)
+        self.assertRaises(KeyError, self.index.estimate, "lt", "M")
+
+    def test_remove(self):
+        self.index.remove(self.marko, "Marko")
+        self.assertEqual(
+            self.index.lookup("ieq", "marko"),
+            set([self.marko_lower]),
+        )
+        self.assertEqual(
+            self.index.lookup("iendswith", "rko"),
+            set([self.marko_lower]),
+        )
+
+
+class TestCompositeIndex(unittest2.TestCase):
+    def setUp(self):
+        self.index = CompositeIndex()
+        self.abc = Vertex("stock", exchange="NYSE", symbol="ABC")
+        self.xyz = Vertex("stock", exchange="NYSE", symbol="XYZ")
+        self.abc_lse = Vertex("stock", exchange="LSE", symbol="ABC")
+        for each in [self.abc, self.xyz, self.abc_lse]:
+            self.index.add(
+                each,
+                (each.properties["exchange"], each.properties["symbol"]),
+            )
+
+    def test_len(self):
+        self.assertEqual(len(self.index), 3)
+
+    def test_add_none_value(self):
+        self.index.add(Vertex("stock", exchange="LSE"), ("LSE", None))
+        self.assertEqual(len(self.index), 3)
+
+    def test_add_unhashable_value(self):
+        self.index.add(Vertex("stock"), ("LSE", ["ABC"]))
+        self.assertEqual(len(self.index), 3)
+
+    def test_lookup(self):
+        self.assertEqual(
+            self.index.lookup("eq", ("NYSE", "ABC")),
+            set([self.abc]),
+        )
+        self.assertEqual(self.index.lookup("eq", ("LSE", "XYZ")), set())
+
+    def test_lookup_unhashable_value(self):
+        self.assertIsNone(self.index.lookup("eq", ("LSE", ["ABC"])))
+
+    def test_lookup_unsupported_operator(self):
+        self.assertRaises(KeyError, self.index.lookup, "lt", ("LSE", "ABC"))
+
+    def test_estimate(self):
+        self.assertEqual(self.index.estimate("eq", ("LSE", "ABC")), 1)
+        self.assertIsNone(self.index.estimate("eq", ("LSE", ["ABC"])))
+        self.assertRaises(
+            KeyError, self.index.estimate, "lt", ("LSE", "ABC")
+        )
+
+    def test_distinct(self):
+        self.index.add(Vertex("stock"), ("LSE", "ABC"))
+        self.assertEqual(self.index.distinct(), 3)
+
+    def test_remove(self):
+        self.index.remove(self.abc, ("NYSE", "ABC"))
+        self.index.remove(self.abc, ("NYSE", ["ABC"]))
+        self.assertEqual(self.index.lookup("eq", ("NYSE", "ABC")), set())
+        self.assertEqual(len(self.index), 2)
+
+
+@unittest2.skipIf(indexes.numpy is None, "NumPy is not installed")
+class TestColumnIndex(unittest2.TestCase):
+    def setUp(self):
+        self.index = ColumnIndex()
+        self.cheap = Vertex("item", price=5)
+        self.dear = Vertex("item", price=250.5)
+        self.odd = Vertex("item", price="n/a")
+        self.huge = Vertex("item", price=2 ** 60)
+        for ident, each in enumerate(
+                [self.cheap, self.dear, self.odd, self.huge]):
+            each.ident = ident * 40
+            self.index.add(each, each.properties["price"])
+
+    def test_len(self):
+        self.assertEqual(len(self.index), 4)
+        self.index.add(Vertex("item", price=None), None)
+        self.assertEqual(len(self.index), 4)
+
+    def test_complete(self):
+        self.assertFalse(self.index.complete)
+        self.index.remove(self.odd, "n/a")
+        self.index.remove(self.huge, 2 ** 60)
+        self.assertTrue(self.index.complete)
+
+    def test_lookup(self):
+        self.assertEqual(
+            self.index.lookup("gt", 100),
+            set([self.dear, self.huge, self.odd]),
+        )
+        self.assertEqual(self.index.lookup("le", 5), set([self.cheap]))
+        self.assertEqual(self.index.lookup("eq", 250.5), set([self.dear]))
+        self.assertEqual(
+            self.index.lookup("ne", 5),
+            set([self.dear, self.odd, self.huge]),
+        )
+
+    def test_lookup_non_number(self):
+        self.assertEqual(self.index.lookup("eq", "n/a"), set([self.odd]))
+
+    def test_lookup_unsupported_operator(self):
+        self.assertRaises(KeyError, self.index.lookup, "contains", 3)
+
+    def test_estimate(self):
+        self.assertEqual(self.index.estimate("lt", 100), 3)
+        self.assertIsNone(self.index.estimate("lt", "n/a"))
+
+    def test_estimate_past_exact(self):
+        self.assertIsNone(self.index.estimate("lt", 2 ** 53 + 1))
+        self.assertIsNone(self.index.mask("ne", -2 ** 53 - 1))
+        self.assertEqual(self.index.estimate("lt", 2 ** 53), 4)
+
+    def test_mask_and_values(self):
+        mask = self.index.mask("gt", 10)
+        self.assertEqual(list(self.index.values(mask)), [250.5])
+        self.assertEqual(list(self.index.values()), [5, 250.5])
+        self.assertEqual(list(self.index.values(mask[:10])), [])
+
+    def test_remove(self):
+        self.index.remove(self.dear, 250.5)
+        self.index.remove(self.dear, 250.5)
+        self.assertEqual(self.index.lookup("gt", 100),
+                         set([self.odd, self.huge]))
+        self.assertEqual(len(self.index), 3)
+
+    def test_grow(self):
+        far = Vertex("item", price=1)
+        far.ident = 1000
+        self.index.add(far, 1)
+        self.assertEqual(
+            self.index.lookup("lt", 10), set([self.cheap, far])
+        )
+
+
+class TestAggregateValues(unittest2.TestCase):
+    def test_aggregates(self):
+        parts = [[1, 2, "a", None], [True, 3]]
+        self.assertEqual(aggregate_values("sum", parts), 6)
+        self.assertEqual(aggregate_values("min", parts), 1)
+        self.assertEqual(aggregate_values("max", parts), 3)
+        self.assertEqual(aggregate_values("mean", parts), 2.0)
+
+    def test_empty(self):
+        self.assertEqual(aggregate_values("sum", []), 0)
+        self.assertIsNone(aggregate_values("mean", [["a"]]))
+
+    def test_unsupported(self):
+        self.assertRaises(KeyError, aggregate_values, "median", [[1]])
+
+    def test_integers_stay_exact(self):
+        parts = [[2 ** 53 + 1, 1]]
+        self.assertEqual(aggregate_values("sum", parts), 2 ** 53 + 2)
+        self.assertEqual(aggregate_values("max", parts), 2 ** 53 + 1)
+        self.assertIsInstance(aggregate_values("min", parts), int)
+
+    @unittest2.skipIf(indexes.numpy is None, "NumPy is not installed")
+    def test_columns(self):
+        parts = [indexes.numpy.array([1.0, 2.0]), indexes.numpy.zeros(0)]
+        self.assertEqual(aggregate_values("sum", parts), 3.0)
+        self.assertIsNone(
+            aggregate_values("max", [indexes.numpy.zeros(0)])
+        )
+
+    @unittest2.skipIf(indexes.numpy is None, "NumPy is not installed")
+    def test_columns_and_values(self):
+        parts = [indexes.numpy.array([1.5]), [2, "a"]]
+        self.assertEqual(aggregate_values("sum", parts), 3.5)
+        self.assertEqual(aggregate_values("max", parts), 2)
+
+    def test_without_numpy(self):
+        numpy, indexes.numpy = indexes.numpy, None
+        try:
+            self.assertEqual(aggregate_values("sum", [[1, 2], [3]]), 6)
+            self.assertEqual(aggregate_values("mean", [[1, 2]]), 1.5)
+            self.assertEqual(aggregate_values("sum", []), 0)
+            self.assertIsNone(aggregate_values("max", []))
+        finally:
+            indexes.numpy = numpy
+
+
+class TestEquiDepthHistogram(unittest2.TestCase):
+    def test_even(self):
+        self.assertEqual(
+            equi_depth_histogram([(value, 1) for value in range(6)], 3),
+            [(0, 1, 2), (2, 3, 2), (4, 5, 2)],
+        )
+
+    def test_frequent_value(self):
+        self.assertEqual(
+            equi_depth_histogram([(1, 5), (2, 1), (3, 1), (4, 1)], 2),
+            [(1, 1, 5), (2, 4, 3)],
+        )
+
+    def test_fewer_values_than_buckets(self):
+        self.assertEqual(
+            equi_depth_histogram([(2.5, 1), (1, 2)], 10),
+            [(1, 1, 2), (2.5, 2.5, 1)],
+        )
+
+    def test_ignores_non_numbers(self):
+        self.assertEqual(
+            equi_depth_histogram([("a", 4), (True, 3), (7, 1)], 2),
+            [(7, 7, 1)],
+        )
+        self.assertIsNone(equi_depth_histogram([("a", 4)]))
@@ -0,0 +1,71 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+# pylint: disable=protected-access
+
+import unittest2
+from ruruki.interning import Interner
+
+
+def fresh(string):
+    """
+    Return a new string object equal to the given string.
+    """
+    return "".join(list(string))
+
+
+class TestInterner(unittest2.TestCase):
+    def setUp(self):
+        self.interner = Interner(value_limit=2)
+
+    def test_intern(self):
+        first = self.interner.intern(fresh("person"))
+        self.assertIs(self.interner.intern(fresh("person")), first)
+        self.assertEqual(len(self.interner), 1)
+
+    def test_intern_keeps_type(self):
+        self.interner.intern(fresh("person"))
+        found = self.interner.intern(u"person")
+        self.assertIsInstance(found, unicode)
+
+    def test_intern_other_values(self):
+        self.assertEqual(self.interner.intern(None), None)
+        self.assertEqual(self.interner.intern(5), 5)
+        self.assertEqual(len(self.interner), 0)
+
+    def test_intern_value(self):
+        first = self.interner.intern_value("person", "city", fresh("Sydney"))
+        self.assertIs(
+            self.interner.intern_value("person", "city", fresh("Sydney")),
+            first,
+        )
+        self.assertIsNot(
+            self.interner.intern_value("place", "city", fresh("Sydney")),
+            first,
+        )
+
+    def test_intern_value_limit(self):
+        intern_value = self.interner.intern_value
+        intern_value("person", "city", "Sydney")
+        intern_value("person", "city", "Perth")
+        intern_value("person", "city", "Hobart")
+        self.assertIsNone(self.interner._values[("person", "city", str)])
+        hobart = fresh("Hobart")
+        self.assertIs(intern_value("person", "city", hobart), hobart)
+
+    def test_intern_value_disabled(self):
+        interner = Interner()
+        first = interner.intern_value("person", "city", fresh("Sydney"))
+        self.assertIsNot(
+            interner.intern_value("person", "city", fresh("Sydney")),
+            first,
+        )
+
+    def test_intern_properties(self):
+        first = {fresh("city"): fresh("Perth"), "age": 3}
+        second = {fresh("city"): fresh("Perth")}
+        self.interner.intern_properties("person", first)
+        self.interner.intern_properties("person", second)
+        self.assertEqual(second, {"city": "Perth"})
+        keys = dict((key, key) for key in first)
+        self.assertIs(second.keys()[0], keys["city"])
+        self.assertIs(second["city"], first["city"])
@@ -0,0 +1,103 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+# pylint: disable=protected-access
+
+import unittest2
+from ruruki.layouts import LayoutTable, CompactProperties
+
+
+class TestLayoutTable(unittest2.TestCase):
+    def setUp(self):
+        self.table = LayoutTable()
+
+    def test_layout_shared(self):
+        layout = self.table.layout(["name", "age"])
+        self.assertIs(self.table.layout(("age", "name")), layout)
+        self.assertEqual(layout.keys, ("age", "name"))
+        self.assertEqual(layout.positions, {"age": 0, "name": 1})
+        self.assertEqual(len(self.table), 1)
+
+    def test_layout_transitions(self):
+        layout = self.table.layout(["name"])
+        added = layout.add("age")
+        self.assertIs(added, self.table.layout(["age", "name"]))
+        self.assertIs(layout.add("age"), added)
+        self.assertIs(added.remove("age"), layout)
+
+    def test_compact(self):
+        first = self.table.compact({"name": "Marko", "age": 29})
+        second = self.table.compact({"age": 30, "name": "Josh"})
+        self.assertIsInstance(first, CompactProperties)
+        self.assertIs(first.layout, second.layout)
+        self.assertEqual(first._values, (29, "Marko"))
+
+
+class TestCompactProperties(unittest2.TestCase):
+    def setUp(self):
+        self.table = LayoutTable()
+        self.properties = self.table.compact({"name": "Marko", "age": 29})
+
+    def test_mapping(self):
+        self.assertEqual(self.properties["name"], "Marko")
+        self.assertRaises(KeyError, lambda: self.properties["city"])
+        self.assertEqual(self.properties.get("city", "-"), "-")
+        self.assertIn("age", self.properties)
+        self.assertEqual(len(self.properties), 2)
+        self.assertEqual(list(self.properties), ["age", "name"])
+        self.assertEqual(self.properties.keys(), ["age", "name"])
+        self.assertEqual(self.properties.values(), [29, "Marko"])
+        self.assertEqual(
+            self.properties.items(), [("age", 29), ("name", "Marko")]
+        )
+        self.assertEqual(list(self.properties.itervalues()), [29, "Marko"])
+
+    def test_equal_to_dict(self):
+        self.assertEqual(self.properties, {"name": "Marko", "age": 29})
+        self.assertEqual({"name": "Marko", "age": 29}, self.properties)
+        self.assertNotEqual(self.properties, {"name": "Marko"})
+        self.assertEqual(dict(self.properties), {"name": "Marko", "age": 29})
+        self.assertEqual(self.properties.copy(), {"name": "Marko", "age": 29})
+
+    def test_set_existing_key(self):
+        layout = self.properties.layout
+        self.properties["age"] = 30
+        self.assertIs(self.properties.layout, layout)
+        self.assertEqual(self.properties, {"name": "Marko", "age": 30})
+
+    def test_set_new_key(self):
+        self.properties["city"] = "Sydney"
+        self.assertEqual(
+            self.properties,
+            {"name": "Marko", "age": 29, "city": "Sydney"},
+        )
+        self.assertIs(
+            self.properties.layout,
+            self.table.layout(["age", "city", "name"]),
+        )
+
+    def test_delete(self):
+        del self.properties["age"]
+        self.assertEqual(self.properties, {"name": "Marko"})
+        self.assertIs(self.properties.layout, self.table.layout(["name"]))
+        self.assertRaises(KeyError, self.properties.__delitem__, "age")
+
+    def test_update(self):
+        self.properties.update({"age": 31}, city="Perth")
+        self.assertEqual(
+            self.properties,
+            {"name": "Marko", "age": 31, "city": "Perth"},
+        )
+        self.properties.update(age=32)
+        self.assertEqual(self.properties["age"], 32)
+
+    def test_mutable_mapping_methods(self):
+        self.assertEqual(self.properties.pop("age"), 29)
+        self.assertEqual(self.properties.setdefault("age", 1), 1)
+        self.properties.clear()
+        self.assertEqual(self.properties, {})
+        self.assertIs(self.properties.layout, self.table.layout([]))
+
+    def test_repr(self):
+        self.assertEqual(
+            repr(self.table.compact({"a": 1})), repr({"a": 1})
+        )
@@ -0,0 +1,89 @@
+# pylint: disable=missing-docstring
+# pylint: disable=invalid-name
+
+import unittest2
+from ruruki.entities import Vertex
+from ruruki.ordering import is_after, position_of, top
+
+
+class TestPositionOf(unittest2.TestCase):
+    def setUp(self):
+        self.vertex = Vertex("person", name="Bob", age=30)
+        self.vertex.ident = 7
+
+    def test_ident(self):
+        self.assertEqual(position_of()(self.vertex), (7,))
+
+    def test_callable(self):
+        position = position_of(lambda entity: entity.label)
+        self.assertEqual(position(self.vertex), ("person", 7))
+
+    def test_property(self):
+        self.assertEqual(position_of("age")(self.vertex), (0, 30, 7))
+
+    def test_property_missing(self):
+        self.assertEqual(position_of("height")(self.vertex), (1, 7))
+        self.assertGreater(
+            position_of("height")(self.vertex),
+            position_of("age")(self.vertex),
+        )
+
+
+class TestIsAfter(unittest2.TestCase):
+    def test_ascending(self):
+        self.assertTrue(is_after((0, 2, 1), (0, 1, 5)))
+        self.assertFalse(is_after((0, 1, 5), (0, 1, 5)))
+
+    def test_reverse(self):
+        self.assertTrue(is_after((0, 1, 5), (0, 2, 1), reverse=True))
+        self.assertFalse(is_after((0, 2, 1), (0, 1, 5), reverse=True))
+
+
+class TestTop(unittest2.TestCase):
+    def setUp(self):
+        self.vertices = []
+        for ident, age in enumerate([40, 10, 30, 10, None, 20]):
+            vertex = Vertex("person", age=age)
+            vertex.ident = ident
+            self.vertices.append(vertex)
+        self.position = position_of("age")
+
+    def idents(self, entities):
+        return [entity.ident for entity in entities]
+
+    def test_all(self):
+        self.assertEqual(
+            self.idents(top(self.vertices, self.position)),
+            [1, 3, 5, 2, 0, 4],
+        )
+
+    def test_limit(self):
+        self.assertEqual(
+            self.idents(top(self.vertices, self.position, limit=3)),
+            [1, 3, 5],
+        )
+
+    def test_offset(self):
+        self.assertEqual(
+            self.idents(
+                top(self.vertices, self.position, offset=2, limit=2)
+            ),
+            [5, 2],
+        )
+
+    def test_reverse(self):
+        self.assertEqual(
+            self.idents(
+                top(self.vertices, self.position, reverse=True, limit=3)
+            ),
+            [4, 0, 2],
+        )
+
+    def test_after(self):
+        after = self.position(self.vertices[1])
+        self.assertEqual(
+            self.idents(
+                top(self.vertices, self.position, limit=2, after=after)
+            ),
+            [3, 5],
+        )